@@ -0,0 +1,197 @@
+"""
+Speculative answers for suggested questions
+conversation_points suggests questions the user is likely to ask. While the
+worker's LLM budget is idle, the session answers them in the background and
+caches each answer against the transcript version (line count) it was
+computed at. A user_message that matches a cached question (same text, or
+an embedding above PREFETCH_MATCH_SIMILARITY) while the answer is still
+fresh is answered immediately instead of waiting for retrieval and an LLM
+round-trip.
+"""
+
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+from llm_budget import llm_budget
+
+PREFETCH_MAX_QUESTIONS = int(os.getenv("PREFETCH_MAX_QUESTIONS", "3"))  # Per conversation_points update
+PREFETCH_MAX_STALE_LINES = int(os.getenv("PREFETCH_MAX_STALE_LINES", "5"))  # Transcript lines an answer may lag
+PREFETCH_MATCH_SIMILARITY = float(os.getenv("PREFETCH_MATCH_SIMILARITY", "0.9"))
+PREFETCH_IDLE_POLL_SECONDS = 0.5
+PREFETCH_IDLE_WAIT_SECONDS = 10  # Give up on a batch if the budget never goes idle
+
+
+def _normalize_question(text: str) -> str:
+    return " ".join(text.lower().strip(" ?!.").split())
+
+
+def _default_embed(texts: List[str]) -> np.ndarray:
+    from embedding_service import get_embeddings_batch
+    return get_embeddings_batch(texts)
+
+
+def budget_idle() -> bool:
+    """Nothing waiting for an LLM slot and at least one slot free."""
+    return llm_budget.queued == 0 and llm_budget.in_flight < llm_budget.max_concurrent
+
+
+class AnswerPrefetcher:
+    """Per-session cache of speculatively computed answers.
+
+    `compute(question)` runs retrieval and the LLM call (at background
+    priority, so it still goes through the shared budget under the session's
+    fairness key) and returns the answer or None.
+    """
+
+    def __init__(self, compute: Callable[[str], Awaitable[Optional[str]]], version: Callable[[], int],
+                 embed: Optional[Callable[[List[str]], np.ndarray]] = None, is_idle: Callable[[], bool] = budget_idle):
+        self.compute = compute
+        self.version = version
+        self.embed = embed or _default_embed
+        self.is_idle = is_idle
+        self.cache: Dict[str, Dict] = {}  # normalized question -> {"question", "vector", "version", "answer", "seconds"}
+        self._task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.prefetched = 0
+        self.skipped_busy = 0
+        self.saved_seconds = 0.0
+
+    def _fresh(self, entry: Dict) -> bool:
+        return self.version() - entry["version"] <= PREFETCH_MAX_STALE_LINES
+
+    def schedule(self, questions: List[str]):
+        """Prefetch answers for newly suggested questions; replaces any batch still waiting."""
+        pending = [q.strip() for q in questions if q and q.strip()]
+        pending = [q for q in pending
+                   if not (_normalize_question(q) in self.cache and self._fresh(self.cache[_normalize_question(q)]))]
+        if not pending:
+            return
+        if self._task is not None:
+            self._task.cancel()
+        self._task = asyncio.create_task(self._prefetch(pending[:PREFETCH_MAX_QUESTIONS]))
+
+    async def _prefetch(self, questions: List[str]):
+        vectors = await asyncio.to_thread(self.embed, questions)
+        for question, vector in zip(questions, vectors):
+            waited = 0.0
+            while not self.is_idle():
+                if waited >= PREFETCH_IDLE_WAIT_SECONDS:
+                    self.skipped_busy += 1
+                    return
+                await asyncio.sleep(PREFETCH_IDLE_POLL_SECONDS)
+                waited += PREFETCH_IDLE_POLL_SECONDS
+            version = self.version()
+            started = time.perf_counter()
+            answer = await self.compute(question)
+            if answer is None:
+                continue
+            vector = np.asarray(vector, dtype=np.float32)
+            self.cache[_normalize_question(question)] = {
+                "question": question,
+                "vector": vector / (np.linalg.norm(vector) or 1.0),
+                "version": version,
+                "answer": answer,
+                "seconds": time.perf_counter() - started,
+            }
+            self.prefetched += 1
+        # Drop answers too stale to ever be served
+        for key in [k for k, entry in self.cache.items() if not self._fresh(entry)]:
+            del self.cache[key]
+
+    def lookup(self, question: str, question_vector: Optional[np.ndarray] = None) -> Optional[Dict]:
+        """A fresh cached answer for this question, counted as a hit or miss."""
+        entry = self.cache.get(_normalize_question(question))
+        if (entry is None or not self._fresh(entry)) and question_vector is not None:
+            fresh = [e for e in self.cache.values() if self._fresh(e)]
+            if fresh:
+                query = np.asarray(question_vector, dtype=np.float32)
+                query = query / (np.linalg.norm(query) or 1.0)
+                scores = np.stack([e["vector"] for e in fresh]) @ query
+                best = int(np.argmax(scores))
+                entry = fresh[best] if scores[best] >= PREFETCH_MATCH_SIMILARITY else None
+        if entry is None or not self._fresh(entry):
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.saved_seconds += entry["seconds"]
+        return entry
+
+    def cancel(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> Dict:
+        asked = self.hits + self.misses
+        return {
+            "prefetched": self.prefetched,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / asked, 3) if asked else 0.0,
+            "skipped_busy": self.skipped_busy,
+            "latency_saved_seconds": round(self.saved_seconds, 3),
+        }
+
+
+def benchmark(questions: int = 100, latency_ms: float = 300, lines_per_tick: int = 4, embed=None):
+    """Hit rate and answer latency with and without prefetching, against LocalLLM with fixed latency.
+
+    Every tick the transcript grows and conversation_points suggests two
+    questions; then the user asks one. Half the time it is a suggested
+    question (as suggested, or lightly reworded), otherwise something new.
+    """
+    import random
+    from llm_provider import LocalLLM
+
+    rng = random.Random(0)
+    topics = ["the launch timeline", "the Q3 budget", "the API export", "hiring", "the design review",
+              "onboarding metrics", "the pricing page", "the security audit", "the migration", "the roadmap"]
+    templates = ["Who owns {}?", "What is the next step for {}?", "When is {} due?", "What was decided about {}?"]
+    rewordings = [("Who owns", "Who is the owner of"), ("What is", "What's"), ("?", "")]
+
+    async def run():
+        transcript_lines = [0]
+        llm = LocalLLM("answer-prefetch-bench", latency_ms=latency_ms, distribution="fixed", tokens_per_sec=0)
+        prefetcher = AnswerPrefetcher(llm.get_summary_and_suggestion, version=lambda: transcript_lines[0],
+                                      embed=embed, is_idle=lambda: True)
+        embed_one = prefetcher.embed
+        served, computed = [], []
+        for _ in range(questions):
+            transcript_lines[0] += lines_per_tick
+            suggested = [rng.choice(templates).format(rng.choice(topics)) for _ in range(2)]
+            prefetcher.schedule(suggested)
+            if prefetcher._task is not None:
+                await prefetcher._task  # Idle time between points and the next question
+            if rng.random() < 0.5:
+                question = rng.choice(suggested)
+                if rng.random() < 0.5:
+                    phrase, alternative = rng.choice(rewordings)
+                    question = question.replace(phrase, alternative)
+            else:
+                question = rng.choice(templates).format(rng.choice(topics)).replace("?", " this week?")
+            started = time.perf_counter()
+            entry = prefetcher.lookup(question, embed_one([question])[0])
+            if entry is None:
+                await llm.get_summary_and_suggestion(question)
+            served.append(time.perf_counter() - started)
+            computed.append(entry["seconds"] if entry else served[-1])
+        return prefetcher.stats(), served, computed
+
+    stats, served, computed = asyncio.run(run())
+    served.sort()
+    computed.sort()
+    print(f"[AnswerPrefetch] {questions} questions, {stats['prefetched']} speculative answers "
+          f"({stats['prefetched'] / questions:.1f} LLM calls per question asked)")
+    print(f"[AnswerPrefetch] hit rate {stats['hit_rate']:.2f}, latency saved {stats['latency_saved_seconds']:.1f}s")
+    print(f"[AnswerPrefetch] answer latency p50 {served[len(served) // 2] * 1000:.0f} ms "
+          f"(without prefetch {computed[len(computed) // 2] * 1000:.0f} ms), "
+          f"mean {sum(served) / len(served) * 1000:.0f} ms (without {sum(computed) / len(computed) * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -2,7 +2,7 @@ from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import HTTPException, status, Depends
+from fastapi import HTTPException, status, Depends, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import httpx
 import os
@@ -20,6 +20,7 @@ if not SECRET_KEY:
 
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+VIEWER_GRANT_EXPIRE_MINUTES = 120
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -51,6 +52,27 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def decode_token(token: str) -> TokenData:
+    """Decode a JWT access token; raises JWTError if it is invalid or expired"""
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    email: str = payload.get("sub")
+    if email is None:
+        raise JWTError("Token has no subject")
+    return TokenData(email=email)
+
+def create_viewer_grant(session_id: str, epoch: str) -> str:
+    """Signed permission to watch one live session; has no subject, so it is not an access token"""
+    return create_access_token({"view": session_id, "epoch": epoch},
+                               timedelta(minutes=VIEWER_GRANT_EXPIRE_MINUTES))
+
+def viewer_grant_allows(grant: str, session_id: str, epoch: str) -> bool:
+    """Whether a grant was issued for this session id and this run of it"""
+    try:
+        payload = jwt.decode(grant, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return False
+    return payload.get("view") == session_id and payload.get("epoch") == epoch
+
 async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> TokenData:
     """Verify and decode JWT token"""
     credentials_exception = HTTPException(
@@ -59,11 +81,7 @@ async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(secur
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-        token_data = TokenData(email=email)
+        token_data = decode_token(credentials.credentials)
     except JWTError:
         raise credentials_exception
     return token_data
@@ -89,6 +107,18 @@ async def get_current_user(users_collection, token_data: TokenData = Depends(ver
         google_id=user.get("google_id")
     )
 
+async def get_request_user(request: Request, token_data: TokenData = Depends(verify_token)) -> UserResponse:
+    """Route dependency: the authenticated user, looked up in the app's users collection"""
+    return await get_current_user(request.app.state.users_collection, token_data)
+
+def require_same_user(user_id: str, current_user: UserResponse):
+    """Reject access to another user's data"""
+    if user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not allowed to access another user's data",
+        )
+
 async def authenticate_user(users_collection, email: str, password: str):
     """Authenticate user with email and password"""
     user = await get_user_by_email(users_collection, email)
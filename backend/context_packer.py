@@ -0,0 +1,187 @@
+"""
+Token-budgeted context packing for Q&A prompts
+Turns hybrid-search hits into the context block of a user_message prompt:
+the rolling summary first, then the best-scoring chunks, greedily, while
+they fit the token budget, then the chunks next to them. Chunks overlap
+(see TranscriptChunker), so packing works on the transcript lines behind
+them: a line is paid for once, and the context is rendered as
+chronological runs of lines rather than repeated chunk text.
+"""
+
+import os
+import time
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+QA_CONTEXT_TOKEN_BUDGET = int(os.getenv("QA_CONTEXT_TOKEN_BUDGET", "1000"))
+QA_CONTEXT_CANDIDATES = int(os.getenv("QA_CONTEXT_CANDIDATES", "20"))
+QA_CONTEXT_NEIGHBORS = int(os.getenv("QA_CONTEXT_NEIGHBORS", "1"))  # Chunks on each side of a hit
+QA_SUMMARY_SHARE = 0.25  # At most this share of the budget goes to the rolling summary
+RUN_SEPARATOR = "\n...\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """Fast local token estimate: ~4 characters per token, at least one per word."""
+    return max(len(text.split()), (len(text) + 3) // 4)
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    words = text.split()
+    kept: List[str] = []
+    used = 0
+    for word in words:
+        cost = estimate_tokens(word + " ")
+        if used + cost > max_tokens:
+            break
+        kept.append(word)
+        used += cost
+    return " ".join(kept) + " ..."
+
+
+def _chunk_lines(store, chunk_id: int) -> Optional[range]:
+    source = store.sources[chunk_id] if chunk_id < len(store.sources) else None
+    return range(source[0], source[1] + 1) if source else None
+
+
+def pack_context(store, hits: Sequence[Tuple[int, float]], lines: Sequence[str], summary: Optional[str] = None,
+                 budget: int = QA_CONTEXT_TOKEN_BUDGET, neighbors: int = QA_CONTEXT_NEIGHBORS) -> Dict:
+    """Pack (chunk_id, score) hits from SessionVectorStore into at most `budget` estimated tokens.
+
+    Returns the rendered "context" plus its "tokens" and what went in
+    (hit, neighbour and line counts) for metrics.
+    """
+    started = time.perf_counter()
+    parts: List[str] = []
+    used = 0
+    if summary:
+        summary = _truncate(summary.strip(), int(budget * QA_SUMMARY_SHARE))
+        parts.append(f"Meeting summary so far:\n{summary}")
+        used += estimate_tokens(parts[0])
+
+    selected: Set[int] = set()  # Transcript line indices
+    loose: List[str] = []  # Chunks without line sources (packed as text)
+    line_costs: Dict[int, int] = {}
+
+    def cost_of(chunk_id: int) -> Tuple[int, List[int]]:
+        span = _chunk_lines(store, chunk_id)
+        if span is None:
+            text = store.texts[chunk_id]
+            return (0, []) if text in loose else (estimate_tokens(text), [])
+        new = [i for i in span if i not in selected and i < len(lines)]
+        for i in new:
+            if i not in line_costs:
+                line_costs[i] = estimate_tokens(lines[i]) + 1  # + newline
+        return sum(line_costs[i] for i in new), new
+
+    def take(chunk_id: int) -> bool:
+        nonlocal used
+        cost, new = cost_of(chunk_id)
+        if cost == 0 or used + cost > budget:
+            return False
+        if _chunk_lines(store, chunk_id) is None:
+            loose.append(store.texts[chunk_id])
+        selected.update(new)
+        used += cost
+        return True
+
+    taken = [chunk_id for chunk_id, _ in hits if take(chunk_id)]
+    expanded = 0
+    for distance in range(1, neighbors + 1):
+        for chunk_id in taken:
+            for neighbor in (chunk_id - distance, chunk_id + distance):
+                if 0 <= neighbor < len(store.texts) and take(neighbor):
+                    expanded += 1
+
+    runs: List[List[str]] = []
+    previous = None
+    for i in sorted(selected):
+        if previous is None or i != previous + 1:
+            runs.append([])
+        runs[-1].append(lines[i])
+        previous = i
+    transcript = RUN_SEPARATOR.join("\n".join(run) for run in runs + [[text] for text in loose])
+    if transcript:
+        parts.append(f"Relevant transcript:\n{transcript}")
+    context = "\n\n".join(parts)
+    return {
+        "context": context,
+        "tokens": estimate_tokens(context),
+        "hits": len(taken),
+        "neighbors": expanded,
+        "lines": len(selected),
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def build_qa_prompt(context: str, question: str) -> str:
+    return f"Context:\n{context}\n\nUser question: {question}\n\nAnswer as a helpful meeting assistant."
+
+
+def benchmark(lines_count: int = 3000, questions: int = 200, budgets=(500, 1000, 1500, 3000), dimension: int = 384):
+    """Prompt tokens, packing latency and context recall: packed context vs the old raw top-5 concatenation.
+
+    Each fact is split over two lines: "Next up is ticket 4821." then
+    "Dana owns it, due Friday." A question names the ticket, so retrieval
+    finds the first line, but answering needs the second, which may sit
+    in the next chunk. Recall counts questions whose context holds both
+    lines; with a deterministic LLM stand-in it is the proxy for answer
+    quality.
+    """
+    import random
+    import numpy as np
+    from transcript_chunker import TranscriptChunker
+    from vector_store import SessionVectorStore
+
+    rng = random.Random(0)
+    vectors = np.random.default_rng(0)
+    filler = ("we should revisit the roadmap and the budget before the launch review with the design team "
+              "and check the customer metrics again next week").split()
+    names = ["Alice", "Bob", "Chen", "Dana", "Eve", "Farid"]
+    days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+    lines: List[str] = []
+    facts: List[Tuple[str, int]] = []  # (ticket, index of the line naming it)
+    while len(lines) < lines_count:
+        if rng.random() < 0.2:
+            ticket = f"ticket {rng.randint(1000, 99999)}"
+            facts.append((ticket, len(lines)))
+            lines.append(f"Speaker {rng.randint(1, 3)}: Next up is {ticket}.")
+            lines.append(f"Speaker {rng.randint(1, 3)}: {rng.choice(names)} owns it, due {rng.choice(days)}.")
+        else:
+            lines.append(f"Speaker {rng.randint(1, 3)}: " + " ".join(rng.choices(filler, k=rng.randint(5, 20))))
+    store = SessionVectorStore(dimension)
+    chunker = TranscriptChunker()
+    for i, line in enumerate(lines):
+        window = chunker.add(i, line)
+        if window:
+            store.add_text(window["text"], vectors.standard_normal(dimension), (window["line_start"], window["line_end"]))
+    window = chunker.flush()
+    if window:
+        store.add_text(window["text"], vectors.standard_normal(dimension), (window["line_start"], window["line_end"]))
+    summary = "- The team reviewed open tickets and owners\n- Launch review moves to next week\n" * 3
+
+    asked = rng.sample(facts, min(questions, len(facts)))
+    rows = {}
+    for label, budget in [("raw top-5", None)] + [(f"packed {b}", b) for b in budgets]:
+        tokens, seconds, recalled = [], 0.0, 0
+        for ticket, line_index in asked:
+            question = f"Who owns {ticket}?"
+            q_embedding = vectors.standard_normal(dimension)
+            started = time.perf_counter()
+            if budget is None:
+                context = "\n".join(store.search_hybrid(question, q_embedding, k=5))
+            else:
+                hits = store.search_hybrid_scored(question, q_embedding, k=QA_CONTEXT_CANDIDATES)
+                context = pack_context(store, hits, lines, summary, budget)["context"]
+            seconds += time.perf_counter() - started
+            tokens.append(estimate_tokens(build_qa_prompt(context, question)))
+            recalled += lines[line_index] in context and lines[line_index + 1] in context
+        tokens.sort()
+        rows[label] = (tokens[len(tokens) // 2], tokens[-1], seconds / len(asked) * 1000, recalled / len(asked))
+    for label, (median, worst, ms, recall) in rows.items():
+        print(f"[ContextPacker] {label:>12}: prompt tokens median {median}, max {worst}, "
+              f"{ms:.2f} ms/question (retrieval + packing), recall {recall:.2f}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -1,6 +1,6 @@
-import motor.motor_asyncio
-from pymongo import MongoClient
-from typing import Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from datetime import datetime
+import base64
 import os
 from dotenv import load_dotenv
 
@@ -12,6 +12,7 @@ DATABASE_NAME = os.getenv("DATABASE_NAME", "project_co_pilot")
 
 # --- ASYNC (for FastAPI) ---
 def get_async_client():
+    import motor.motor_asyncio
     return motor.motor_asyncio.AsyncIOMotorClient(MONGODB_URL)
 
 def get_async_database(client):
@@ -23,9 +24,19 @@ def get_users_collection(database):
 def get_meeting_sessions_collection(database):
     return database.meeting_sessions
 
-# --- SYNC (for background tasks) ---
-sync_client = MongoClient(MONGODB_URL)
-sync_database = sync_client[DATABASE_NAME]
+# --- SYNC (for background tasks and CLI jobs) ---
+# Created on first use: the API server never needs a blocking client
+_sync_client = None
+
+def get_sync_client():
+    global _sync_client
+    if _sync_client is None:
+        from pymongo import MongoClient
+        _sync_client = MongoClient(MONGODB_URL)
+    return _sync_client
+
+def get_sync_database():
+    return get_sync_client()[DATABASE_NAME]
 
 # Create indexes
 async def create_indexes(users_collection, meeting_sessions_collection):
@@ -33,7 +44,8 @@ async def create_indexes(users_collection, meeting_sessions_collection):
     await users_collection.create_index("email", unique=True)
     await users_collection.create_index("github_id")
     await users_collection.create_index("google_id")
-    await meeting_sessions_collection.create_index("user_id")
+    # Backs keyset pagination of a user's meetings, newest first (_id breaks created_at ties)
+    await meeting_sessions_collection.create_index([("user_id", 1), ("created_at", -1), ("_id", -1)])
     await meeting_sessions_collection.create_index("created_at")
 
 # Database utilities (all now require explicit collection arguments)
@@ -73,12 +85,76 @@ async def get_user_meetings(meeting_sessions_collection, user_id: str, limit: in
     ).sort("created_at", -1).limit(limit)
     return await cursor.to_list(length=limit)
 
-async def test_connection(async_client, sync_client, users_collection, meeting_sessions_collection):
+# Meeting list/detail views leave transcript bodies on the server
+MEETING_LIST_PROJECTION = {
+    "title": 1, "start_time": 1, "end_time": 1, "created_at": 1, "transcript_lines": 1,
+    "chunk_count": {"$size": {"$ifNull": ["$transcript_chunks", []]}},
+}
+MEETING_DETAIL_PROJECTION = {**MEETING_LIST_PROJECTION, "summary": 1, "user_id": 1}
+TRANSCRIPT_READ_BATCH = 500
+
+def encode_meeting_cursor(meeting: dict) -> str:
+    """Opaque cursor pointing just after this meeting in newest-first order."""
+    raw = f"{meeting['created_at'].isoformat()}|{meeting['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_meeting_cursor(cursor: str) -> Tuple[datetime, "ObjectId"]:
+    from bson import ObjectId
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, meeting_id = raw.split("|")
+        return datetime.fromisoformat(created_at), ObjectId(meeting_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+async def get_user_meetings_page(meeting_sessions_collection, user_id: str, limit: int = 20,
+                                 cursor: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+    """One page of a user's meetings, newest first, without transcripts.
+
+    Keyset pagination on (created_at, _id): each page is an index range scan
+    from the cursor, so deep pages cost the same as the first one.
+    """
+    from bson import ObjectId
+    query: Dict = {"user_id": ObjectId(user_id)}
+    if cursor:
+        created_at, meeting_id = decode_meeting_cursor(cursor)
+        query["$or"] = [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": meeting_id}},
+        ]
+    found = meeting_sessions_collection.find(query, MEETING_LIST_PROJECTION) \
+        .sort([("created_at", -1), ("_id", -1)]).limit(limit + 1)
+    meetings = await found.to_list(length=limit + 1)
+    next_cursor = encode_meeting_cursor(meetings[limit - 1]) if len(meetings) > limit else None
+    return meetings[:limit], next_cursor
+
+async def get_user_meeting(meeting_sessions_collection, user_id: str, meeting_id: str) -> Optional[dict]:
+    """The meeting, only if it belongs to user_id (None otherwise, so callers answer 404 either way)."""
+    from bson import ObjectId
+    return await meeting_sessions_collection.find_one(
+        {"_id": ObjectId(meeting_id), "user_id": ObjectId(user_id)}, MEETING_DETAIL_PROJECTION
+    )
+
+async def iter_transcript_chunks(meeting_sessions_collection, meeting_id: str,
+                                 batch_size: int = TRANSCRIPT_READ_BATCH) -> AsyncIterator[str]:
+    """Yield a meeting's transcript chunks, fetching batch_size at a time with $slice."""
+    from bson import ObjectId
+    offset = 0
+    while True:
+        doc = await meeting_sessions_collection.find_one(
+            {"_id": ObjectId(meeting_id)}, {"transcript_chunks": {"$slice": [offset, batch_size]}, "_id": 0}
+        )
+        chunks = (doc or {}).get("transcript_chunks") or []
+        for chunk in chunks:
+            yield chunk
+        if len(chunks) < batch_size:
+            return
+        offset += batch_size
+
+async def test_connection(async_client, users_collection, meeting_sessions_collection):
     try:
         await async_client.admin.command('ping')
         print("✅ MongoDB async connection successful!")
-        sync_client.admin.command('ping')
-        print("✅ MongoDB sync connection successful!")
         await create_indexes(users_collection, meeting_sessions_collection)
         print("✅ Database indexes created successfully!")
         return True
@@ -88,7 +164,7 @@ async def test_connection(async_client, sync_client, users_collection, meeting_s
 
 def test_connection_sync():
     try:
-        sync_client.admin.command('ping')
+        get_sync_client().admin.command('ping')
         print("✅ MongoDB connection successful!")
         return True
     except Exception as e:
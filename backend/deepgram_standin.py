@@ -0,0 +1,233 @@
+"""
+Local Deepgram stand-in for Project Co-Pilot
+A WebSocket server speaking enough of Deepgram's streaming /v1/listen
+protocol to exercise DeepgramSTT without network access. It parses the
+query string with the same StreamConfig the backend negotiates, checks every
+audio frame against the declared encoding and channel layout, and answers
+with synthetic interim/final Results (with word timings, speakers and
+channel_index) plus UtteranceEnd events.
+
+Frames that do not match the config close the stream with 1008, like
+Deepgram does for undecodable audio.
+
+Usage:
+    python deepgram_standin.py --port 8787
+    DEEPGRAM_LISTEN_URL=ws://127.0.0.1:8787/v1/listen uvicorn main:app
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import uuid
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+from stream_config import StreamConfig
+
+PHRASES = [
+    "Let's review the launch timeline",
+    "I will send the budget update by Friday",
+    "Can we move the design review to next week",
+    "The customer asked for an API export",
+    "We should hire another backend engineer",
+]
+WORD_SECONDS = 0.3
+INTERIM_EVERY_SECONDS = 0.5
+# Magic numbers checked on the first frame when no raw encoding is declared
+CONTAINER_MAGIC = {"webm": b"\x1a\x45\xdf\xa3", "ogg": b"OggS", "wav": b"RIFF", "flac": b"fLaC"}
+# Opus frame duration (ms) by TOC config number (RFC 6716, section 3.1)
+OPUS_FRAME_MS = [10, 20, 40, 60] * 3 + [10, 20] * 2 + [2.5, 5, 10, 20] * 4
+
+stats = {"streams": 0, "frames": 0, "bytes": 0, "rejected_frames": 0, "rejected_streams": 0}
+
+
+class FrameError(ValueError):
+    pass
+
+
+def opus_packet_seconds(packet: bytes) -> float:
+    """Duration of one raw Opus packet; raises FrameError if it breaks RFC 6716 framing rules."""
+    if not packet:
+        raise FrameError("empty Opus packet")
+    toc = packet[0]
+    frame_ms = OPUS_FRAME_MS[toc >> 3]
+    code = toc & 0x3
+    payload = len(packet) - 1
+    if code == 0:
+        frames = 1
+        if payload > 1275:
+            raise FrameError("Opus frame larger than 1275 bytes")
+    elif code == 1:
+        frames = 2
+        if payload % 2:
+            raise FrameError("Opus code 1 packet with odd payload length")
+    elif code == 2:
+        frames = 2
+        if payload < 1:
+            raise FrameError("truncated Opus code 2 packet")
+    else:
+        if payload < 1:
+            raise FrameError("truncated Opus code 3 packet")
+        frames = packet[1] & 0x3F
+        if frames == 0:
+            raise FrameError("Opus code 3 packet with zero frames")
+    if frames * frame_ms > 120:
+        raise FrameError("Opus packet longer than 120 ms")
+    return frames * frame_ms / 1000
+
+
+class StandinStream:
+    """Validates the frames of one stream and produces transcript events for them."""
+
+    def __init__(self, config: StreamConfig, containerized: bool = False):
+        self.config = config
+        self.containerized = containerized  # No encoding in the query: the format is sniffed, like Deepgram
+        self.request_id = str(uuid.uuid4())
+        self.first_frame = True
+        self.audio_seconds = 0.0
+        channels = config.channels if config.multichannel else 1
+        # Per output channel: phrase position and audio time of its current utterance
+        self.channels = [{"phrase": i, "start": 0.0, "last_interim": 0.0} for i in range(channels)]
+        self.speakers = itertools.cycle([0, 1])
+
+    def frame_seconds(self, frame: bytes) -> float:
+        config = self.config
+        first, self.first_frame = self.first_frame, False
+        if self.containerized:
+            if first and not any(frame.startswith(magic) for magic in CONTAINER_MAGIC.values()):
+                raise FrameError(f"stream does not start with a {'/'.join(CONTAINER_MAGIC)} header")
+            # Container payloads are opaque here; assume 32 kbit/s
+            return len(frame) * 8 / 32000
+        if config.encoding == "linear16":
+            if not frame or len(frame) % (2 * config.channels):
+                raise FrameError(f"linear16 frame of {len(frame)} bytes is not whole {config.channels}-channel samples")
+            return len(frame) / (2 * config.channels * config.sample_rate)
+        if config.encoding == "mulaw":
+            if not frame or len(frame) % config.channels:
+                raise FrameError(f"mulaw frame of {len(frame)} bytes is not whole {config.channels}-channel samples")
+            return len(frame) / (config.channels * config.sample_rate)
+        if config.encoding == "opus":
+            return opus_packet_seconds(frame)
+        if first and not frame.startswith(CONTAINER_MAGIC["flac"]):
+            raise FrameError("flac stream does not start with fLaC")
+        return len(frame) * 8 / 400000
+
+    def advance(self, seconds: float) -> List[Dict]:
+        """Move audio time forward and return the Results/UtteranceEnd events now due."""
+        self.audio_seconds += seconds
+        events = []
+        for index, channel in enumerate(self.channels):
+            words = PHRASES[channel["phrase"] % len(PHRASES)].split()
+            heard = int((self.audio_seconds - channel["start"]) / WORD_SECONDS)
+            if heard >= len(words):
+                events.append(self._results(index, words, is_final=True))
+                if self.config.utterance_end_ms is not None:
+                    events.append({"type": "UtteranceEnd", "channel": [index, len(self.channels)],
+                                   "last_word_end": round(self.audio_seconds, 2)})
+                channel.update(phrase=channel["phrase"] + 1, start=self.audio_seconds, last_interim=self.audio_seconds)
+            elif (self.config.interim_results and heard
+                  and self.audio_seconds - channel["last_interim"] >= INTERIM_EVERY_SECONDS):
+                events.append(self._results(index, words[:heard], is_final=False))
+                channel["last_interim"] = self.audio_seconds
+        return events
+
+    def _results(self, index: int, words: List[str], is_final: bool) -> Dict:
+        start = self.channels[index]["start"]
+        speaker = next(self.speakers) if is_final else 0
+        word_entries = [{
+            "word": w.lower(), "punctuated_word": w,
+            "start": round(start + i * WORD_SECONDS, 2), "end": round(start + (i + 0.8) * WORD_SECONDS, 2),
+            "confidence": 0.95,
+            **({"speaker": speaker} if self.config.diarize else {}),
+        } for i, w in enumerate(words)]
+        return {
+            "type": "Results",
+            "channel_index": [index, len(self.channels)],
+            "duration": round(len(words) * WORD_SECONDS, 2),
+            "start": round(start, 2),
+            "is_final": is_final,
+            "speech_final": is_final,
+            "channel": {"alternatives": [{"transcript": " ".join(words), "confidence": 0.95, "words": word_entries}]},
+        }
+
+    def metadata(self) -> Dict:
+        return {"type": "Metadata", "request_id": self.request_id,
+                "duration": round(self.audio_seconds, 3), "channels": self.config.channels}
+
+
+def _request_path_and_headers(ws, path: Optional[str]):
+    # websockets < 14 passes the path to the handler; newer versions expose ws.request
+    request = getattr(ws, "request", None)
+    if path is None:
+        path = request.path
+    headers = request.headers if request is not None else ws.request_headers
+    return path, headers
+
+
+async def handle(ws, path: Optional[str] = None):
+    path, headers = _request_path_and_headers(ws, path)
+    url = urlsplit(path)
+    if url.path != "/v1/listen":
+        await ws.close(code=1008, reason="Unknown endpoint")
+        return
+    if not (headers.get("Authorization") or "").startswith("Token "):
+        stats["rejected_streams"] += 1
+        await ws.close(code=1008, reason="Missing Authorization: Token header")
+        return
+    params = dict(parse_qsl(url.query))
+    try:
+        config = StreamConfig(**params)
+    except ValueError as e:
+        stats["rejected_streams"] += 1
+        await ws.close(code=1008, reason=str(e)[:120])
+        return
+
+    stream = StandinStream(config, containerized="encoding" not in params)
+    stats["streams"] += 1
+    async for message in ws:
+        if isinstance(message, str):
+            control = json.loads(message).get("type")
+            if control == "KeepAlive":
+                continue
+            if control in ("CloseStream", "Finalize"):
+                await ws.send(json.dumps(stream.metadata()))
+                if control == "CloseStream":
+                    await ws.close()
+                    return
+                continue
+            await ws.close(code=1008, reason=f"Unknown control message {control!r}")
+            return
+        try:
+            seconds = stream.frame_seconds(message)
+        except FrameError as e:
+            stats["rejected_frames"] += 1
+            await ws.send(json.dumps({"type": "Error", "description": str(e)}))
+            await ws.close(code=1008, reason="DATA-0000: The payload cannot be decoded as audio")
+            return
+        stats["frames"] += 1
+        stats["bytes"] += len(message)
+        for event in stream.advance(seconds):
+            await ws.send(json.dumps(event))
+
+
+async def serve(host: str, port: int):
+    import websockets
+    async with websockets.serve(handle, host, port):
+        print(f"[DeepgramStandin] Listening on ws://{host}:{port}/v1/listen")
+        await asyncio.Future()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for Deepgram streaming transcription")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print(f"[DeepgramStandin] {stats}")
+
+
+if __name__ == "__main__":
+    main()
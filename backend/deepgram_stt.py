@@ -6,29 +6,37 @@ import logging
 from typing import Optional, Callable
 import os
 
+from metrics import STT_PROCESS_AUDIO
+from word_table import parse_deepgram_words
+from stream_config import StreamConfig
+
 logger = logging.getLogger(__name__)
 
 class DeepgramSTT:
     """Real-time speech-to-text using Deepgram's WebSocket API"""
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, config: Optional[StreamConfig] = None):
         if api_key is None:
             api_key = os.getenv("DEEPGRAM_API_KEY", "")
         self.api_key = api_key
+        self.config = config or StreamConfig()
         self.websocket: Optional[websockets.WebSocketServerProtocol] = None
         self.deepgram_ws: Optional[websockets.WebSocketClientProtocol] = None
         self.is_connected = False
         self.on_transcript: Optional[Callable] = None
+        self.on_interim: Optional[Callable] = None
         self.audio_queue = asyncio.Queue()
         
-    async def connect(self, websocket: websockets.WebSocketServerProtocol, on_transcript: Callable):
+    async def connect(self, websocket: websockets.WebSocketServerProtocol, on_transcript: Callable,
+                      on_interim: Optional[Callable] = None):
         """Connect to Deepgram and set up real-time transcription"""
         self.websocket = websocket
         self.on_transcript = on_transcript
+        self.on_interim = on_interim
         
         try:
-            # Connect to Deepgram WebSocket API with proper parameters
-            deepgram_url = "wss://api.deepgram.com/v1/listen?model=nova-2&encoding=linear16&sample_rate=16000&channels=1&punctuate=true&smart_format=true&interim_results=true"
+            # Connect to Deepgram WebSocket API with the session's negotiated stream parameters
+            deepgram_url = self.config.listen_url()
             
             print("🔗 Connecting to Deepgram WebSocket API...")
             print(f"🔗 Deepgram URL: {deepgram_url}")
@@ -42,10 +50,13 @@ class DeepgramSTT:
             self.is_connected = True
             print("✅ Connected to Deepgram successfully")
             
-            # Send initial silence to keep connection alive
-            initial_silence = b'\x00' * 1024
-            await self.deepgram_ws.send(initial_silence)
-            print("✅ Sent initial audio data to Deepgram")
+            # Send initial silence to keep connection alive (only meaningful for raw PCM)
+            if self.config.container is None and self.config.encoding == "linear16":
+                initial_silence = b'\x00' * 1024 * self.config.channels
+                await self.deepgram_ws.send(initial_silence)
+                print("✅ Sent initial audio data to Deepgram")
+            else:
+                await self.keep_alive()
             
             # Start listening for Deepgram responses
             asyncio.create_task(self._listen_to_deepgram())
@@ -74,19 +85,30 @@ class DeepgramSTT:
                         print(f"📊 Deepgram metadata: {data.get('request_id', 'unknown')}")
                         continue
                     
+                    # Silence after the last word (utterance_end_ms): drop any caption left hanging
+                    if data.get("type") == "UtteranceEnd":
+                        if self.on_interim:
+                            await self.on_interim("", (data.get("channel") or [0])[0])
+                        continue
+                    
                     # Handle transcript messages
                     if "channel" in data and "alternatives" in data["channel"]:
-                        transcript = data["channel"]["alternatives"][0].get("transcript", "")
+                        alternative = data["channel"]["alternatives"][0]
+                        transcript = alternative.get("transcript", "")
                         is_final = data.get("is_final", False)
+                        channel = (data.get("channel_index") or [0])[0]  # [index, total] in multichannel mode
                         
                         print(f"📝 Deepgram transcript: '{transcript}' (final: {is_final})")
                         
                         if transcript.strip() and is_final:
                             print(f"✅ Final transcript: {transcript}")
                             
-                            # Send transcript back to client
+                            # Send transcript back to client, with word timings and speakers
                             if self.on_transcript:
-                                await self.on_transcript(transcript)
+                                await self.on_transcript(transcript, parse_deepgram_words(alternative), channel)
+                        elif self.on_interim and (transcript.strip() or is_final):
+                            # Interim hypothesis; an empty final clears a caption that came to nothing
+                            await self.on_interim(transcript, channel)
                     
                     # Handle errors
                     elif "error" in data:
@@ -117,13 +139,15 @@ class DeepgramSTT:
             return False
         
         try:
-            # Ensure audio data is in correct format (16-bit PCM)
-            if len(audio_data) % 2 != 0:
-                print("⚠️ Audio data length must be even (16-bit samples)")
+            # Raw 16-bit PCM frames must hold whole samples for every channel
+            alignment = self.config.frame_alignment
+            if len(audio_data) % alignment != 0:
+                print(f"⚠️ Audio data length must be a multiple of {alignment} bytes")
                 return False
             
             # Send audio data to Deepgram immediately
-            await self.deepgram_ws.send(audio_data)
+            with STT_PROCESS_AUDIO.time():
+                await self.deepgram_ws.send(audio_data)
             print(f"📤 Sent {len(audio_data)} bytes to Deepgram")
             return True
             
@@ -132,6 +156,17 @@ class DeepgramSTT:
             self.is_connected = False
             return False
     
+    async def keep_alive(self):
+        """Send a KeepAlive control message so Deepgram does not time out while no audio flows"""
+        if not self.is_connected or not self.deepgram_ws:
+            return False
+        try:
+            await self.deepgram_ws.send(json.dumps({"type": "KeepAlive"}))
+            return True
+        except Exception as e:
+            print(f"❌ Error sending KeepAlive to Deepgram: {repr(e)}")
+            return False
+
     async def disconnect(self):
         """Close the Deepgram connection"""
         self.is_connected = False
@@ -1,28 +1,183 @@
 import numpy as np
-from sentence_transformers import SentenceTransformer
+from collections import OrderedDict
+import hashlib
 import os
-from typing import List
+import tempfile
+import threading
+from typing import Dict, List, Optional
 
-# Load a lightweight embedding model for speed
-EMBEDDING_MODEL = SentenceTransformer('all-MiniLM-L6-v2')  # 384 dimensions, fast
+from metrics import EMBEDDING_ENCODE
+
+# Lightweight embedding model for speed; loaded on first use because importing
+# sentence_transformers (and torch) takes seconds
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")  # 384 dimensions, fast
+EMBEDDING_DIM = 384
+_model = None
+_model_lock = threading.Lock()
+
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH")  # Optional .npz file persisted across restarts
+
+def get_model():
+    """The SentenceTransformer, loaded once; concurrent first callers wait for the same load."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from sentence_transformers import SentenceTransformer
+                _model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+    return _model
+
+def model_loaded() -> bool:
+    return _model is not None
+
+def warm_up():
+    """Load the model and run one encode so the first real request pays neither cost."""
+    get_model().encode("warm up", convert_to_numpy=True)
+
+def normalize_text(text: str) -> str:
+    """Case/whitespace-insensitive form used as the cache key ("Okay, sounds good" == "okay,  sounds good")."""
+    return " ".join(text.lower().split())
+
+def _cache_key(text: str) -> bytes:
+    return hashlib.blake2b(normalize_text(text).encode("utf-8"), digest_size=16).digest()
+
+class EmbeddingCache:
+    """Bounded LRU cache of embeddings keyed by a hash of normalized text.
+
+    Vectors live in one preallocated float32 matrix; the LRU only maps keys
+    to row slots, so each entry costs a row plus a 16-byte key.
+    """
+
+    def __init__(self, capacity: int = EMBEDDING_CACHE_SIZE, dimension: int = EMBEDDING_DIM):
+        self.capacity = capacity
+        self.dimension = dimension
+        self.vectors = np.zeros((capacity, dimension), dtype=np.float32)
+        self.slots: "OrderedDict[bytes, int]" = OrderedDict()
+        self.free_slots = list(range(capacity - 1, -1, -1))
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        key = _cache_key(text)
+        with self._lock:
+            slot = self.slots.get(key)
+            if slot is None:
+                self.misses += 1
+                return None
+            self.slots.move_to_end(key)
+            self.hits += 1
+            return self.vectors[slot].copy()
+
+    def put(self, text: str, embedding: np.ndarray):
+        if self.capacity <= 0:
+            return
+        self._put_key(_cache_key(text), embedding)
+
+    def _put_key(self, key: bytes, embedding: np.ndarray):
+        with self._lock:
+            slot = self.slots.get(key)
+            if slot is None:
+                if self.free_slots:
+                    slot = self.free_slots.pop()
+                else:
+                    _, slot = self.slots.popitem(last=False)
+            self.slots[key] = slot
+            self.slots.move_to_end(key)
+            self.vectors[slot] = embedding
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self.slots),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def save(self, path: str):
+        """Persist entries in LRU order (oldest first).
+
+        Writes to a temp file in the same directory and renames it over
+        path, so a crash never leaves a truncated cache; through a file
+        handle, so np.savez does not add ".npz" to a path without it.
+        """
+        with self._lock:
+            keys = list(self.slots.keys())
+            slots = [self.slots[k] for k in keys]
+            keys_arr = np.frombuffer(b"".join(keys), dtype=np.uint8).reshape(-1, 16)
+            vectors = self.vectors[slots]
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".embedding_cache.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, keys=keys_arr, vectors=vectors)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def load(self, path: str):
+        if not os.path.exists(path):
+            return
+        data = np.load(path)
+        keys, vectors = data["keys"], data["vectors"]
+        if vectors.ndim != 2 or vectors.shape[1] != self.dimension:
+            print(f"[Embedding] Ignoring cache file with wrong shape: {path}")
+            return
+        for key, vector in zip(keys[-self.capacity:], vectors[-self.capacity:]):
+            self._put_key(key.tobytes(), vector)
+        print(f"[Embedding] Loaded {len(self.slots)} cached embeddings from {path}")
+
+embedding_cache = EmbeddingCache()
+if EMBEDDING_CACHE_PATH:
+    try:
+        embedding_cache.load(EMBEDDING_CACHE_PATH)
+    except Exception as e:
+        print(f"[Embedding] Failed to load embedding cache: {e}")
+
+def save_embedding_cache():
+    """Write the cache to EMBEDDING_CACHE_PATH, if configured."""
+    if not EMBEDDING_CACHE_PATH:
+        return
+    try:
+        embedding_cache.save(EMBEDDING_CACHE_PATH)
+    except Exception as e:
+        print(f"[Embedding] Failed to save embedding cache: {e}")
 
 def get_embedding(text: str) -> np.ndarray:
     """Generate embedding for a text chunk."""
     if not text.strip():
-        return np.zeros(384)  # Return zero vector for empty text
-    
+        return np.zeros(EMBEDDING_DIM)  # Return zero vector for empty text
+
+    cached = embedding_cache.get(text)
+    if cached is not None:
+        return cached
     try:
-        embedding = EMBEDDING_MODEL.encode(text, convert_to_numpy=True)
+        with EMBEDDING_ENCODE.time(("single",)):
+            embedding = get_model().encode(text, convert_to_numpy=True)
+        embedding_cache.put(text, embedding)
         return embedding
     except Exception as e:
         print(f"[Embedding] Error generating embedding: {e}")
-        return np.zeros(384)
+        return np.zeros(EMBEDDING_DIM)
 
 def get_embeddings_batch(texts: List[str]) -> List[np.ndarray]:
     """Generate embeddings for multiple text chunks efficiently."""
     try:
-        embeddings = EMBEDDING_MODEL.encode(texts, convert_to_numpy=True)
-        return embeddings
+        results: List[Optional[np.ndarray]] = [embedding_cache.get(t) for t in texts]
+        missing = [i for i, r in enumerate(results) if r is None]
+        if missing:
+            with EMBEDDING_ENCODE.time(("batch",)):
+                embeddings = get_model().encode([texts[i] for i in missing], convert_to_numpy=True)
+            for i, embedding in zip(missing, embeddings):
+                results[i] = embedding
+                embedding_cache.put(texts[i], embedding)
+        return np.stack(results) if results else np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
     except Exception as e:
         print(f"[Embedding] Error generating batch embeddings: {e}")
-        return [np.zeros(384) for _ in texts] 
\ No newline at end of file
+        return [np.zeros(EMBEDDING_DIM) for _ in texts]
@@ -0,0 +1,105 @@
+"""
+End-of-meeting summary for Project Co-Pilot
+Map-reduce over the whole transcript: split it into token-bounded segments,
+summarize the segments concurrently (at most FINAL_SUMMARY_PARALLELISM calls
+in flight), then merge the partial summaries FINAL_SUMMARY_FAN_IN at a time,
+level by level, until one remains. Wall-clock time is about
+ceil(segments / parallelism) + log_fan_in(segments) LLM round-trips, so
+doubling the parallelism roughly halves it for long meetings.
+
+Calls still go through the shared LLM budget at background priority, which
+caps the whole worker; the parallelism limit keeps one finishing meeting
+from taking every slot.
+"""
+
+import asyncio
+import os
+import time
+from typing import Dict, List
+
+from summary_scheduler import count_tokens
+
+FINAL_SUMMARY_SEGMENT_TOKENS = int(os.getenv("FINAL_SUMMARY_SEGMENT_TOKENS", "3000"))
+FINAL_SUMMARY_PARALLELISM = int(os.getenv("FINAL_SUMMARY_PARALLELISM", "3"))
+FINAL_SUMMARY_FAN_IN = max(2, int(os.getenv("FINAL_SUMMARY_FAN_IN", "8")))  # Below 2 a level would not shrink
+
+
+def split_segments(lines: List[str], max_tokens: int = FINAL_SUMMARY_SEGMENT_TOKENS) -> List[str]:
+    """Consecutive lines grouped into segments of at most max_tokens (a longer line stands alone)."""
+    segments = []
+    current: List[str] = []
+    tokens = 0
+    for line in lines:
+        n = count_tokens(line)
+        if current and tokens + n > max_tokens:
+            segments.append("\n".join(current))
+            current, tokens = [], 0
+        current.append(line)
+        tokens += n
+    if current:
+        segments.append("\n".join(current))
+    return segments
+
+
+async def summarize_meeting(llm, lines: List[str], parallelism: int = FINAL_SUMMARY_PARALLELISM,
+                            segment_tokens: int = FINAL_SUMMARY_SEGMENT_TOKENS,
+                            fan_in: int = FINAL_SUMMARY_FAN_IN) -> Dict:
+    """Summarize a finished meeting; returns the summary (None if every call failed) and job stats.
+
+    A failed segment is left out rather than failing the job; a failed
+    merge passes its inputs on concatenated. Both are reported in the stats.
+    """
+    started = time.perf_counter()
+    fan_in = max(2, fan_in)
+    limit = asyncio.Semaphore(max(1, parallelism))
+    stats = {"segments": 0, "levels": 0, "llm_calls": 0, "failed_calls": 0}
+
+    async def call(coro_fn, *args):
+        async with limit:
+            stats["llm_calls"] += 1
+            result = await coro_fn(*args)
+        if not result:
+            stats["failed_calls"] += 1
+        return result
+
+    segments = split_segments(lines, segment_tokens)
+    stats["segments"] = len(segments)
+    summaries = await asyncio.gather(*(call(llm.summarize_segment, text, i + 1, len(segments))
+                                       for i, text in enumerate(segments)))
+    summaries = [s for s in summaries if s]
+    while len(summaries) > 1:
+        stats["levels"] += 1
+        groups = [summaries[i:i + fan_in] for i in range(0, len(summaries), fan_in)]
+        merged = await asyncio.gather(*(call(llm.merge_summaries, group) if len(group) > 1 else _same(group[0])
+                                        for group in groups))
+        # A failed merge keeps all of its inputs, joined, so nothing is lost and the level still shrinks
+        summaries = [m or "\n".join(group) for m, group in zip(merged, groups)]
+    return {"summary": summaries[0].strip() if summaries else None,
+            "seconds": round(time.perf_counter() - started, 3), **stats}
+
+
+async def _same(summary: str) -> str:
+    return summary
+
+
+def benchmark(hours_list=(1, 4, 8), parallelisms=(1, 4, 16), latency_ms: float = 200):
+    """Wall-clock of the job against LocalLLM with fixed latency, by meeting length and parallelism."""
+    from llm_budget import llm_budget
+    from llm_provider import LocalLLM
+    from transcript_store import _synthetic_meeting
+
+    # Lift the worker budget so the job's own parallelism is what is measured
+    llm_budget.max_concurrent = llm_budget.burst = max(parallelisms)
+    llm_budget.rate = llm_budget.tokens = 1e9
+    for hours in hours_list:
+        lines = [line["text"] for line in _synthetic_meeting(hours)]
+        for parallelism in parallelisms:
+            llm = LocalLLM("final-summary-bench", latency_ms=latency_ms, distribution="fixed", tokens_per_sec=0)
+            result = asyncio.run(summarize_meeting(llm, lines, parallelism=parallelism))
+            print(f"[FinalSummary] {hours}h ({sum(map(count_tokens, lines)):,} tokens), parallelism {parallelism}: "
+                  f"{result['segments']} segments, {result['levels']} merge levels, "
+                  f"{result['llm_calls']} calls, {result['seconds']:.2f}s")
+
+
+if __name__ == "__main__":
+    benchmark()
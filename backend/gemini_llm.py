@@ -4,23 +4,53 @@ Enhanced for real-time conversation points and proactive suggestions
 """
 
 import asyncio
-import aiohttp
 import json
 import os
+import time
 from typing import Optional, Dict, List
 from dotenv import load_dotenv
 
+from llm_budget import PRIORITY_BACKGROUND
+from llm_gateway import llm_gateway
+from llm_provider import LLMProvider
+
 # Load environment variables
 load_dotenv()
 
-class GeminiLLM:
+# Overridable so gemini_standin.py can play the API locally
+GEMINI_API_URL = os.getenv(
+    "GEMINI_API_URL", "https://generativelanguage.googleapis.com/v1/models/gemini-1.5-flash:generateContent")
+
+class GeminiLLM(LLMProvider):
     """Google Gemini LLM integration with enhanced conversation analysis"""
     
-    def __init__(self):
+    def __init__(self, session_id: str = "default", priority: int = PRIORITY_BACKGROUND,
+                 deadline_seconds: Optional[float] = None):
         self.api_key = os.getenv("GOOGLE_GEMINI_API_KEY")
         if not self.api_key:
             print("[Gemini] Warning: GOOGLE_GEMINI_API_KEY not found in environment")
-        self.base_url = "https://generativelanguage.googleapis.com/v1/models/gemini-1.5-flash:generateContent"
+        self.base_url = GEMINI_API_URL
+        # Routing through the shared gateway: fairness key, priority class and overall deadline
+        self.session_id = session_id
+        self.priority = priority
+        self.deadline = time.monotonic() + deadline_seconds if deadline_seconds is not None else None
+
+    async def _generate(self, data: dict, timeout: float = 30) -> Optional[str]:
+        """Send a generateContent request through the LLM gateway and return the first text part"""
+        url = f"{self.base_url}?key={self.api_key}"
+        result = await llm_gateway.post(url, data, key=self.session_id, priority=self.priority,
+                                        timeout=timeout, deadline=self.deadline)
+        if result is None:
+            return None
+        # Extract the response text
+        if "candidates" in result and len(result["candidates"]) > 0:
+            candidate = result["candidates"][0]
+            if "content" in candidate and "parts" in candidate["content"]:
+                parts = candidate["content"]["parts"]
+                if len(parts) > 0 and "text" in parts[0]:
+                    return parts[0]["text"]
+        print(f"[Gemini] Unexpected response format: {result}")
+        return None
     
     async def get_summary_and_suggestion(self, conversation_text: str) -> Optional[str]:
         """Get AI summary and suggestions based on conversation"""
@@ -40,10 +70,6 @@ class GeminiLLM:
             Please provide a concise, helpful response. Use bullet points. Be direct and to the point.
             """
             
-            headers = {
-                "Content-Type": "application/json"
-            }
-            
             data = {
                 "contents": [
                     {
@@ -56,27 +82,7 @@ class GeminiLLM:
                 ]
             }
             
-            url = f"{self.base_url}?key={self.api_key}"
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=data, headers=headers) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        
-                        # Extract the response text
-                        if "candidates" in result and len(result["candidates"]) > 0:
-                            candidate = result["candidates"][0]
-                            if "content" in candidate and "parts" in candidate["content"]:
-                                parts = candidate["content"]["parts"]
-                                if len(parts) > 0 and "text" in parts[0]:
-                                    return parts[0]["text"]
-                        
-                        print(f"[Gemini] Unexpected response format: {result}")
-                        return None
-                    else:
-                        error_text = await response.text()
-                        print(f"[Gemini] API error: {response.status} - {error_text}")
-                        return None
+            return await self._generate(data)
                         
         except Exception as e:
             print(f"[Gemini] Error: {e}")
@@ -113,10 +119,6 @@ class GeminiLLM:
             Keep responses concise, actionable, and to the point. Use bullet points where possible.
             """
             
-            headers = {
-                "Content-Type": "application/json"
-            }
-            
             data = {
                 "contents": [
                     {
@@ -133,57 +135,39 @@ class GeminiLLM:
                 }
             }
             
-            url = f"{self.base_url}?key={self.api_key}"
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=data, headers=headers, timeout=15) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        
-                        # Extract the response text
-                        if "candidates" in result and len(result["candidates"]) > 0:
-                            candidate = result["candidates"][0]
-                            if "content" in candidate and "parts" in candidate["content"]:
-                                parts = candidate["content"]["parts"]
-                                if len(parts) > 0 and "text" in parts[0]:
-                                    response_text = parts[0]["text"]
+            response_text = await self._generate(data, timeout=15)
+            if response_text is None:
+                return None
                                     
-                                    # Try to parse as JSON
-                                    try:
-                                        # Clean up the response text to extract JSON
-                                        json_start = response_text.find('{')
-                                        json_end = response_text.rfind('}') + 1
-                                        if json_start != -1 and json_end != 0:
-                                            json_text = response_text[json_start:json_end]
-                                            parsed_response = json.loads(json_text)
-                                            return parsed_response
-                                        else:
-                                            # Fallback: return structured text response
-                                            return {
-                                                "summary": response_text[:200] + "..." if len(response_text) > 200 else response_text,
-                                                "action_items": [],
-                                                "talking_points": [],
-                                                "questions": [],
-                                                "insights": "Analysis complete",
-                                                "suggestions": []
-                                            }
-                                    except json.JSONDecodeError:
-                                        # Fallback: return structured text response
-                                        return {
-                                            "summary": response_text[:200] + "..." if len(response_text) > 200 else response_text,
-                                            "action_items": [],
-                                            "talking_points": [],
-                                            "questions": [],
-                                            "insights": "Analysis complete",
-                                            "suggestions": []
-                                        }
-                        
-                        print(f"[Gemini] Unexpected response format: {result}")
-                        return None
-                    else:
-                        error_text = await response.text()
-                        print(f"[Gemini] API error: {response.status} - {error_text}")
-                        return None
+            # Try to parse as JSON
+            try:
+                # Clean up the response text to extract JSON
+                json_start = response_text.find('{')
+                json_end = response_text.rfind('}') + 1
+                if json_start != -1 and json_end != 0:
+                    json_text = response_text[json_start:json_end]
+                    parsed_response = json.loads(json_text)
+                    return parsed_response
+                else:
+                    # Fallback: return structured text response
+                    return {
+                        "summary": response_text[:200] + "..." if len(response_text) > 200 else response_text,
+                        "action_items": [],
+                        "talking_points": [],
+                        "questions": [],
+                        "insights": "Analysis complete",
+                        "suggestions": []
+                    }
+            except json.JSONDecodeError:
+                # Fallback: return structured text response
+                return {
+                    "summary": response_text[:200] + "..." if len(response_text) > 200 else response_text,
+                    "action_items": [],
+                    "talking_points": [],
+                    "questions": [],
+                    "insights": "Analysis complete",
+                    "suggestions": []
+                }
                         
         except Exception as e:
             print(f"[Gemini] Error in get_conversation_points: {e}")
@@ -217,23 +201,66 @@ class GeminiLLM:
                 }
             }
             
-            url = f"{self.base_url}?key={self.api_key}"
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=data, timeout=10) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        if "candidates" in result and result["candidates"]:
-                            return result["candidates"][0]["content"]["parts"][0]["text"].strip()
-                        else:
-                            return "Continue exploring your current topic."
-                    else:
-                        return "Continue with your current topic."
+            suggestion = await self._generate(data, timeout=10)
+            if suggestion:
+                return suggestion.strip()
+            return "Continue with your current topic."
                         
         except Exception as e:
             print(f"[Gemini] Error in get_quick_suggestion: {e}")
             return "Continue with your current topic."
 
+    async def summarize_segment(self, segment_text: str, part: int, parts: int) -> Optional[str]:
+        """Summarize one part of a finished meeting's transcript"""
+        if not self.api_key:
+            print("[Gemini] Error: No API key configured")
+            return None
+        try:
+            prompt = f"""
+            You are an AI meeting assistant. This is part {part} of {parts} of a finished meeting's transcript.
+            Summarize it in at most 5 crisp bullet points: decisions, action items (with owners), open questions.
+            Do not invent context from other parts.
+
+            Transcript part: {segment_text}
+            """
+            data = {
+                "contents": [{"parts": [{"text": prompt}]}],
+                "generationConfig": {
+                    "temperature": 0.2,
+                    "maxOutputTokens": 400
+                }
+            }
+            return await self._generate(data, timeout=60)
+        except Exception as e:
+            print(f"[Gemini] Error in summarize_segment: {e}")
+            return None
+
+    async def merge_summaries(self, summaries: List[str]) -> Optional[str]:
+        """Combine consecutive partial summaries into one"""
+        if not self.api_key:
+            print("[Gemini] Error: No API key configured")
+            return None
+        try:
+            parts = "\n\n".join(f"Part {i + 1}:\n{s}" for i, s in enumerate(summaries))
+            prompt = f"""
+            You are an AI meeting assistant. Below are summaries of consecutive parts of one meeting, in order.
+            Merge them into a single summary of at most 8 crisp bullet points, then list action items (with owners).
+            Keep decisions and action items; drop repetition.
+
+            {parts}
+            """
+            data = {
+                "contents": [{"parts": [{"text": prompt}]}],
+                "generationConfig": {
+                    "temperature": 0.2,
+                    "maxOutputTokens": 600
+                }
+            }
+            return await self._generate(data, timeout=60)
+        except Exception as e:
+            print(f"[Gemini] Error in merge_summaries: {e}")
+            return None
+
 # Legacy functions for backward compatibility
 SUMMARY_PROMPT = """
 You are an AI meeting assistant. Given the following transcript, provide:
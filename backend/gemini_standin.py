@@ -0,0 +1,198 @@
+"""
+Local Gemini stand-in for Project Co-Pilot
+An HTTP server answering generateContent like the Gemini API, with the
+failure modes LLMGateway has to handle: a per-window request quota that
+answers 429 with Retry-After, a fixed response latency, and occasional very
+slow responses. It records, per request body, whether a client came back
+before the Retry-After it was given.
+
+`--check` starts the stand-in in-process and drives LLMGateway against it:
+retries honor Retry-After and hold back every caller, identical in-flight
+requests reach the server once, and a deadline cuts a slow response short.
+
+Usage:
+    python gemini_standin.py --port 8788 --quota 10 --window 60 --latency-ms 800
+    GEMINI_API_URL=http://127.0.0.1:8788/v1/models/gemini-1.5-flash:generateContent uvicorn main:app
+    python gemini_standin.py --check
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import time
+from typing import Dict, Optional
+
+from aiohttp import web
+
+
+class GeminiStandin:
+    """Quota, latency and slow-response behavior of one stand-in server; change attributes between scenarios."""
+
+    def __init__(self, quota: int = 0, window: float = 60.0, latency_ms: float = 0.0,
+                 slow_every: int = 0, slow_ms: float = 0.0):
+        self.quota = quota  # Requests per window; 0 disables the quota
+        self.window = window
+        self.latency_ms = latency_ms
+        self.slow_every = slow_every  # Every Nth accepted request takes slow_ms instead
+        self.slow_ms = slow_ms
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._not_before: Dict[str, float] = {}  # Request body hash -> earliest allowed retry
+        self.stats = {"requests": 0, "ok": 0, "rate_limited": 0, "early_retries": 0, "slow": 0}
+
+    def reset_stats(self):
+        self.stats = {k: 0 for k in self.stats}
+        self._not_before.clear()
+        self._window_start, self._window_count = time.monotonic(), 0
+
+    def _retry_after(self) -> Optional[int]:
+        """Seconds until the quota window resets if this request is over quota, else None."""
+        if not self.quota:
+            return None
+        now = time.monotonic()
+        if now - self._window_start >= self.window:
+            self._window_start, self._window_count = now, 0
+        if self._window_count < self.quota:
+            self._window_count += 1
+            return None
+        return max(1, math.ceil(self._window_start + self.window - now))
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if not request.match_info["model"].endswith(":generateContent"):
+            return web.json_response({"error": {"code": 404, "status": "NOT_FOUND"}}, status=404)
+        if not request.query.get("key"):
+            return web.json_response({"error": {"code": 400, "message": "API key not valid.",
+                                                "status": "INVALID_ARGUMENT"}}, status=400)
+        body = await request.read()
+        self.stats["requests"] += 1
+        client = hashlib.sha256(body).hexdigest()
+        now = time.monotonic()
+        if now < self._not_before.get(client, 0.0):
+            self.stats["early_retries"] += 1
+        retry_after = self._retry_after()
+        if retry_after is not None:
+            self.stats["rate_limited"] += 1
+            self._not_before[client] = now + retry_after
+            return web.json_response(
+                {"error": {"code": 429, "message": "Resource has been exhausted (e.g. check quota).",
+                           "status": "RESOURCE_EXHAUSTED"}},
+                status=429, headers={"Retry-After": str(retry_after)})
+
+        self.stats["ok"] += 1
+        delay_ms = self.latency_ms
+        if self.slow_every and self.stats["ok"] % self.slow_every == 0:
+            self.stats["slow"] += 1
+            delay_ms = self.slow_ms
+        await asyncio.sleep(delay_ms / 1000)
+        try:
+            prompt = json.loads(body)["contents"][0]["parts"][0]["text"]
+        except (ValueError, KeyError, IndexError, TypeError):
+            return web.json_response({"error": {"code": 400, "status": "INVALID_ARGUMENT"}}, status=400)
+        text = f"- Stand-in answer to: {' '.join(prompt.split())[:80]}"
+        return web.json_response({"candidates": [{"content": {"parts": [{"text": text}], "role": "model"},
+                                                  "finishReason": "STOP"}]})
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/v1/models/{model}", self.handle)
+        return app
+
+
+async def serve(standin: GeminiStandin, host: str, port: int) -> web.AppRunner:
+    runner = web.AppRunner(standin.app())
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    print(f"[GeminiStandin] Listening on http://{host}:{port}/v1/models/gemini-1.5-flash:generateContent")
+    return runner
+
+
+def _payload(text: str) -> dict:
+    return {"contents": [{"parts": [{"text": text}]}]}
+
+
+async def check(host: str = "127.0.0.1", port: int = 8788) -> bool:
+    """Drive LLMGateway against the stand-in; prints each scenario and returns whether all passed."""
+    import llm_gateway as gateway_module
+    from llm_budget import LLMBudget
+    from llm_gateway import LLMGateway
+
+    standin = GeminiStandin()
+    runner = await serve(standin, host, port)
+    url = f"http://{host}:{port}/v1/models/gemini-1.5-flash:generateContent?key=standin"
+    gateway = LLMGateway(LLMBudget(max_concurrent=8, rate_per_minute=6000))
+    passed = True
+
+    def report(name: str, ok: bool, detail: str):
+        nonlocal passed
+        passed = passed and ok
+        print(f"[GeminiStandin] {'PASS' if ok else 'FAIL'} {name}: {detail}")
+
+    try:
+        # 429 + Retry-After: 6 callers against a quota of 2 per second all succeed,
+        # and none comes back before the server said it could
+        standin.quota, standin.window = 2, 1.0
+        gateway_module.LLM_MAX_ATTEMPTS = 6
+        started = time.perf_counter()
+        results = await asyncio.gather(*(gateway.post(url, _payload(f"question {i}"), key=f"s{i}")
+                                         for i in range(6)))
+        stats = dict(standin.stats)
+        report("rate limit", all(results) and stats["early_retries"] == 0 and stats["rate_limited"] > 0,
+               f"{sum(1 for r in results if r)}/6 answered in {time.perf_counter() - started:.1f}s, "
+               f"{stats['rate_limited']} 429s, {stats['early_retries']} retries before Retry-After, "
+               f"{gateway.stats['retries']} gateway retries")
+
+        # Coalescing: 10 identical requests while a slow one is in flight reach the server once
+        standin.quota, standin.latency_ms = 0, 300
+        standin.reset_stats()
+        coalesced_before = gateway.stats["coalesced"]
+        results = await asyncio.gather(*(gateway.post(url, _payload("same question"), key=f"s{i}")
+                                         for i in range(10)))
+        coalesced = gateway.stats["coalesced"] - coalesced_before
+        report("coalescing", standin.stats["requests"] == 1 and coalesced == 9 and all(r == results[0] for r in results),
+               f"10 callers, {standin.stats['requests']} upstream request, {coalesced} coalesced")
+
+        # Deadline: a response slower than the caller's deadline is abandoned at the deadline
+        standin.latency_ms, standin.slow_every, standin.slow_ms = 0, 1, 3000
+        standin.reset_stats()
+        started = time.perf_counter()
+        result = await gateway.post(url, _payload("slow question"), key="slow", deadline=time.monotonic() + 0.5)
+        elapsed = time.perf_counter() - started
+        report("deadline", result is None and elapsed < 1.0,
+               f"3 s response, 0.5 s deadline, gave up after {elapsed:.2f}s")
+    finally:
+        gateway_module.LLM_MAX_ATTEMPTS = int(gateway_module.os.getenv("LLM_MAX_ATTEMPTS", "4"))
+        await gateway.close()
+        await runner.cleanup()
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Gemini generateContent API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8788)
+    parser.add_argument("--quota", type=int, default=0, help="Requests per window before 429 (0: unlimited)")
+    parser.add_argument("--window", type=float, default=60.0, help="Quota window in seconds")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latency of every response")
+    parser.add_argument("--slow-every", type=int, default=0, help="Every Nth response takes --slow-ms")
+    parser.add_argument("--slow-ms", type=float, default=10000.0)
+    parser.add_argument("--check", action="store_true", help="Run the LLMGateway checks and exit")
+    args = parser.parse_args()
+    if args.check:
+        raise SystemExit(0 if asyncio.run(check(args.host, args.port)) else 1)
+
+    standin = GeminiStandin(args.quota, args.window, args.latency_ms, args.slow_every, args.slow_ms)
+
+    async def run():
+        await serve(standin, args.host, args.port)
+        await asyncio.Future()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print(f"[GeminiStandin] {standin.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Interim caption streaming for Project Co-Pilot
+Forwards Deepgram's interim hypotheses as small replace-from-offset frames,
+at most INTERIM_MAX_PER_SECOND per session. The final transcript for the
+same utterance carries its utterance id and supersedes the interims.
+
+Frame: {"type": "interim", "utterance": 7, "channel": 0, "offset": 12, "text": "ship it friday"}
+means: keep the first 12 characters of utterance 7's caption, replace the
+rest with "text". Multichannel sessions run one stream per channel; utterance
+ids come from a shared counter so they stay unique across channels.
+"""
+
+import asyncio
+import itertools
+import os
+from typing import Awaitable, Callable, Dict, Iterator, Optional
+
+INTERIM_MAX_PER_SECOND = float(os.getenv("INTERIM_MAX_PER_SECOND", "5"))
+
+
+def _common_prefix_length(a: str, b: str) -> int:
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+class InterimStream:
+    """Throttled diff stream of the current utterance's interim hypothesis.
+
+    Updates inside the throttle window only replace the pending text; a
+    trailing flush sends the newest one, so the caption never lags by more
+    than one interval and intermediate hypotheses are simply skipped.
+    """
+
+    def __init__(self, send: Callable[..., Awaitable], max_per_second: float = INTERIM_MAX_PER_SECOND,
+                 channel: int = 0, utterance_ids: Optional[Iterator[int]] = None):
+        self._send = send
+        self.min_interval = 1.0 / max_per_second if max_per_second > 0 else 0.0
+        self.channel = channel
+        self._utterance_ids = utterance_ids if utterance_ids is not None else itertools.count()
+        self.utterance = next(self._utterance_ids)
+        self.sent = ""  # Caption the client currently shows for this utterance
+        self.pending: Optional[str] = None
+        self.frames_sent = 0
+        self.updates_skipped = 0
+        self._last_sent_at = float("-inf")
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def update(self, text: str):
+        """New interim hypothesis for the current utterance ("" clears it)."""
+        if self.pending is not None:
+            self.updates_skipped += 1
+        self.pending = text.strip()
+        wait = self._last_sent_at + self.min_interval - asyncio.get_event_loop().time()
+        if wait <= 0:
+            await self._flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later(wait))
+
+    async def _flush_later(self, wait: float):
+        await asyncio.sleep(wait)
+        self._flush_task = None
+        await self._flush()
+
+    async def _flush(self):
+        text, self.pending = self.pending, None
+        if text is None or text == self.sent:
+            return
+        offset = _common_prefix_length(self.sent, text)
+        self.sent = text
+        self._last_sent_at = asyncio.get_event_loop().time()
+        self.frames_sent += 1
+        # Interims are superseded by finals, so they are not kept for replay
+        await self._send({
+            "type": "interim",
+            "utterance": self.utterance,
+            "channel": self.channel,
+            "offset": offset,
+            "text": text[offset:]
+        }, replayable=False)
+
+    def finalize(self) -> int:
+        """Close the current utterance; returns its id for the final transcript."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        utterance = self.utterance
+        self.utterance = next(self._utterance_ids)
+        self.sent = ""
+        self.pending = None
+        return utterance
+
+    def stats(self) -> Dict[str, int]:
+        return {"frames_sent": self.frames_sent, "updates_skipped": self.updates_skipped}
@@ -0,0 +1,229 @@
+"""
+Live meeting session state for Project Co-Pilot
+Keeps a session (STT stream, vector store, background tasks) alive across
+client reconnects and numbers outbound events so missed ones can be replayed.
+One producer connection streams the audio; any number of viewer connections
+subscribe to the same events. Each event is serialized once and queued to
+every subscriber, so a slow viewer never holds up the others.
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import secrets
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional, Union
+
+from vector_store import SessionVectorStore, session_vector_stores
+from transcript_chunker import TranscriptChunker
+from word_table import WordTable
+from interim_stream import InterimStream
+from stream_config import StreamConfig
+from audio_resampler import AudioConverter
+from summary_scheduler import SummaryScheduler
+from points_diff import PointsTracker
+from metrics import WS_SEND
+
+SESSION_RESUME_GRACE_SECONDS = float(os.getenv("SESSION_RESUME_GRACE_SECONDS", "30"))
+SESSION_EVENT_LOG_SIZE = int(os.getenv("SESSION_EVENT_LOG_SIZE", "500"))
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("SUBSCRIBER_QUEUE_SIZE", "256"))
+ROLE_PRODUCER = "producer"  # Sends audio; the session expires when it has been gone for the grace period
+ROLE_VIEWER = "viewer"
+STT_KEEPALIVE_INTERVAL = 5  # Deepgram closes idle streams after ~10s without audio
+
+
+class Subscriber:
+    """One WebSocket attached to a session, fed from a bounded queue by its own sender task.
+
+    When the queue is full, lossy events (interims, acks) are dropped; a
+    replayable one closes the connection with 1013 instead, and the client
+    reconnects and resumes from its last seq out of the event log. A replay
+    is queued as one entry, so catching up never counts as being slow.
+    """
+
+    def __init__(self, websocket, role: str, session_id: str, maxsize: int = SUBSCRIBER_QUEUE_SIZE):
+        self.websocket = websocket
+        self.role = role
+        self.session_id = session_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+        self.closed = False
+        self._task = asyncio.create_task(self._run())
+
+    def offer(self, payload: Union[str, List[str]], lossy: bool = False) -> bool:
+        """Queue a serialized event (or a list sent back to back) without waiting; False if it was not queued."""
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(payload)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if not lossy:
+                print(f"⚠️ {self.role.capitalize()} of {self.session_id} is too slow; closing so it resumes")
+                self.stop()
+                asyncio.create_task(self._close(1013, "Too slow, resume with last_seq"))
+            return False
+
+    def send(self, event: Dict, lossy: bool = False) -> bool:
+        """Event for this connection only (acks, pongs, errors, replays)."""
+        return self.offer(json.dumps(event), lossy)
+
+    def finish(self):
+        """Close the connection once everything already queued has been sent."""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.queue.put_nowait(None)
+        except asyncio.QueueFull:
+            self._task.cancel()
+            asyncio.create_task(self._close(1000, "Session ended"))
+
+    async def _run(self):
+        while True:
+            payload = await self.queue.get()
+            if payload is None:
+                await self._close(1000, "Session ended")
+                return
+            for text in payload if isinstance(payload, list) else (payload,):
+                try:
+                    with WS_SEND.time():
+                        await self.websocket.send_text(text)
+                except Exception as e:
+                    print(f"⚠️ Failed to deliver event to {self.session_id}: {e}")
+                    break
+
+    async def _close(self, code: int, reason: str):
+        try:
+            await self.websocket.close(code=code, reason=reason)
+        except Exception:
+            pass
+
+    def stop(self):
+        self.closed = True
+        self._task.cancel()
+
+
+class LiveSession:
+    """State for one meeting, independent of the WebSocket currently attached to it."""
+
+    def __init__(self, session_id: str, user_id: Optional[str] = None, stream_config: Optional[StreamConfig] = None):
+        self.session_id = session_id
+        self.user_id = user_id
+        self.stream_config = stream_config or StreamConfig()
+        self.audio_converter = AudioConverter.for_config(self.stream_config)  # None when no conversion is needed
+        self.subscribers: List[Subscriber] = []
+        self.producer: Optional[Subscriber] = None
+        self.seq = 0
+        self.epoch = secrets.token_hex(8)  # Seqs restart with every session; clients compare them within an epoch
+        self.event_log = deque(maxlen=SESSION_EVENT_LOG_SIZE)  # (seq, serialized event)
+        self.transcript_accum: List[str] = []
+        self.transcript_tokens = 0
+        # Always a fresh store: an expiring session with the same id may still hold the old one
+        self.vector_store = SessionVectorStore()
+        session_vector_stores[session_id] = self.vector_store
+        self.chunker = TranscriptChunker()
+        self.word_table = WordTable()
+        self.interim_streams: Dict[int, InterimStream] = {}  # channel -> interim caption stream
+        self._utterance_ids = itertools.count()
+        self.stt = None
+        # Set when the session belongs to a user and MongoDB is up (see main.open_meeting_record)
+        self.meeting_id: Optional[str] = None
+        self.transcript_writer = None
+        self.started_at = asyncio.get_event_loop().time()
+        self.summary_scheduler = SummaryScheduler()
+        self.latest_summary: Optional[str] = None  # Rolling summary, reused as Q&A context
+        self.points_tracker = PointsTracker()  # Conversation points the client shows, for diffs
+        self.points_lock = asyncio.Lock()  # LLM and local points update the tracker in a thread
+        self.points_lines = 0  # Transcript lines covered by the last points sent
+        self.llm_points_ready = False
+        self.llm_points_failed = False
+        self.llm_points_started: Optional[float] = None  # Loop time the LLM call in flight started
+        self.answer_prefetcher = None  # AnswerPrefetcher, set by main.start_live_session
+        self.tasks: List[asyncio.Task] = []  # Background tasks cancelled when the session ends
+        self.closed = False
+        self._expiry_task: Optional[asyncio.Task] = None
+
+    def interim_for(self, channel: int = 0) -> InterimStream:
+        stream = self.interim_streams.get(channel)
+        if stream is None:
+            stream = InterimStream(self.send, channel=channel, utterance_ids=self._utterance_ids)
+            self.interim_streams[channel] = stream
+        return stream
+
+    async def send(self, event: Dict, replayable: bool = True):
+        """Broadcast an event to every subscriber.
+
+        Replayable events get a sequence number and are kept in the bounded
+        event log; lossy ones (interim captions) may be dropped for a slow
+        subscriber. Queuing never waits on a client's network.
+        """
+        if replayable:
+            self.seq += 1
+            event = {**event, "seq": self.seq}
+        payload = json.dumps(event)
+        if replayable:
+            self.event_log.append((self.seq, payload))
+        for subscriber in list(self.subscribers):
+            subscriber.offer(payload, lossy=not replayable)
+
+    async def replay(self, last_seq: int, subscriber: Subscriber) -> int:
+        """Resend to one subscriber every logged event newer than last_seq; returns how many were queued.
+
+        The events go into the subscriber's queue as one entry: a client a
+        whole log behind must not trip the slow-consumer close while catching up.
+        """
+        if self.event_log and self.event_log[0][0] > last_seq + 1:
+            # Some events already fell out of the log; tell the client its view is incomplete
+            subscriber.send({
+                "type": "replay_gap",
+                "last_seq": last_seq,
+                "oldest_seq": self.event_log[0][0]
+            })
+        missed = [payload for seq, payload in self.event_log if seq > last_seq]
+        if missed and not subscriber.offer(missed):
+            return 0
+        return len(missed)
+
+    def attach(self, websocket, role: str = ROLE_PRODUCER) -> Subscriber:
+        """Subscribe a (re)connected client; a producer takes over the audio and cancels any pending expiry."""
+        subscriber = Subscriber(websocket, role, self.session_id)
+        self.subscribers.append(subscriber)
+        if role == ROLE_PRODUCER:
+            if self._expiry_task:
+                self._expiry_task.cancel()
+                self._expiry_task = None
+            self.producer = subscriber
+        return subscriber
+
+    def detach(self, subscriber: Subscriber, on_expire: Callable[["LiveSession"], Awaitable[None]],
+               grace_seconds: float = SESSION_RESUME_GRACE_SECONDS):
+        """Unsubscribe a client; once the producer is gone the session ends unless one re-attaches in time."""
+        subscriber.stop()
+        if subscriber in self.subscribers:
+            self.subscribers.remove(subscriber)
+        if self.producer is not subscriber:
+            return
+        self.producer = None
+        self._expiry_task = asyncio.create_task(self._expire_after(grace_seconds, on_expire))
+
+    async def _expire_after(self, grace_seconds: float, on_expire):
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + grace_seconds
+        while (remaining := deadline - loop.time()) > 0:
+            await asyncio.sleep(min(STT_KEEPALIVE_INTERVAL, remaining))
+            # Keep the STT stream warm while nobody is sending audio
+            if self.stt and remaining > STT_KEEPALIVE_INTERVAL:
+                await self.stt.keep_alive()
+        self.closed = True
+        self._expiry_task = None
+        await self.send({"type": "session_ended", "session_id": self.session_id}, replayable=False)
+        for subscriber in self.subscribers:
+            subscriber.finish()
+        await on_expire(self)
+
+
+# Sessions that are live or inside their reconnect grace period
+live_sessions: Dict[str, LiveSession] = {}
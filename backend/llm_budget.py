@@ -0,0 +1,122 @@
+"""
+Per-worker LLM budget for Project Co-Pilot
+Caps concurrent LLM calls and their rate across all sessions. Interactive
+requests are served before background ones, and within a priority class
+slots are handed out round-robin between sessions so one chatty meeting
+cannot starve others
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict
+
+LLM_MAX_CONCURRENT = int(os.getenv("LLM_MAX_CONCURRENT", "4"))
+LLM_RATE_PER_MINUTE = float(os.getenv("LLM_RATE_PER_MINUTE", "60"))
+
+# Priority classes, lower value is served first
+PRIORITY_INTERACTIVE = 0  # user_message answers
+PRIORITY_BACKGROUND = 1  # live summaries, conversation points, batch jobs
+
+
+class LLMBudget:
+    """Concurrency limit plus token-bucket rate limit with prioritized, fair queuing by key."""
+
+    def __init__(self, max_concurrent: int = LLM_MAX_CONCURRENT, rate_per_minute: float = LLM_RATE_PER_MINUTE):
+        self.max_concurrent = max_concurrent
+        self.rate = rate_per_minute / 60.0
+        self.burst = max(1, max_concurrent)
+        self.tokens = float(self.burst)
+        self.in_flight = 0
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._waiters: Dict[int, "OrderedDict[str, Deque[asyncio.Future]]"] = {
+            PRIORITY_INTERACTIVE: OrderedDict(),
+            PRIORITY_BACKGROUND: OrderedDict(),
+        }
+        self._timer = None
+
+    @property
+    def queued(self) -> int:
+        return sum(len(q) for waiters in self._waiters.values() for q in waiters.values())
+
+    @asynccontextmanager
+    async def slot(self, key: str, priority: int = PRIORITY_BACKGROUND):
+        """Wait for a slot on behalf of `key` (usually a session id), hold it for the block."""
+        future = asyncio.get_event_loop().create_future()
+        self._waiters[priority].setdefault(key, deque()).append(future)
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as we were cancelled: hand the slot back
+                self._release()
+            raise
+        try:
+            yield
+        finally:
+            self._release()
+
+    def pause(self, seconds: float):
+        """Stop granting slots for a while, e.g. after the provider answered 429 with Retry-After."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self.tokens = min(self.tokens, 0.0)
+        self._schedule(seconds)
+
+    def _release(self):
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _next_waiter(self):
+        for waiters in self._waiters.values():
+            if waiters:
+                # Oldest key first, then it moves to the back: round-robin between sessions
+                key, queue = next(iter(waiters.items()))
+                future = queue.popleft()
+                if queue:
+                    waiters.move_to_end(key)
+                else:
+                    del waiters[key]
+                return future
+        return None
+
+    def _dispatch(self):
+        self._refill()
+        now = time.monotonic()
+        if now < self._paused_until:
+            self._schedule(self._paused_until - now)
+            return
+        while self.queued and self.in_flight < self.max_concurrent and self.tokens >= 1:
+            future = self._next_waiter()
+            if future.cancelled():
+                continue
+            self.tokens -= 1
+            self.in_flight += 1
+            future.set_result(None)
+        if self.queued and self.in_flight < self.max_concurrent and self.rate > 0:
+            # Out of rate tokens: wake up when the next one is available
+            self._schedule((1 - self.tokens) / self.rate)
+
+    def _schedule(self, delay: float):
+        if self._timer is not None:
+            return
+        self._timer = asyncio.get_event_loop().call_later(max(0.0, delay), self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
+
+    def stats(self) -> Dict[str, float]:
+        return {"in_flight": self.in_flight, "queued": self.queued, "tokens": round(self.tokens, 2)}
+
+
+# Shared by every session in this worker process
+llm_budget = LLMBudget()
@@ -0,0 +1,151 @@
+"""
+Process-wide LLM gateway for Project Co-Pilot
+Every Gemini HTTP request goes through here: it takes a slot from the shared
+LLMBudget, retries 429/5xx with jittered backoff (honoring Retry-After),
+respects the caller's deadline and coalesces identical in-flight requests
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+from typing import Dict, Optional
+
+import aiohttp
+
+from llm_budget import llm_budget, PRIORITY_BACKGROUND
+from metrics import LLM_CALL, inc_session
+
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "4"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "10"))
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+def _retry_after_seconds(headers) -> Optional[float]:
+    value = headers.get("Retry-After") if headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+class LLMGateway:
+    """Shared HTTP path to the LLM provider."""
+
+    def __init__(self, budget=llm_budget):
+        self.budget = budget
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop = None
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.stats = {"requests": 0, "coalesced": 0, "retries": 0, "rate_limited": 0, "failures": 0}
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # One pooled session per worker instead of one per call
+        loop = asyncio.get_event_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            # Batch jobs run several event loops in sequence; a session cannot outlive its loop
+            self._session = aiohttp.ClientSession()
+            self._session_loop = loop
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def post(self, url: str, payload: dict, key: str = "default", priority: int = PRIORITY_BACKGROUND,
+                   timeout: float = 15, deadline: Optional[float] = None) -> Optional[dict]:
+        """POST a JSON payload and return the decoded response, or None on failure.
+
+        `deadline` is an absolute time.monotonic() value; no attempt, wait or
+        backoff is started past it. Concurrent calls with an identical url and
+        payload share a single upstream request.
+        """
+        dedup_key = hashlib.sha256((url + json.dumps(payload, sort_keys=True)).encode()).hexdigest()
+        pending = self._in_flight.get(dedup_key)
+        if pending is not None:
+            self.stats["coalesced"] += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if pending.cancelled():
+                    # The request we joined was abandoned by its owner
+                    return None
+                raise
+
+        future = asyncio.get_event_loop().create_future()
+        self._in_flight[dedup_key] = future
+        inc_session(key, "llm_calls")
+        started = time.perf_counter()
+        try:
+            result = await self._post_with_retries(url, payload, key, priority, timeout, deadline)
+            LLM_CALL.observe(time.perf_counter() - started, ("gemini", "ok" if result is not None else "failed"))
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody else may be awaiting; mark the exception as retrieved
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[dedup_key]
+
+    async def _post_with_retries(self, url, payload, key, priority, timeout, deadline) -> Optional[dict]:
+        for attempt in range(LLM_MAX_ATTEMPTS):
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                print(f"[Gemini] Deadline exceeded before attempt {attempt + 1}")
+                break
+            try:
+                status, body, retry_after = await asyncio.wait_for(
+                    self._attempt(url, payload, key, priority, timeout if remaining is None else min(timeout, remaining)),
+                    timeout=remaining
+                )
+            except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+                status, body, retry_after = None, repr(e), None
+
+            if status == 200:
+                return body
+            if status is not None and status not in RETRYABLE_STATUSES:
+                print(f"[Gemini] API error: {status} - {body}")
+                break
+            if status == 429:
+                self.stats["rate_limited"] += 1
+                if retry_after is not None:
+                    # The quota is shared: hold back every caller, not just this one
+                    self.budget.pause(retry_after)
+            if attempt + 1 >= LLM_MAX_ATTEMPTS:
+                print(f"[Gemini] Giving up after {LLM_MAX_ATTEMPTS} attempts: {status} - {body}")
+                break
+            # Full jitter, but never retry sooner than the server asked
+            delay = random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt))
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                print(f"[Gemini] Deadline too close to retry after {status}")
+                break
+            self.stats["retries"] += 1
+            await asyncio.sleep(delay)
+        self.stats["failures"] += 1
+        return None
+
+    async def _attempt(self, url, payload, key, priority, timeout):
+        async with self.budget.slot(key, priority):
+            self.stats["requests"] += 1
+            session = self._get_session()
+            async with session.post(url, json=payload, headers={"Content-Type": "application/json"},
+                                    timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                if response.status == 200:
+                    return response.status, await response.json(), None
+                return response.status, await response.text(), _retry_after_seconds(response.headers)
+
+
+# Shared by every GeminiLLM instance in this worker process
+llm_gateway = LLMGateway()
@@ -0,0 +1,164 @@
+"""
+Pluggable LLM providers for Project Co-Pilot
+LLM_PROVIDER selects the backend: "gemini" (default) or "local", a
+deterministic stand-in with configurable latency, throughput and failures
+for load testing without network access or quota
+"""
+
+import asyncio
+import hashlib
+import math
+import os
+import random
+import time
+from typing import Dict, List, Optional
+
+from llm_budget import llm_budget, PRIORITY_BACKGROUND
+from metrics import LLM_CALL, inc_session
+
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")
+
+LOCAL_LLM_LATENCY_MS = float(os.getenv("LOCAL_LLM_LATENCY_MS", "400"))  # Mean time to first token
+LOCAL_LLM_LATENCY_JITTER_MS = float(os.getenv("LOCAL_LLM_LATENCY_JITTER_MS", "150"))
+LOCAL_LLM_LATENCY_DIST = os.getenv("LOCAL_LLM_LATENCY_DIST", "lognormal")  # fixed | uniform | normal | lognormal | exponential
+LOCAL_LLM_TOKENS_PER_SEC = float(os.getenv("LOCAL_LLM_TOKENS_PER_SEC", "200"))
+LOCAL_LLM_FAILURE_RATE = float(os.getenv("LOCAL_LLM_FAILURE_RATE", "0"))
+LOCAL_LLM_SEED = os.getenv("LOCAL_LLM_SEED")
+
+
+class LLMProvider:
+    """Interface shared by every LLM backend used by the live pipeline"""
+
+    async def get_summary_and_suggestion(self, conversation_text: str) -> Optional[str]:
+        raise NotImplementedError
+
+    async def get_conversation_points(self, conversation_text: str, context: List[str] = None) -> Optional[Dict[str, any]]:
+        raise NotImplementedError
+
+    async def get_quick_suggestion(self, current_topic: str, conversation_history: List[str]) -> str:
+        raise NotImplementedError
+
+    async def summarize_segment(self, segment_text: str, part: int, parts: int) -> Optional[str]:
+        """Summary of one part of a finished meeting's transcript (map step)"""
+        raise NotImplementedError
+
+    async def merge_summaries(self, summaries: List[str]) -> Optional[str]:
+        """One summary covering several consecutive partial summaries (reduce step)"""
+        raise NotImplementedError
+
+
+class LocalLLM(LLMProvider):
+    """Deterministic, network-free LLM stand-in.
+
+    Responses are derived from the input text, so the same prompt always
+    yields the same answer. Latency, output throughput and failure rate
+    follow the LOCAL_LLM_* settings; failures return None, like a Gemini
+    call that exhausted its retries.
+    """
+
+    def __init__(self, session_id: str = "default", priority: int = PRIORITY_BACKGROUND,
+                 deadline_seconds: Optional[float] = None,
+                 latency_ms: float = LOCAL_LLM_LATENCY_MS, jitter_ms: float = LOCAL_LLM_LATENCY_JITTER_MS,
+                 distribution: str = LOCAL_LLM_LATENCY_DIST, tokens_per_sec: float = LOCAL_LLM_TOKENS_PER_SEC,
+                 failure_rate: float = LOCAL_LLM_FAILURE_RATE):
+        self.session_id = session_id
+        self.priority = priority
+        self.deadline_seconds = deadline_seconds
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.distribution = distribution
+        self.tokens_per_sec = tokens_per_sec
+        self.failure_rate = failure_rate
+        self.rng = random.Random(LOCAL_LLM_SEED) if LOCAL_LLM_SEED is not None else random.Random()
+
+    def _sample_latency(self) -> float:
+        mean = self.latency_ms / 1000.0
+        jitter = self.jitter_ms / 1000.0
+        if self.distribution == "fixed" or mean <= 0:
+            return max(0.0, mean)
+        if self.distribution == "uniform":
+            return max(0.0, self.rng.uniform(mean - jitter, mean + jitter))
+        if self.distribution == "normal":
+            return max(0.0, self.rng.gauss(mean, jitter))
+        if self.distribution == "exponential":
+            return self.rng.expovariate(1.0 / mean)
+        # lognormal: long right tail, like real LLM APIs; parameters chosen to match mean/stddev
+        sigma2 = math.log(1 + (jitter / mean) ** 2)
+        return self.rng.lognormvariate(math.log(mean) - sigma2 / 2, math.sqrt(sigma2))
+
+    async def _complete(self, output: str) -> Optional[str]:
+        """Simulate one request: queue for the shared budget, wait, maybe fail."""
+        async def run():
+            async with llm_budget.slot(self.session_id, self.priority):
+                delay = self._sample_latency()
+                if self.tokens_per_sec > 0:
+                    delay += len(output.split()) / self.tokens_per_sec
+                await asyncio.sleep(delay)
+                if self.rng.random() < self.failure_rate:
+                    print("[LocalLLM] Simulated failure")
+                    return None
+                return output
+        inc_session(self.session_id, "llm_calls")
+        started = time.perf_counter()
+        result = None
+        try:
+            if self.deadline_seconds is None:
+                result = await run()
+            else:
+                result = await asyncio.wait_for(run(), timeout=self.deadline_seconds)
+        except asyncio.TimeoutError:
+            print("[LocalLLM] Deadline exceeded")
+        LLM_CALL.observe(time.perf_counter() - started, ("local", "ok" if result is not None else "failed"))
+        return result
+
+    @staticmethod
+    def _sentences(text: str, limit: int) -> List[str]:
+        lines = [line.strip() for line in text.replace(". ", ".\n").splitlines() if line.strip()]
+        picked = lines[-limit:]
+        return [" ".join(line.split()[:20]) for line in picked]
+
+    @staticmethod
+    def _tag(text: str) -> str:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=4).hexdigest()
+
+    async def get_summary_and_suggestion(self, conversation_text: str) -> Optional[str]:
+        points = self._sentences(conversation_text, 3) or ["Nothing discussed yet"]
+        output = "\n".join(f"- {p}" for p in points) + f"\n- Suggestion: follow up on topic {self._tag(conversation_text)}"
+        return await self._complete(output)
+
+    async def get_conversation_points(self, conversation_text: str, context: List[str] = None) -> Optional[Dict[str, any]]:
+        sentences = self._sentences(conversation_text, 3)
+        points = {
+            "summary": sentences[-1] if sentences else "",
+            "action_items": [s for s in sentences if any(w in s.lower() for w in ("will", "need", "should", "todo"))][:3],
+            "talking_points": sentences[:3],
+            "questions": [f"What is the next step for {self._tag(conversation_text)}?"],
+            "insights": f"{len(conversation_text.split())} words discussed",
+            "suggestions": ["Summarize decisions before moving on"],
+        }
+        output = await self._complete(" ".join(sentences))
+        return points if output is not None else None
+
+    async def get_quick_suggestion(self, current_topic: str, conversation_history: List[str]) -> str:
+        output = await self._complete(f"Dig deeper into {current_topic}.")
+        return output or "Continue with your current topic."
+
+    async def summarize_segment(self, segment_text: str, part: int, parts: int) -> Optional[str]:
+        points = self._sentences(segment_text, 3) or ["Nothing discussed"]
+        return await self._complete("\n".join(f"- {p}" for p in points))
+
+    async def merge_summaries(self, summaries: List[str]) -> Optional[str]:
+        # Keep the first bullet of each part so the merged summary stays bounded
+        bullets = [s.splitlines()[0] for s in summaries if s.strip()]
+        return await self._complete("\n".join(bullets))
+
+
+def get_llm(session_id: str = "default", priority: int = PRIORITY_BACKGROUND,
+            deadline_seconds: Optional[float] = None) -> LLMProvider:
+    """Return an LLM client for the configured provider"""
+    if LLM_PROVIDER == "local":
+        return LocalLLM(session_id, priority, deadline_seconds)
+    if LLM_PROVIDER != "gemini":
+        print(f"[LLM] Unknown LLM_PROVIDER '{LLM_PROVIDER}', using gemini")
+    from gemini_llm import GeminiLLM
+    return GeminiLLM(session_id, priority, deadline_seconds)
@@ -0,0 +1,309 @@
+"""
+End-to-end load test for concurrent meeting sessions
+
+Starts the FastAPI app in a subprocess with local stand-ins for Deepgram
+(MockTranscriber), Gemini (LocalLLM) and MongoDB (in-memory collections),
+then drives N synthetic clients that stream 16 kHz PCM at real-time pace
+and ask periodic questions.
+
+Usage:
+    python load_test.py --clients 20 --duration 60 --output results.json
+
+Results include the git commit so runs can be compared across commits.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+SAMPLE_RATE = 16000
+CHUNK_MS = 100
+LAG_PROBE_INTERVAL = 0.1
+
+
+# --- Server side -------------------------------------------------------------
+
+class _FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, *args, **kwargs):
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    async def to_list(self, length=None):
+        return self.docs[:length] if length else self.docs
+
+
+class _FakeCollection:
+    """Just enough of a Motor collection for the live pipeline."""
+
+    def __init__(self):
+        self.docs: List[Dict] = []
+
+    async def create_index(self, *args, **kwargs):
+        return "fake_index"
+
+    async def insert_one(self, doc):
+        self.docs.append(doc)
+
+    async def insert_many(self, docs):
+        self.docs.extend(docs)
+
+    async def find_one(self, query):
+        return None
+
+    async def count_documents(self, query):
+        return len(self.docs)
+
+    def find(self, *args, **kwargs):
+        return _FakeCursor(list(self.docs))
+
+    def aggregate(self, pipeline):
+        return _FakeCursor([])
+
+
+class _FakeDatabase(dict):
+    def __getitem__(self, name):
+        if name not in self:
+            self[name] = _FakeCollection()
+        return dict.__getitem__(self, name)
+
+    __getattr__ = __getitem__
+
+
+class _FakeAdmin:
+    async def command(self, name):
+        return {"ok": 1}
+
+
+class _FakeAsyncClient:
+    admin = _FakeAdmin()
+
+    def __init__(self):
+        self.databases = {}
+
+    def __getitem__(self, name):
+        return self.databases.setdefault(name, _FakeDatabase())
+
+
+def serve(port: int, transcript_seconds: float):
+    """Run the app with local stand-ins and a loop-lag probe (subprocess entry point)."""
+    os.environ.setdefault("STT_PROVIDER", "mock")
+    os.environ.setdefault("LLM_PROVIDER", "local")
+    os.environ.setdefault("JWT_SECRET_KEY", "load-test-secret")
+    import functools
+    import uvicorn
+    import main
+    from mock_transcriber import MockTranscriber
+
+    main.get_async_client = _FakeAsyncClient
+    main.MockTranscriber = functools.partial(
+        MockTranscriber, processing_delay=0,
+        bytes_per_transcript=int(transcript_seconds * SAMPLE_RATE * 2)
+    )
+
+    lags: List[float] = []
+
+    async def lag_probe():
+        loop = asyncio.get_event_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(LAG_PROBE_INTERVAL)
+            lags.append(max(0.0, loop.time() - start - LAG_PROBE_INTERVAL))
+
+    @main.app.on_event("startup")
+    async def start_lag_probe():
+        asyncio.create_task(lag_probe())
+
+    @main.app.get("/_loadtest/stats")
+    async def loadtest_stats(reset: bool = False):
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        stats = {
+            "cpu_seconds": usage.ru_utime + usage.ru_stime,
+            "rss_mb": _current_rss_mb(),
+            "loop_lag_ms": _percentiles([lag * 1000 for lag in lags]),
+            "live_sessions": len(main.live_sessions),
+        }
+        if reset:
+            lags.clear()
+        return stats
+
+    uvicorn.run(main.app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def _current_rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError):
+        # Peak RSS is the best portable fallback (KiB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+# --- Client side -------------------------------------------------------------
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"count": 0}
+    values = sorted(values)
+
+    def pct(p):
+        return round(values[min(len(values) - 1, int(math.ceil(p / 100 * len(values))) - 1)], 2)
+
+    return {"count": len(values), "p50": pct(50), "p90": pct(90), "p99": pct(99), "max": round(values[-1], 2)}
+
+
+def _pcm_chunk(phase: int) -> bytes:
+    """100 ms of a quiet 220 Hz tone with noise, as 16-bit little-endian PCM."""
+    import struct
+    n = SAMPLE_RATE * CHUNK_MS // 1000
+    samples = (
+        int(2000 * math.sin(2 * math.pi * 220 * (phase * n + i) / SAMPLE_RATE) + random.randint(-200, 200))
+        for i in range(n)
+    )
+    return struct.pack(f"<{n}h", *samples)
+
+
+async def run_client(url: str, duration: float, question_every: float, results: Dict[str, List[float]]):
+    import websockets
+    chunks = [_pcm_chunk(i) for i in range(10)]
+    pending_questions: List[float] = []
+    last_audio_sent = None
+
+    async with websockets.connect(url, max_size=None) as ws:
+        async def receiver():
+            async for raw in ws:
+                now = time.perf_counter()
+                event = json.loads(raw)
+                kind = event.get("type")
+                if kind == "transcript" and last_audio_sent is not None:
+                    results["transcript_latency_ms"].append((now - last_audio_sent) * 1000)
+                elif kind == "ai_answer" and pending_questions:
+                    results["qa_latency_ms"].append((now - pending_questions.pop(0)) * 1000)
+                elif kind in ("summary", "conversation_points_diff", "conversation_points_snapshot"):
+                    results["summaries"].append(now)
+
+        receive_task = asyncio.create_task(receiver())
+        start = time.perf_counter()
+        next_question = start + question_every
+        i = 0
+        while time.perf_counter() - start < duration:
+            await ws.send(chunks[i % len(chunks)])
+            last_audio_sent = time.perf_counter()
+            i += 1
+            if question_every and last_audio_sent >= next_question:
+                pending_questions.append(time.perf_counter())
+                await ws.send(json.dumps({"type": "user_message", "message": "What did we decide about the timeline?"}))
+                next_question += question_every
+            # Real-time pace: sleep until this chunk's wall-clock slot
+            await asyncio.sleep(max(0.0, start + i * CHUNK_MS / 1000 - time.perf_counter()))
+        await asyncio.sleep(1.0)  # Let in-flight answers arrive
+        receive_task.cancel()
+    results["audio_seconds"].append(i * CHUNK_MS / 1000)
+
+
+async def _get_json(port: int, path: str) -> Dict:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {path} HTTP/1.0\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    data = await reader.read()
+    writer.close()
+    return json.loads(data.split(b"\r\n\r\n", 1)[1])
+
+
+async def _wait_for_server(port: int, timeout: float = 120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            return await _get_json(port, "/health")
+        except (OSError, ValueError, IndexError):
+            await asyncio.sleep(0.25)
+    raise RuntimeError("Server did not start in time")
+
+
+async def drive(args) -> Dict:
+    results = {"transcript_latency_ms": [], "qa_latency_ms": [], "summaries": [], "audio_seconds": []}
+    await _wait_for_server(args.port)
+    baseline = await _get_json(args.port, "/_loadtest/stats?reset=true")
+
+    clients = []
+    for n in range(args.clients):
+        url = f"ws://127.0.0.1:{args.port}/ws/load-{n}"
+        clients.append(asyncio.create_task(run_client(url, args.duration, args.question_every, results)))
+        await asyncio.sleep(args.ramp / max(1, args.clients))
+    await asyncio.gather(*clients)
+
+    final = await _get_json(args.port, "/_loadtest/stats")
+    cpu = final["cpu_seconds"] - baseline["cpu_seconds"]
+    audio_seconds = sum(results["audio_seconds"])
+    return {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {k: getattr(args, k) for k in ("clients", "duration", "question_every", "transcript_seconds")},
+        "transcript_latency_ms": _percentiles(results["transcript_latency_ms"]),
+        "qa_latency_ms": _percentiles(results["qa_latency_ms"]),
+        "summary_events": len(results["summaries"]),
+        "loop_lag_ms": final["loop_lag_ms"],
+        "cpu_seconds": round(cpu, 2),
+        "cpu_seconds_per_session": round(cpu / max(1, args.clients), 3),
+        "cpu_seconds_per_audio_second": round(cpu / audio_seconds, 4) if audio_seconds else None,
+        "rss_mb": round(final["rss_mb"], 1),
+        "rss_mb_per_session": round((final["rss_mb"] - baseline["rss_mb"]) / max(1, args.clients), 2),
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test concurrent /ws meeting sessions")
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of audio per client")
+    parser.add_argument("--question-every", type=float, default=10, help="Seconds between user_message questions (0 = none)")
+    parser.add_argument("--transcript-seconds", type=float, default=2, help="Audio seconds per mock transcript")
+    parser.add_argument("--ramp", type=float, default=2, help="Seconds over which clients connect")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", help="Write the JSON result here")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.port, args.transcript_seconds)
+        return
+
+    server = subprocess.Popen([
+        sys.executable, os.path.abspath(__file__), "--serve",
+        "--port", str(args.port), "--transcript-seconds", str(args.transcript_seconds)
+    ], cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.DEVNULL)
+    try:
+        result = asyncio.run(drive(args))
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
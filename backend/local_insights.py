@@ -0,0 +1,145 @@
+"""
+Local extractive insights for Project Co-Pilot
+Provisional conversation points computed on the CPU in a few milliseconds,
+so the overlay keeps moving while Gemini is slow or failing. Key sentences
+come from the most central recent transcript windows (cosine similarity to
+the mean of the window embeddings on_transcript already computed), action
+items from commitment and deadline patterns ("I'll", "we need to", "by
+Friday"). The result has the shape of get_conversation_points and goes
+through the same PointsTracker, so the next LLM result replaces it in place.
+"""
+
+import os
+import re
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+LOCAL_INSIGHTS_WINDOW_CHUNKS = int(os.getenv("LOCAL_INSIGHTS_WINDOW_CHUNKS", "20"))  # Recent windows ranked
+LOCAL_INSIGHTS_SCAN_LINES = int(os.getenv("LOCAL_INSIGHTS_SCAN_LINES", "60"))  # Recent lines scanned for actions
+LOCAL_INSIGHTS_STALE_SECONDS = float(os.getenv("LOCAL_INSIGHTS_STALE_SECONDS", "8"))  # LLM call slower than this
+LOCAL_INSIGHTS_MAX_ITEMS = 3
+REDUNDANT_SIMILARITY = 0.9  # A window this close to one already picked adds nothing
+
+COMMITMENT_PATTERN = re.compile(
+    r"\b(i'll|i will|we'll|we will|i'm going to|we're going to|we need to|we have to|we should|i need to|"
+    r"let's|can you|could you|please|action item|to-?do|follow up|take care of|make sure)\b", re.IGNORECASE)
+DEADLINE_PATTERN = re.compile(
+    r"\b(by|before|until|due|on)\s+(monday|tuesday|wednesday|thursday|friday|saturday|sunday|tomorrow|tonight|"
+    r"eod|end of (the )?(day|week|month|quarter|sprint)|next (week|month|sprint)|"
+    r"\d{1,2}(st|nd|rd|th)?( of)? ?(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)?\w*)\b", re.IGNORECASE)
+SPEAKER_PREFIX = re.compile(r"^Speaker \d+:\s*")
+STOPWORDS = frozenset(
+    "a an and are as at be but by do for from have i in is it its of on or so that the this to was we were what "
+    "will with you they he she our your their there then than just also about can not no yes okay ok yeah um uh "
+    "like really very going get got know think one all".split())
+
+
+def _words(text: str) -> List[str]:
+    return [w for w in re.findall(r"[a-z0-9']+", text.lower()) if w not in STOPWORDS and len(w) > 2]
+
+
+def _line_scores(lines: Sequence[str]) -> List[float]:
+    """Sentence-level centrality: mean frequency of a line's content words across the recent lines."""
+    tokenized = [_words(line) for line in lines]
+    frequency = Counter(w for words in tokenized for w in set(words))
+    return [sum(frequency[w] for w in words) / len(words) * min(1.0, len(words) / 6) if words else 0.0
+            for words in tokenized]
+
+
+def key_sentences(store, lines: Sequence[str], max_items: int = LOCAL_INSIGHTS_MAX_ITEMS,
+                  window_chunks: int = LOCAL_INSIGHTS_WINDOW_CHUNKS) -> List[str]:
+    """The best line of each of the most central recent windows, most central first."""
+    first = max(0, len(store.embeddings) - window_chunks)
+    ids = [i for i in range(first, len(store.embeddings)) if i < len(store.sources) and store.sources[i]]
+    if not ids:
+        return []
+    vectors = np.stack([np.asarray(store.embeddings[i], dtype=np.float32) for i in ids])
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+    centroid = vectors.mean(axis=0)
+    ranked = np.argsort(-(vectors @ centroid))
+
+    span_start = store.sources[ids[0]][0]
+    span = list(lines[span_start:store.sources[ids[-1]][1] + 1])
+    scores = _line_scores(span)
+    picked: List[int] = []
+    sentences: List[str] = []
+    for n in ranked:
+        if len(sentences) >= max_items:
+            break
+        if picked and float(np.max(vectors[picked] @ vectors[n])) >= REDUNDANT_SIMILARITY:
+            continue
+        line_start, line_end = store.sources[ids[n]]
+        candidates = [i for i in range(line_start, line_end + 1) if 0 <= i - span_start < len(span)]
+        if not candidates:
+            continue
+        best = max(candidates, key=lambda i: scores[i - span_start])
+        sentence = SPEAKER_PREFIX.sub("", lines[best]).strip()
+        if sentence and sentence not in sentences:
+            picked.append(int(n))
+            sentences.append(sentence)
+    return sentences
+
+
+def action_items(lines: Sequence[str], max_items: int = LOCAL_INSIGHTS_MAX_ITEMS) -> List[str]:
+    """Recent lines with a commitment; ones that also name a deadline rank first."""
+    found = []
+    for age, line in enumerate(reversed(lines)):
+        if COMMITMENT_PATTERN.search(line):
+            text = line.strip()
+            if text not in (t for _, _, t in found):
+                found.append((0 if DEADLINE_PATTERN.search(line) else 1, age, text))
+    return [text for _, _, text in sorted(found)[:max_items]]
+
+
+def extract_points(store, lines: Sequence[str], scan_lines: int = LOCAL_INSIGHTS_SCAN_LINES) -> Optional[Dict]:
+    """Provisional conversation points, in the shape get_conversation_points returns; None if nothing was found."""
+    recent = lines[-scan_lines:]
+    sentences = key_sentences(store, lines)
+    actions = action_items(recent)
+    questions = [SPEAKER_PREFIX.sub("", line).strip() for line in reversed(recent) if line.rstrip().endswith("?")]
+    if not sentences and not actions:
+        return None
+    return {
+        "summary": sentences[0] if sentences else "",
+        "action_items": actions,
+        "talking_points": sentences,
+        "questions": questions[:2],
+        "insights": f"Provisional: {len(sentences)} key sentences, {len(actions)} action items from the last "
+                    f"{len(recent)} lines",
+        "suggestions": [],
+    }
+
+
+def benchmark(hours_list=(0.25, 1, 4), ticks: int = 200, dimension: int = 384):
+    """CPU time of one extraction tick as the meeting grows, with random stand-in window embeddings."""
+    from transcript_chunker import TranscriptChunker
+    from transcript_store import _synthetic_meeting
+    from vector_store import SessionVectorStore
+
+    vectors = np.random.default_rng(0)
+    for hours in hours_list:
+        lines = [line["text"] for line in _synthetic_meeting(hours)]
+        store = SessionVectorStore(dimension)
+        chunker = TranscriptChunker()
+        for i, line in enumerate(lines):
+            window = chunker.add(i, line)
+            if window:
+                store.add_text(window["text"], vectors.standard_normal(dimension),
+                               (window["line_start"], window["line_end"]))
+        cpu, wall = [], []
+        for _ in range(ticks):
+            cpu_started, wall_started = time.process_time(), time.perf_counter()
+            points = extract_points(store, lines)
+            cpu.append(time.process_time() - cpu_started)
+            wall.append(time.perf_counter() - wall_started)
+        wall.sort()
+        print(f"[LocalInsights] {hours}h ({len(lines)} lines, {len(store.texts)} windows): "
+              f"{sum(cpu) / ticks * 1000:.2f} ms CPU/tick, wall p50 {wall[ticks // 2] * 1000:.2f} ms, "
+              f"p99 {wall[int(ticks * 0.99)] * 1000:.2f} ms, {len(points['action_items'])} action items")
+
+
+if __name__ == "__main__":
+    benchmark()
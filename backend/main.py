@@ -4,24 +4,53 @@ Real-time AI meeting assistant with speech-to-text and AI summarization
 Enhanced with vector storage and real-time conversation points
 """
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Header, Depends
+from typing import Optional
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from dotenv import load_dotenv
 import os
 import json
 import asyncio
 from auth_routes import router as auth_router
+from auth import (
+    create_viewer_grant, decode_token, get_request_user, require_same_user, viewer_grant_allows,
+    VIEWER_GRANT_EXPIRE_MINUTES
+)
+from jose import JWTError
+from models import UserResponse
 from deepgram_stt import DeepgramSTT
-from gemini_llm import GeminiLLM
-import ffmpeg
+from llm_provider import get_llm
+from mock_transcriber import MockTranscriber
 import tempfile
 from database import (
     get_async_client, get_async_database, get_users_collection, get_meeting_sessions_collection,
-    test_connection, sync_client
+    test_connection, create_meeting_session, get_user_by_email, get_user_meetings_page, get_user_meeting, iter_transcript_chunks
+)
+from vector_store import cleanup_session
+from live_session import ROLE_PRODUCER, ROLE_VIEWER, LiveSession, live_sessions
+from word_table import NO_SPEAKER, parse_speaker_filter, speaker_label
+from stream_config import StreamConfig
+from transcript_store import (
+    TRANSCRIPT_BUCKETS_COLLECTION, TranscriptBucketWriter, create_transcript_indexes,
+    format_offset, has_transcript_buckets, iter_transcript_lines
+)
+from llm_budget import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, llm_budget
+from llm_gateway import llm_gateway
+from summary_scheduler import SUMMARY_TICK_SECONDS, count_tokens
+from final_summary import summarize_meeting
+from context_packer import QA_CONTEXT_CANDIDATES, build_qa_prompt, estimate_tokens, pack_context
+from answer_prefetch import AnswerPrefetcher
+from local_insights import LOCAL_INSIGHTS_STALE_SECONDS, extract_points
+import metrics
+from profiling import profiler
+from user_index import (
+    CHUNKS_COLLECTION, create_user_index_indexes, persist_session_to_user_index, search_user_index
 )
-from vector_store import get_or_create_session_store, cleanup_session
-from sentence_transformers import SentenceTransformer
+import embedding_service
+from embedding_service import get_embedding, embedding_cache, save_embedding_cache
 import numpy as np
+from bson.errors import InvalidId
 from datetime import datetime, timedelta
 
 # Load environment variables
@@ -40,9 +69,6 @@ app.add_middleware(
 
 app.include_router(auth_router)
 
-# Load embedding model once
-embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-
 @app.get("/")
 async def root():
     return {"message": "Project Co-Pilot Backend is running!"}
@@ -51,28 +77,284 @@ async def root():
 async def health_check():
     return {"status": "healthy", "message": "Backend is operational"}
 
-active_connections = {}
+# Subsystem warm-up state: "pending" until the startup task finishes, then "ready" or "failed"
+readiness = {"mongo": "pending", "embedding_model": "pending"}
+MONGO_RETRY_SECONDS = float(os.getenv("MONGO_RETRY_SECONDS", "5"))
+
+@app.get("/health/live")
+async def liveness():
+    """The process is up and its event loop is serving requests"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness_check():
+    """200 once every subsystem is warm, 503 (with per-subsystem state) until then"""
+    ready = all(state == "ready" for state in readiness.values())
+    body = {"status": "ready" if ready else "not_ready", "subsystems": readiness}
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+# "mock" swaps Deepgram for MockTranscriber; with LLM_PROVIDER=local the pipeline needs no network
+STT_PROVIDER = os.getenv("STT_PROVIDER", "deepgram")
+USER_MESSAGE_DEADLINE_SECONDS = float(os.getenv("USER_MESSAGE_DEADLINE_SECONDS", "20"))
+
 session_data = {}
 session_stt = {}
 session_llm = {}
+final_summary_tasks = set()  # End-of-meeting summary jobs still running
 
 # Helper: send summary/points to frontend
-async def send_gemini_summary(websocket, transcript_text):
-    llm = GeminiLLM()
-    summary = await llm.get_summary_and_suggestion(transcript_text)
-    if summary:
-        await websocket.send_text(json.dumps({
-            "type": "summary",
-            "summary": summary
-        }))
-    points = await llm.get_conversation_points(transcript_text)
+async def send_gemini_summary(session, transcript_text):
+    session.llm_points_started = asyncio.get_event_loop().time()
+    try:
+        llm = get_llm(session.session_id)
+        summary = await llm.get_summary_and_suggestion(transcript_text)
+        if summary:
+            session.latest_summary = summary
+            await session.send({
+                "type": "summary",
+                "summary": summary
+            })
+        lines = len(session.transcript_accum)
+        points = await llm.get_conversation_points(transcript_text)
+        session.llm_points_failed = not points
+        if points:
+            session.llm_points_ready = True
+            await send_points(session, points, lines)
+            # Answer the suggested questions while the LLM budget is idle
+            session.answer_prefetcher.schedule(points.get("questions") or [])
+    finally:
+        session.llm_points_started = None
+
+async def send_points(session, points, lines, provisional=False):
+    """Fold conversation points into the session's tracker and send what changed"""
+    # Only what changed since the last update; paraphrased repeats are dropped
+    tracker = session.points_tracker
+    async with session.points_lock:
+        sent_before = tracker.diff_bytes
+        ops = await asyncio.to_thread(tracker.update, points)
+        session.points_lines = lines
+    if ops:
+        event = {"type": "conversation_points_diff", "ops": ops}
+        if provisional:
+            event["provisional"] = True
+        await session.send(event)
+        metrics.inc_session(session.session_id, "points_bytes", tracker.diff_bytes - sent_before)
+
+async def send_local_points(session):
+    """Provisional extractive points while the LLM's are missing, failed or late"""
+    lines = len(session.transcript_accum)
+    if lines == session.points_lines:
+        return
+    started = session.llm_points_started
+    late = started is not None and asyncio.get_event_loop().time() - started > LOCAL_INSIGHTS_STALE_SECONDS
+    if session.llm_points_ready and not session.llm_points_failed and not late:
+        return
+    with metrics.LOCAL_INSIGHTS.time():
+        points = extract_points(session.vector_store, session.transcript_accum)
     if points:
-        await websocket.send_text(json.dumps({
-            "type": "conversation_points",
-            **points
-        }))
+        await send_points(session, points, lines, provisional=True)
+
+def index_window(session, window):
+    """Embed a closed transcript window and add it to the session's vector store"""
+    if window:
+        embedding = get_embedding(window["text"])
+        speakers = session.word_table.speakers_in(window["line_start"], window["line_end"])
+        session.vector_store.add_text(window["text"], np.array(embedding), (window["line_start"], window["line_end"]), speakers)
+
+async def answer_question(session, question, q_embedding, speaker=None,
+                          priority=PRIORITY_INTERACTIVE, deadline_seconds=USER_MESSAGE_DEADLINE_SECONDS):
+    """Hybrid retrieval, token-budgeted context and one LLM call for a question about the meeting"""
+    # Search vector store (BM25 + vector, fused by rank)
+    hits = session.vector_store.search_hybrid_scored(
+        question, np.array(q_embedding), k=QA_CONTEXT_CANDIDATES, speaker=speaker
+    )
+    # Rolling summary + best hits and their neighbours, within the token budget
+    packed = pack_context(session.vector_store, hits, session.transcript_accum, session.latest_summary)
+    metrics.CONTEXT_PACK.observe(packed["seconds"])
+    prompt = build_qa_prompt(packed["context"], question)
+    metrics.QA_PROMPT_TOKENS.observe(estimate_tokens(prompt))
+    llm = get_llm(session.session_id, priority=priority, deadline_seconds=deadline_seconds)
+    return await llm.get_summary_and_suggestion(prompt)
+
+async def prefetch_answer(session, question):
+    """Speculative answer to a suggested question; background priority, no deadline"""
+    q_embedding = await asyncio.to_thread(get_embedding, question)
+    return await answer_question(session, question, q_embedding, priority=PRIORITY_BACKGROUND, deadline_seconds=None)
+
+async def start_live_session(session_id: str, user_id: Optional[str] = None,
+                             stream_config: Optional[StreamConfig] = None) -> LiveSession:
+    """Create session state, connect STT and start the background summary loop"""
+    session = LiveSession(session_id, user_id, stream_config)
+    session.answer_prefetcher = AnswerPrefetcher(
+        lambda question: prefetch_answer(session, question), version=lambda: len(session.transcript_accum)
+    )
+    live_sessions[session_id] = session
+    session_data[session_id] = {"transcripts": [], "ai_responses": [], "conversation_points": []}
+    metrics.track_session(session_id)
+
+    async def on_transcript(text, words=None, channel=0):
+        metrics.inc_session(session_id, "transcripts")
+        session_data[session_id]["transcripts"].append(text)
+        line_index = len(session.transcript_accum)
+        # Word timings, confidences and speakers go to the column-backed word table
+        turns = session.word_table.turns(session.word_table.append_line(line_index, words))
+        # The final supersedes any interim caption shown for this utterance
+        event = {"type": "transcript", "text": text, "utterance": session.interim_for(channel).finalize()}
+        if session.stream_config.multichannel:
+            event["channel"] = channel
+        line = text
+        if any(turn["speaker"] != NO_SPEAKER for turn in turns):
+            for turn in turns:
+                turn["speaker"] = speaker_label(turn["speaker"]) if turn["speaker"] != NO_SPEAKER else None
+            event["turns"] = turns
+            # Label speakers in the stored line so summaries and answers can attribute statements
+            line = " ".join(f"{turn['speaker']}: {turn['text']}" if turn["speaker"] else turn["text"] for turn in turns)
+        await session.send(event)
+        session.transcript_accum.append(line)
+        session.transcript_tokens += count_tokens(line)
+        if session.transcript_writer is not None:
+            if words and words["start"]:
+                start, end = words["start"][0], words["end"][-1]
+            else:
+                start = end = asyncio.get_event_loop().time() - session.started_at
+            await session.transcript_writer.add(start, end, line)
+        # Merge finals into overlapping windows; embed each window once when it closes
+        index_window(session, session.chunker.add(line_index, line))
+
+    async def gemini_background_task():
+        # Summarize on meaningful change rather than on a fixed timer
+        scheduler = session.summary_scheduler
+        loop = asyncio.get_event_loop()
+        while True:
+            await asyncio.sleep(SUMMARY_TICK_SECONDS)
+            embeddings = session.vector_store.embeddings
+            latest_embedding = embeddings[-1] if embeddings else None
+            if scheduler.check(loop.time(), session.transcript_tokens, latest_embedding) is None:
+                continue
+            # LLM calls take their slots from the shared budget inside the gateway
+            started_at = loop.time()
+            total_tokens = session.transcript_tokens
+            await send_gemini_summary(session, "\n".join(session.transcript_accum))
+            scheduler.record(started_at, total_tokens, latest_embedding, loop.time() - started_at)
+
+    session.tasks.append(asyncio.create_task(gemini_background_task()))
+
+    async def local_insights_task():
+        # Keeps the overlay moving when Gemini is slow or failing; the next LLM result replaces these
+        while True:
+            await asyncio.sleep(SUMMARY_TICK_SECONDS)
+            await send_local_points(session)
+
+    session.tasks.append(asyncio.create_task(local_insights_task()))
+    async def on_interim(text, channel=0):
+        await session.interim_for(channel).update(text)
+
+    await open_meeting_record(session)
+    session.stt = MockTranscriber() if STT_PROVIDER == "mock" else DeepgramSTT(config=session.stream_config)
+    session_stt[session_id] = session.stt
+    await session.stt.connect(None, on_transcript, on_interim)
+    return session
+
+async def open_meeting_record(session: LiveSession):
+    """Create the MeetingSession document a user's live transcript is stored under"""
+    if not session.user_id or readiness["mongo"] != "ready":
+        return
+    now = datetime.utcnow()
+    try:
+        from bson import ObjectId
+        session.meeting_id = await create_meeting_session(app.state.meeting_sessions_collection, {
+            "user_id": ObjectId(session.user_id),
+            "title": f"Meeting {now:%Y-%m-%d %H:%M}",
+            "start_time": now,
+            "end_time": None,
+            "summary": None,
+            "transcript_lines": 0,
+            "created_at": now
+        })
+    except Exception as e:
+        print(f"❌ Failed to create meeting record for {session.session_id}: {e}")
+        return
+    session.transcript_writer = TranscriptBucketWriter(app.state.transcript_buckets_collection, session.meeting_id)
+
+async def close_meeting_record(session: LiveSession):
+    """Store the last transcript bucket and mark the meeting finished"""
+    writer = session.transcript_writer
+    if writer is None:
+        return
+    await writer.close()
+    try:
+        from bson import ObjectId
+        await app.state.meeting_sessions_collection.update_one(
+            {"_id": ObjectId(session.meeting_id)},
+            {"$set": {"end_time": datetime.utcnow(), "transcript_lines": writer.line_count}}
+        )
+    except Exception as e:
+        print(f"❌ Failed to close meeting record {session.meeting_id}: {e}")
+    print(f"💾 Stored {writer.line_count} transcript lines for {session.session_id} "
+          f"in {writer.buckets_written} buckets ({writer.bytes_written} bytes)")
+
+async def write_final_summary(session: LiveSession, lines):
+    """Map-reduce summary of the whole meeting, stored on its MeetingSession"""
+    result = await summarize_meeting(get_llm(session.session_id), lines)
+    print(f"📝 Final summary for {session.session_id}: {result['segments']} segments, {result['levels']} merge levels, "
+          f"{result['llm_calls']} calls ({result['failed_calls']} failed) in {result['seconds']:.1f}s")
+    if result["summary"] is None:
+        return
+    try:
+        from bson import ObjectId
+        await app.state.meeting_sessions_collection.update_one(
+            {"_id": ObjectId(session.meeting_id)}, {"$set": {"summary": result["summary"]}}
+        )
+    except Exception as e:
+        print(f"❌ Failed to store final summary for {session.meeting_id}: {e}")
+
+async def end_live_session(session: LiveSession):
+    """Tear down a session once its reconnect grace period has passed"""
+    session_id = session.session_id
+    for task in session.tasks:
+        task.cancel()
+    session.answer_prefetcher.cancel()
+    if session_stt.get(session_id) is session.stt:
+        await session.stt.disconnect()
+        del session_stt[session_id]
+    index_window(session, session.chunker.flush())
+    await close_meeting_record(session)
+    points_stats = session.points_tracker.stats()
+    if points_stats["ticks"]:
+        print(f"📉 Conversation points for {session_id}: {points_stats['diff_bytes']} bytes of diffs "
+              f"instead of {points_stats['full_bytes']} over {points_stats['ticks']} updates")
+    prefetch_stats = session.answer_prefetcher.stats()
+    if prefetch_stats["prefetched"]:
+        print(f"⚡ Prefetched answers for {session_id}: {prefetch_stats['prefetched']} computed, "
+              f"{prefetch_stats['hits']}/{prefetch_stats['hits'] + prefetch_stats['misses']} questions served "
+              f"(hit rate {prefetch_stats['hit_rate']:.0%}), {prefetch_stats['latency_saved_seconds']:.1f}s saved")
+    if session.meeting_id and session.transcript_accum:
+        # Runs after teardown; the reconnect path never waits on it
+        task = asyncio.create_task(write_final_summary(session, list(session.transcript_accum)))
+        final_summary_tasks.add(task)
+        task.add_done_callback(final_summary_tasks.discard)
+    vector_store = session.vector_store
+    if session.user_id and vector_store.texts:
+        try:
+            # Keyed like the meetings API and transcript buckets, so search hits link to the meeting;
+            # a session whose meeting record could not be created falls back to its socket id
+            await persist_session_to_user_index(
+                app.state.user_index_chunks_collection, session.user_id, session.meeting_id or session_id,
+                vector_store.texts, vector_store.embeddings
+            )
+        except Exception as e:
+            print(f"❌ Failed to persist session {session_id} to user index: {e}")
+    # A new session may already have taken over this id
+    if live_sessions.get(session_id) is session:
+        del live_sessions[session_id]
+        cleanup_session(session_id)
+        if session_id in session_data:
+            del session_data[session_id]
+        metrics.drop_session(session_id)
+    print(f"🧹 Cleaned up session: {session_id}")
 
 def webm_to_pcm(audio_bytes: bytes) -> bytes:
+    import ffmpeg  # Only needed for this conversion path
     # Write the WebM/Opus audio to a temp file
     with tempfile.NamedTemporaryFile(suffix='.webm') as input_file, \
          tempfile.NamedTemporaryFile(suffix='.pcm') as output_file:
@@ -88,76 +370,133 @@ def webm_to_pcm(audio_bytes: bytes) -> bytes:
         output_file.seek(0)
         return output_file.read()
 
+async def websocket_user_id(websocket: WebSocket) -> Optional[str]:
+    """The user a live socket acts for, from its ?token= access token (browsers cannot set headers here).
+
+    Without a token the session is anonymous; a ?user_id= is only accepted
+    when it matches the token. Raises ValueError when authentication fails.
+    """
+    token = websocket.query_params.get("token")
+    claimed = websocket.query_params.get("user_id")
+    if not token:
+        if claimed:
+            raise ValueError("user_id requires an access token")
+        return None
+    try:
+        token_data = decode_token(token)
+    except JWTError:
+        raise ValueError("Could not validate credentials")
+    user = await get_user_by_email(app.state.users_collection, token_data.email)
+    if user is None:
+        raise ValueError("User not found")
+    user_id = str(user["_id"])
+    if claimed and claimed != user_id:
+        raise ValueError("Not allowed to act as another user")
+    return user_id
+
 @app.websocket("/ws/{session_id}")
 async def websocket_endpoint(websocket: WebSocket, session_id: str):
     await websocket.accept()
-    active_connections[session_id] = websocket
-    session_data[session_id] = {"transcripts": [], "ai_responses": [], "conversation_points": []}
-    print(f"🔗 WebSocket connected: {session_id}")
-    stt = DeepgramSTT()
-    session_stt[session_id] = stt
-    transcript_accum = []
-    gemini_lock = asyncio.Lock()
-    vector_store = get_or_create_session_store(session_id)
-    last_gemini_sent = 0
-    last_transcript_len = 0
-    gemini_task_cancel = False
-
-    async def on_transcript(text):
-        session_data[session_id]["transcripts"].append(text)
-        await websocket.send_text(json.dumps({
-            "type": "transcript",
-            "text": text
-        }))
-        transcript_accum.append(text)
-        # Generate embedding and store in vector DB
-        embedding = embedding_model.encode(text)
-        vector_store.add_text(text, np.array(embedding))
-
-    async def gemini_background_task():
-        nonlocal last_gemini_sent, last_transcript_len
-        while not gemini_task_cancel:
-            await asyncio.sleep(5)
-            if len(transcript_accum) > last_transcript_len:
-                async with gemini_lock:
-                    await send_gemini_summary(websocket, "\n".join(transcript_accum))
-                    last_transcript_len = len(transcript_accum)
-
-    gemini_task = asyncio.create_task(gemini_background_task())
-    await stt.connect(websocket, on_transcript)
+    session = live_sessions.get(session_id)
+    resumed = session is not None and not session.closed
+    # One producer streams audio; viewers (e.g. teammates in the same meeting) only receive events
+    role = websocket.query_params.get("role", ROLE_PRODUCER)
+    if role not in (ROLE_PRODUCER, ROLE_VIEWER) or (role == ROLE_VIEWER and not resumed):
+        message = f"Unknown role: {role}" if role != ROLE_VIEWER else "No live session to view"
+        await websocket.send_text(json.dumps({"type": "error", "message": message}))
+        await websocket.close(code=1008)
+        return
+    try:
+        user_id = await websocket_user_id(websocket)
+        if resumed and session.user_id and session.user_id != user_id:
+            # Only the owner may take over the producer side of a user's session;
+            # anyone else watches only with a grant the owner issued for this run of it
+            if role == ROLE_PRODUCER:
+                raise ValueError("Not allowed to resume another user's session")
+            grant = websocket.query_params.get("grant")
+            if not grant or not viewer_grant_allows(grant, session_id, session.epoch):
+                raise ValueError("Viewing another user's session requires a viewer grant")
+    except ValueError as e:
+        await websocket.send_text(json.dumps({"type": "error", "message": str(e)}))
+        await websocket.close(code=1008)
+        return
+    if not resumed:
+        # Audio format and Deepgram tuning are negotiated once, when the session starts;
+        # a resumed session keeps its config and reports it in the connection message
+        try:
+            stream_config = StreamConfig.from_query_params(websocket.query_params)
+        except ValueError as e:
+            await websocket.send_text(json.dumps({"type": "error", "message": str(e)}))
+            await websocket.close(code=1008)
+            return
+        # Optional: ties the session to the authenticated user so it is kept in their persistent search index
+        session = await start_live_session(session_id, user_id, stream_config)
+    subscriber = session.attach(websocket, role)
+    print(f"🔗 WebSocket {'resumed' if resumed else 'connected'} as {role}: {session_id} "
+          f"({len(session.subscribers)} connected)")
+    stt = session.stt
     try:
-        await websocket.send_text(json.dumps({
+        subscriber.send({
             "type": "connection",
             "status": "connected",
-            "session_id": session_id
-        }))
-        
+            "session_id": session_id,
+            "role": role,
+            "resumed": resumed,
+            "epoch": session.epoch,
+            "last_seq": session.seq,
+            "stream_config": session.stream_config.model_dump(exclude_none=True)
+        })
+        # Replayed before anything can yield to the event loop, so no live event overtakes the
+        # missed ones and the client's "seq <= last seen" dedup only drops true duplicates
+        last_seq = websocket.query_params.get("last_seq")
+        same_epoch = websocket.query_params.get("epoch") in (None, session.epoch)
+        if resumed and same_epoch and last_seq is not None and last_seq.isdigit():
+            await session.replay(int(last_seq), subscriber)
+
+        # Under the lock: an update may be running in a thread and mutating the tracker
+        async with session.points_lock:
+            points_snapshot = session.points_tracker.snapshot() if session.points_tracker.has_points else None
+        if points_snapshot is not None:
+            # Full current state, so it supersedes any replayed or queued diffs before it
+            subscriber.send({
+                "type": "conversation_points_snapshot",
+                "points": points_snapshot
+            })
+
         # Check if Deepgram connection was successful
-        if not stt.is_connected:
+        if role == ROLE_PRODUCER and not stt.is_connected:
             print("❌ Deepgram connection failed - audio will not be transcribed")
-            await websocket.send_text(json.dumps({
+            subscriber.send({
                 "type": "error",
                 "message": "Failed to connect to speech recognition service"
-            }))
+            })
         
         while True:
             try:
                 message = await websocket.receive()
-                if 'bytes' in message and message['bytes'] is not None:
+                if message.get("type") == "websocket.disconnect":
+                    raise WebSocketDisconnect(message.get("code", 1000))
+                if 'bytes' in message and message['bytes'] is not None and subscriber is not session.producer:
+                    subscriber.send({"type": "error", "message": "Only the producer connection can send audio"}, lossy=True)
+                elif 'bytes' in message and message['bytes'] is not None:
                     audio_data = message['bytes']
+                    metrics.inc_session(session_id, "audio_bytes", len(audio_data))
                     print(f"📦 Received PCM audio chunk: {len(audio_data)} bytes")
                     
-                    # Send PCM data directly to Deepgram (no transcoding needed)
+                    # Send PCM to Deepgram, downmixed/resampled first if the client declared another format
                     try:
+                        if session.audio_converter is not None:
+                            with metrics.AUDIO_CONVERT.time():
+                                audio_data = session.audio_converter.convert(audio_data)
                         await stt.process_audio(audio_data)
                     except Exception as e:
                         print(f"❌ Deepgram processing error: {e}")
                         
-                    await websocket.send_text(json.dumps({
+                    subscriber.send({
                         "type": "audio_ack",
                         "status": "received",
                         "chunk_size": len(audio_data)
-                    }))
+                    }, lossy=True)
                 elif 'text' in message and message['text'] is not None:
                     try:
                         data = json.loads(message['text'])
@@ -167,78 +506,139 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
                             text = data.get("text", "")
                             if text.strip():
                                 session_data[session_id]["transcripts"].append(text)
-                                await websocket.send_text(json.dumps({
+                                subscriber.send({
                                     "type": "text_ack",
                                     "status": "received",
                                     "text": text
-                                }))
+                                })
+                        elif msg_type == "resume":
+                            # Client reconnected and reports the last event it saw; its seqs
+                            # mean nothing if they came from an earlier session under this id
+                            if data.get("epoch") in (None, session.epoch):
+                                replayed = await session.replay(int(data.get("last_seq", 0)), subscriber)
+                                print(f"🔁 Replayed {replayed} events to {session_id}")
+                        elif msg_type == "user_message" and subscriber is not session.producer:
+                            # Answers are paid from the session owner's LLM budget
+                            subscriber.send({"type": "error", "message": "Only the producer connection can ask questions"})
                         elif msg_type == "user_message":
                             # User asked a question: semantic search + Gemini answer
                             question = data.get("message", "")
                             if question.strip():
+                                started = asyncio.get_event_loop().time()
+                                # "What did speaker 2 commit to?" only searches chunks where that speaker talks
+                                speaker = data.get("speaker")
+                                speaker = int(speaker) - 1 if speaker else parse_speaker_filter(question)
                                 # Embed the question
-                                q_embedding = embedding_model.encode(question)
-                                # Search vector store
-                                context_chunks = vector_store.search_relevant_context(np.array(q_embedding), k=5)
-                                context_text = "\n".join(context_chunks)
-                                # Compose prompt for Gemini
-                                llm = GeminiLLM()
-                                prompt = f"Context:\n{context_text}\n\nUser question: {question}\n\nAnswer as a helpful meeting assistant."
-                                ai_answer = await llm.get_summary_and_suggestion(prompt)
-                                await websocket.send_text(json.dumps({
+                                q_embedding = get_embedding(question)
+                                # A suggested question answered while the LLM was idle, if still fresh
+                                prefetched = None
+                                if speaker is None:
+                                    prefetched = session.answer_prefetcher.lookup(question, np.array(q_embedding))
+                                    metrics.inc_session(session_id, "answer_prefetch_hits" if prefetched else "answer_prefetch_misses")
+                                if prefetched:
+                                    ai_answer = prefetched["answer"]
+                                else:
+                                    # Make the most recent lines searchable before retrieval
+                                    index_window(session, session.chunker.flush())
+                                    # Interactive: jumps ahead of background summaries in the LLM queue
+                                    ai_answer = await answer_question(session, question, q_embedding, speaker)
+                                metrics.ANSWER_LATENCY.observe(asyncio.get_event_loop().time() - started,
+                                                               ("prefetched" if prefetched else "computed",))
+                                await session.send({
                                     "type": "ai_answer",
-                                    "text": ai_answer or "Sorry, I couldn't find an answer."
-                                }))
+                                    "text": ai_answer or "Sorry, I couldn't find an answer.",
+                                    "prefetched": bool(prefetched)
+                                })
                         elif msg_type == "ping":
-                            await websocket.send_text(json.dumps({
+                            subscriber.send({
                                 "type": "pong",
                                 "timestamp": asyncio.get_event_loop().time()
-                            }))
+                            }, lossy=True)
                         else:
                             print(f"⚠️ Unknown message type: {msg_type}")
-                            await websocket.send_text(json.dumps({
+                            subscriber.send({
                                 "type": "error",
                                 "message": f"Unknown message type: {msg_type}"
-                            }))
+                            })
                     except json.JSONDecodeError:
                         print("❌ Invalid JSON received")
-                        await websocket.send_text(json.dumps({
+                        subscriber.send({
                             "type": "error",
                             "message": "Invalid JSON format"
-                        }))
+                        })
                 else:
                     print(f"⚠️ Unknown message format: {message}")
+            except WebSocketDisconnect:
+                raise
             except Exception as e:
                 print(f"❌ Error processing message: {e}")
-                await websocket.send_text(json.dumps({
+                subscriber.send({
                     "type": "error",
                     "message": f"Processing error: {str(e)}"
-                }))
+                })
     except WebSocketDisconnect:
         print(f"🔌 WebSocket disconnected: {session_id}")
     except Exception as e:
         print(f"❌ WebSocket error: {e}")
     finally:
-        gemini_task_cancel = True
-        if gemini_task:
-            gemini_task.cancel()
-        if session_id in active_connections:
-            del active_connections[session_id]
-        if session_id in session_stt:
-            await session_stt[session_id].disconnect()
-            del session_stt[session_id]
-        cleanup_session(session_id)
-        await asyncio.sleep(1)
-        if session_id in session_data:
-            del session_data[session_id]
-        print(f"🧹 Cleaned up session: {session_id}")
+        # Keep the session warm so a reconnecting producer can resume it
+        session.detach(subscriber, end_live_session)
+
+metrics.Gauge("copilot_live_sessions", "Sessions live or inside their reconnect grace period",
+              func=lambda: len(live_sessions))
+metrics.Gauge("copilot_ws_subscribers", "WebSocket connections subscribed to live sessions (producers and viewers)",
+              func=lambda: sum(len(session.subscribers) for session in live_sessions.values()))
+metrics.Gauge("copilot_llm_queued_requests", "LLM requests waiting for a budget slot", func=lambda: llm_budget.queued)
+metrics.Gauge("copilot_embedding_cache_hit_rate", "Embedding cache hit rate since start",
+              func=lambda: embedding_cache.stats()["hit_rate"])
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus-format metrics for this worker"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")  # Admin endpoints are disabled unless this is set
+
+def require_admin(token: Optional[str]):
+    if not ADMIN_TOKEN or token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+@app.post("/admin/profile")
+async def start_profile(mode: str = "sample", duration: float = 30, session_id: Optional[str] = None,
+                        x_admin_token: Optional[str] = Header(None)):
+    """Profile this worker (or one session, in sample mode) for a bounded window"""
+    require_admin(x_admin_token)
+    if session_id is not None and session_id not in live_sessions:
+        raise HTTPException(status_code=404, detail="Session not found")
+    try:
+        job = profiler.start(mode, duration, session_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    print(f"🔬 Profiling job {job.id} started: {mode} for {duration:.0f}s ({session_id or 'whole worker'})")
+    return job.describe()
+
+@app.get("/admin/profile/{job_id}")
+async def get_profile(job_id: str, x_admin_token: Optional[str] = Header(None)):
+    """Job status, or the profile file once the job is done"""
+    require_admin(x_admin_token)
+    job = profiler.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Profiling job not found")
+    if job.status != "done":
+        return job.describe()
+    return Response(job.result, media_type="application/octet-stream",
+                    headers={"Content-Disposition": f'attachment; filename="{job.filename}"'})
 
 @app.get("/sessions")
 async def get_sessions():
     """Get list of active sessions"""
     return {
-        "active_connections": len(active_connections),
-        "session_ids": list(active_connections.keys())
+        "active_connections": sum(len(session.subscribers) for session in live_sessions.values()),
+        "session_ids": [sid for sid, session in live_sessions.items() if session.subscribers],
+        "viewers": {sid: sum(s.role == ROLE_VIEWER for s in session.subscribers)
+                    for sid, session in live_sessions.items() if session.subscribers}
     }
 
 @app.get("/session/{session_id}")
@@ -253,11 +653,110 @@ async def get_session_data(session_id: str):
             "conversation_points_count": len(data["conversation_points"]),
             "recent_transcripts": data["transcripts"][-5:],  # Last 5 transcripts
             "recent_ai_responses": data["ai_responses"][-3:],  # Last 3 AI responses
-            "latest_conversation_points": data["conversation_points"][-1] if data["conversation_points"] else None
+            "latest_conversation_points": data["conversation_points"][-1] if data["conversation_points"] else None,
+            "answer_prefetch": live_sessions[session_id].answer_prefetcher.stats() if session_id in live_sessions else None
         }
     else:
         return {"error": "Session not found"}
 
+@app.post("/session/{session_id}/viewer-grant")
+async def grant_session_viewer(session_id: str, current_user: UserResponse = Depends(get_request_user)):
+    """Let someone else watch the caller's live session: pass the grant as ?role=viewer&grant="""
+    session = live_sessions.get(session_id)
+    if session is None or session.closed:
+        raise HTTPException(status_code=404, detail="No live session")
+    if session.user_id:
+        require_same_user(session.user_id, current_user)
+    return {
+        "session_id": session_id,
+        "grant": create_viewer_grant(session_id, session.epoch),
+        "expires_in": VIEWER_GRANT_EXPIRE_MINUTES * 60
+    }
+
+@app.get("/users/{user_id}/search")
+async def search_past_meetings(user_id: str, q: str, k: int = 10, meeting_id: Optional[str] = None,
+                               start: Optional[datetime] = None, end: Optional[datetime] = None,
+                               current_user: UserResponse = Depends(get_request_user)):
+    """Semantic search across a user's past meetings"""
+    require_same_user(user_id, current_user)
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Query must not be empty")
+    if k <= 0:
+        raise HTTPException(status_code=400, detail="k must be positive")
+    try:
+        q_embedding = await asyncio.to_thread(get_embedding, q)
+        results = await search_user_index(
+            app.state.user_index_chunks_collection, user_id, np.array(q_embedding),
+            k=min(k, 100), meeting_id=meeting_id, start=start, end=end
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"user_id": user_id, "query": q, "results": results}
+
+MEETINGS_PAGE_MAX = 100
+
+def _meeting_view(meeting: dict) -> dict:
+    meeting["id"] = str(meeting.pop("_id"))
+    if "user_id" in meeting:
+        meeting["user_id"] = str(meeting["user_id"])
+    return meeting
+
+@app.get("/users/{user_id}/meetings")
+async def list_user_meetings(user_id: str, limit: int = 20, cursor: Optional[str] = None,
+                             current_user: UserResponse = Depends(get_request_user)):
+    """Page through a user's meetings, newest first; pass next_cursor back to get the following page"""
+    require_same_user(user_id, current_user)
+    try:
+        meetings, next_cursor = await get_user_meetings_page(
+            app.state.meeting_sessions_collection, user_id, limit=max(1, min(limit, MEETINGS_PAGE_MAX)), cursor=cursor
+        )
+    except (ValueError, InvalidId) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"meetings": [_meeting_view(m) for m in meetings], "next_cursor": next_cursor}
+
+@app.get("/users/{user_id}/meetings/{meeting_id}")
+async def get_user_meeting_detail(user_id: str, meeting_id: str, current_user: UserResponse = Depends(get_request_user)):
+    """Meeting metadata and summary; the transcript is served separately"""
+    require_same_user(user_id, current_user)
+    try:
+        meeting = await get_user_meeting(app.state.meeting_sessions_collection, user_id, meeting_id)
+    except InvalidId as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if meeting is None:
+        raise HTTPException(status_code=404, detail="Meeting not found")
+    return _meeting_view(meeting)
+
+@app.get("/users/{user_id}/meetings/{meeting_id}/transcript")
+async def stream_meeting_transcript(user_id: str, meeting_id: str, start: Optional[float] = None,
+                                    end: Optional[float] = None,
+                                    current_user: UserResponse = Depends(get_request_user)):
+    """Stream a meeting's transcript as plain text, one line each; start/end are seconds into the meeting"""
+    require_same_user(user_id, current_user)
+    collection = app.state.meeting_sessions_collection
+    buckets = app.state.transcript_buckets_collection
+    try:
+        meeting = await get_user_meeting(collection, user_id, meeting_id)
+    except InvalidId as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if meeting is None:
+        raise HTTPException(status_code=404, detail="Meeting not found")
+
+    async def lines():
+        if await has_transcript_buckets(buckets, meeting_id):
+            async for line in iter_transcript_lines(buckets, meeting_id, start, end):
+                yield f"[{format_offset(line['start'])}] {line['text']}\n"
+        else:
+            # Meetings stored before bucketing have no timings, so the range does not apply
+            async for chunk in iter_transcript_chunks(collection, meeting_id):
+                yield chunk + "\n"
+
+    return StreamingResponse(lines(), media_type="text/plain; charset=utf-8")
+
+@app.get("/embeddings/cache")
+async def get_embedding_cache_stats():
+    """Hit/miss statistics for the embedding cache"""
+    return embedding_cache.stats()
+
 @app.get("/stats")
 async def get_stats():
     users_collection = app.state.users_collection
@@ -278,21 +777,58 @@ async def get_stats():
         "hours_of_insights": round(total_hours)
     }
 
+async def connect_mongo():
+    """Ping MongoDB and create indexes in the background, retrying until it answers"""
+    while True:
+        success = await test_connection(
+            app.state.async_client,
+            app.state.users_collection,
+            app.state.meeting_sessions_collection
+        )
+        if success:
+            await create_user_index_indexes(app.state.user_index_chunks_collection)
+            await create_transcript_indexes(app.state.transcript_buckets_collection)
+            readiness["mongo"] = "ready"
+            return
+        readiness["mongo"] = "failed"
+        print(f"❌ MongoDB connection failed at startup. Check your .env and network. Retrying in {MONGO_RETRY_SECONDS:.0f}s")
+        await asyncio.sleep(MONGO_RETRY_SECONDS)
+
+async def warm_embedding_model():
+    started = asyncio.get_event_loop().time()
+    try:
+        await asyncio.to_thread(embedding_service.warm_up)
+        readiness["embedding_model"] = "ready"
+        print(f"✅ Embedding model warm in {asyncio.get_event_loop().time() - started:.1f}s")
+    except Exception as e:
+        readiness["embedding_model"] = "failed"
+        print(f"❌ Failed to load embedding model: {e}")
+
 @app.on_event("startup")
 async def startup_event():
-    # Initialize async MongoDB client and collections in app.state
+    app.state.loop_lag_task = asyncio.create_task(metrics.monitor_event_loop_lag())
+    # Initialize async MongoDB client and collections in app.state (no network I/O yet)
     app.state.async_client = get_async_client()
     app.state.async_database = get_async_database(app.state.async_client)
     app.state.users_collection = get_users_collection(app.state.async_database)
     app.state.meeting_sessions_collection = get_meeting_sessions_collection(app.state.async_database)
-    success = await test_connection(
-        app.state.async_client,
-        sync_client,
-        app.state.users_collection,
-        app.state.meeting_sessions_collection
-    )
-    if not success:
-        print("❌ MongoDB connection failed at startup. Check your .env and network.")
+    app.state.user_index_chunks_collection = app.state.async_database[CHUNKS_COLLECTION]
+    app.state.transcript_buckets_collection = app.state.async_database[TRANSCRIPT_BUCKETS_COLLECTION]
+    # Slow warm-up runs in the background so the worker accepts connections right away;
+    # /health/ready reports when each subsystem is actually usable
+    app.state.warmup_tasks = [
+        asyncio.create_task(connect_mongo()),
+        asyncio.create_task(warm_embedding_model()),
+    ]
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    for task in getattr(app.state, "warmup_tasks", []):
+        task.cancel()
+    for task in list(final_summary_tasks):
+        task.cancel()
+    save_embedding_cache()
+    await llm_gateway.close()
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,156 @@
+"""
+Lightweight in-process metrics for Project Co-Pilot
+Gauges and histograms rendered in the Prometheus text format,
+plus an event-loop lag monitor and per-session counters. Recording a value
+is a dict lookup and a few integer increments, so hot paths can afford it.
+"""
+
+import asyncio
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LOOP_LAG_INTERVAL = 0.25
+
+REGISTRY: List["_Metric"] = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        REGISTRY.append(self)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labelnames=(), func=None):
+        super().__init__(name, help_text, labelnames)
+        self.values: Dict[Tuple, float] = {}
+        self.func = func  # Optional callable evaluated at scrape time
+
+    def set(self, value: float, labels: Tuple = ()):
+        self.values[labels] = value
+
+    def _samples(self):
+        if self.func is not None:
+            return [f"{self.name} {self.func()}"]
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {v}" for k, v in self.values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+        self.series: Dict[Tuple, list] = {}  # labels -> [per-bucket counts (+Inf last), sum, count]
+
+    def observe(self, value: float, labels: Tuple = ()):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    @contextmanager
+    def time(self, labels: Tuple = ()):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, labels)
+
+    def _samples(self):
+        lines = []
+        for labels, (counts, total, count) in self.series.items():
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames + ('le',), labels + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+# --- Hot-path metrics ---------------------------------------------------------
+
+EVENT_LOOP_LAG = Histogram("copilot_event_loop_lag_seconds", "Delay of a periodic timer beyond its scheduled time")
+EMBEDDING_ENCODE = Histogram("copilot_embedding_encode_seconds", "Time spent in embedding_model.encode", ("batch",))
+VECTOR_STORE_OP = Histogram("copilot_vector_store_seconds", "SessionVectorStore operation time", ("op",))
+LLM_CALL = Histogram("copilot_llm_call_seconds", "LLM request time including queueing and retries", ("provider", "outcome"))
+AUDIO_CONVERT = Histogram("copilot_audio_convert_seconds", "Time to downmix/resample one inbound audio chunk")
+STT_PROCESS_AUDIO = Histogram("copilot_stt_process_audio_seconds", "Time to hand an audio chunk to the STT stream")
+CONTEXT_PACK = Histogram("copilot_context_pack_seconds", "Time to pack retrieved context into a Q&A prompt")
+QA_PROMPT_TOKENS = Histogram("copilot_qa_prompt_tokens", "Estimated tokens in each Q&A prompt",
+                             buckets=(250, 500, 1000, 1500, 2000, 3000, 4000, 6000, 8000))
+LOCAL_INSIGHTS = Histogram("copilot_local_insights_seconds", "Time to extract provisional conversation points locally")
+ANSWER_LATENCY = Histogram("copilot_answer_latency_seconds", "Time from user_message to ai_answer", ("source",))
+WS_SEND = Histogram("copilot_ws_send_seconds", "Time to send one WebSocket message to a client")
+
+# Per-session counters, exported with a session_id label while the session is live
+SESSION_COUNTER_NAMES = ("audio_bytes", "transcripts", "llm_calls", "points_bytes",
+                         "answer_prefetch_hits", "answer_prefetch_misses")
+session_counters: Dict[str, Dict[str, int]] = {}
+
+
+def track_session(session_id: str):
+    session_counters[session_id] = dict.fromkeys(SESSION_COUNTER_NAMES, 0)
+
+
+def inc_session(session_id: str, name: str, amount: int = 1):
+    # Unknown ids (batch jobs, calls finishing after a session ended) are ignored
+    counters = session_counters.get(session_id)
+    if counters is not None:
+        counters[name] += amount
+
+
+def drop_session(session_id: str):
+    session_counters.pop(session_id, None)
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    for name in SESSION_COUNTER_NAMES:
+        metric_name = f"copilot_session_{name}_total"
+        lines.append(f"# TYPE {metric_name} counter")
+        for session_id, counters in session_counters.items():
+            lines.append(f'{metric_name}{{session_id="{_escape(session_id)}"}} {counters[name]}')
+    return "\n".join(lines) + "\n"
+
+
+async def monitor_event_loop_lag(interval: float = LOOP_LAG_INTERVAL):
+    """Record how late a periodic sleep wakes up; sustained lag means something blocks the loop."""
+    loop = asyncio.get_event_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, loop.time() - start - interval))
@@ -7,23 +7,46 @@ import random
 import time
 from typing import Optional, Callable
 
+MOCK_PHRASES = [
+    "Hello, how are you today?",
+    "This is a test of the transcription system.",
+    "The audio is being processed successfully.",
+    "We can hear you clearly.",
+    "Please continue speaking.",
+    "The meeting is going well.",
+    "Thank you for your input.",
+    "Let's discuss this further.",
+    "I understand your point.",
+    "That's a great idea."
+]
+
 class MockTranscriber:
     """
     Mock transcription service for testing audio flow
     """
     
-    def __init__(self, on_transcript: Optional[Callable] = None):
+    def __init__(self, on_transcript: Optional[Callable] = None, processing_delay: float = 0.1,
+                 bytes_per_transcript: int = 8000):
         self.on_transcript = on_transcript
+        self.processing_delay = processing_delay
+        self.bytes_per_transcript = bytes_per_transcript
         self._is_connected = False
-        self._audio_buffer = b""
+        self._buffered_bytes = 0
+        self._audio_clock = 0.0
+        self._next_phrase = None
+        self.on_interim: Optional[Callable] = None
         self._processing_task = None
         
     @property
     def is_connected(self):
         return self._is_connected
     
-    async def connect(self):
-        """Simulate connection"""
+    async def connect(self, websocket=None, on_transcript: Optional[Callable] = None,
+                      on_interim: Optional[Callable] = None):
+        """Simulate connection (same signature as DeepgramSTT.connect)"""
+        if on_transcript is not None:
+            self.on_transcript = on_transcript
+        self.on_interim = on_interim
         self._is_connected = True
         print("[MockTranscriber] Connected successfully")
         return True
@@ -35,16 +58,23 @@ class MockTranscriber:
             return False
             
         try:
-            # Accumulate audio data
-            self._audio_buffer += audio_chunk
+            # Accumulate audio data (only its size matters for the mock)
+            self._buffered_bytes += len(audio_chunk)
             
             # Simulate processing delay
-            await asyncio.sleep(0.1)
+            if self.processing_delay:
+                await asyncio.sleep(self.processing_delay)
             
             # Generate mock transcript every few chunks
-            if len(self._audio_buffer) > 8000:  # Every ~1 second of audio
+            if self._buffered_bytes > self.bytes_per_transcript:
                 await self._generate_mock_transcript()
-                self._audio_buffer = b""  # Reset buffer
+                self._buffered_bytes = 0  # Reset buffer
+            elif self.on_interim:
+                # Interim hypothesis: the share of the upcoming phrase "heard" so far
+                words = self._upcoming_phrase().split()
+                heard = len(words) * self._buffered_bytes // self.bytes_per_transcript
+                if heard:
+                    await self.on_interim(" ".join(words[:heard]), 0)
                 
             return True
             
@@ -52,29 +82,47 @@ class MockTranscriber:
             print(f"[MockTranscriber] Send audio error: {e}")
             return False
     
+    async def process_audio(self, audio_data: bytes):
+        """DeepgramSTT-compatible alias for send_audio"""
+        return await self.send_audio(audio_data)
+
+    async def keep_alive(self):
+        return self.is_connected
+
+    async def disconnect(self):
+        """DeepgramSTT-compatible alias for close"""
+        await self.close()
+
+    def _upcoming_phrase(self) -> str:
+        if self._next_phrase is None:
+            self._next_phrase = random.choice(MOCK_PHRASES)
+        return self._next_phrase
+
     async def _generate_mock_transcript(self):
         """Generate a mock transcript"""
-        mock_phrases = [
-            "Hello, how are you today?",
-            "This is a test of the transcription system.",
-            "The audio is being processed successfully.",
-            "We can hear you clearly.",
-            "Please continue speaking.",
-            "The meeting is going well.",
-            "Thank you for your input.",
-            "Let's discuss this further.",
-            "I understand your point.",
-            "That's a great idea."
-        ]
-        
-        # Select a random phrase
-        transcript = random.choice(mock_phrases)
+        transcript = self._upcoming_phrase()
+        self._next_phrase = None
         
         if self.on_transcript:
-            await self.on_transcript(transcript)
+            await self.on_transcript(transcript, self._mock_words(transcript), 0)
         
         print(f"[MockTranscriber] Generated transcript: {transcript}")
     
+    def _mock_words(self, transcript: str):
+        """Deepgram-style word columns with plausible timings and one of two speakers"""
+        words = transcript.split()
+        speaker = random.randint(0, 1)
+        start = self._audio_clock
+        starts = [start + 0.3 * i for i in range(len(words))]
+        self._audio_clock = start + 0.3 * len(words)
+        return {
+            "word": words,
+            "start": starts,
+            "end": [s + 0.25 for s in starts],
+            "confidence": [round(random.uniform(0.85, 0.99), 3) for _ in words],
+            "speaker": [speaker] * len(words),
+        }
+
     async def close(self):
         """Close the connection"""
         self._is_connected = False
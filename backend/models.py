@@ -56,7 +56,8 @@ class MeetingSession(BaseModel):
     start_time: datetime
     end_time: Optional[datetime] = None
     summary: Optional[str] = None
-    transcript_chunks: List[str] = []
+    transcript_chunks: List[str] = []  # Legacy; new meetings keep lines in transcript_store buckets
+    transcript_lines: int = 0
     created_at: datetime
 
 class MeetingSessionCreate(BaseModel):
@@ -0,0 +1,187 @@
+"""
+Diff-based conversation_points updates
+Keeps the last conversation points sent to a session and turns each new
+LLM result into add/update/remove operations on items with stable ids.
+Items are matched to the previous ones by embedding similarity, so a
+paraphrase of an existing action item ("Ana to send the deck Friday" vs
+"Ana will send the deck by Friday") is not sent again.
+
+Event: {"type": "conversation_points_diff", "ops": [
+    {"op": "add", "category": "action_items", "id": "p7", "text": "..."},
+    {"op": "update", "category": "questions", "id": "p3", "text": "..."},
+    {"op": "remove", "category": "talking_points", "id": "p2"},
+    {"op": "set", "field": "summary", "text": "..."}]}
+A reconnecting client gets the whole state as a conversation_points_snapshot.
+"""
+
+import itertools
+import json
+import os
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+POINTS_LIST_FIELDS = ("action_items", "talking_points", "questions", "suggestions")
+POINTS_TEXT_FIELDS = ("summary", "insights")
+# Above SAME a new item is the old one reworded: nothing is sent. Between UPDATE
+# and SAME it is the same item with changed content: its text is replaced in place.
+POINTS_SAME_SIMILARITY = float(os.getenv("POINTS_SAME_SIMILARITY", "0.88"))
+POINTS_UPDATE_SIMILARITY = float(os.getenv("POINTS_UPDATE_SIMILARITY", "0.7"))
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def _default_embed(texts: List[str]) -> np.ndarray:
+    from embedding_service import get_embeddings_batch
+    return get_embeddings_batch(texts)
+
+
+class PointsTracker:
+    """Per-session state of the conversation points the client currently shows."""
+
+    def __init__(self, embed: Optional[Callable[[List[str]], np.ndarray]] = None,
+                 same_similarity: float = POINTS_SAME_SIMILARITY, update_similarity: float = POINTS_UPDATE_SIMILARITY):
+        self.embed = embed or _default_embed
+        self.same_similarity = same_similarity
+        self.update_similarity = update_similarity
+        self.items: Dict[str, List[Dict]] = {field: [] for field in POINTS_LIST_FIELDS}  # {"id", "text", "vector"}
+        self.texts: Dict[str, Dict] = {}  # field -> {"text", "vector"}
+        self._ids = itertools.count(1)
+        self.ticks = 0
+        self.full_bytes = 0  # What sending every result whole would have cost
+        self.diff_bytes = 0
+
+    def update(self, points: Dict) -> List[Dict]:
+        """Fold a new LLM result into the state; returns the ops that bring the client up to date."""
+        incoming = {field: [str(t).strip() for t in points.get(field) or [] if str(t).strip()]
+                    for field in POINTS_LIST_FIELDS}
+        scalars = {field: str(points[field]).strip() for field in POINTS_TEXT_FIELDS if points.get(field)}
+        # One embedding call for everything that is not an exact repeat
+        known = {item["text"] for items in self.items.values() for item in items}
+        known.update(entry["text"] for entry in self.texts.values())
+        to_embed = sorted({t for texts in incoming.values() for t in texts} | set(scalars.values()))
+        to_embed = [t for t in to_embed if t not in known]
+        vectors = dict(zip(to_embed, _normalize(self.embed(to_embed)))) if to_embed else {}
+        for items in self.items.values():
+            for item in items:
+                vectors.setdefault(item["text"], item["vector"])
+        for entry in self.texts.values():
+            vectors.setdefault(entry["text"], entry["vector"])
+
+        ops: List[Dict] = []
+        for field in POINTS_LIST_FIELDS:
+            ops.extend(self._diff_list(field, incoming[field], vectors))
+        for field, text in scalars.items():
+            previous = self.texts.get(field)
+            if previous is None or float(previous["vector"] @ vectors[text]) < self.same_similarity:
+                self.texts[field] = {"text": text, "vector": vectors[text]}
+                ops.append({"op": "set", "field": field, "text": text})
+
+        self.ticks += 1
+        self.full_bytes += len(json.dumps({"type": "conversation_points", **points}))
+        if ops:
+            self.diff_bytes += len(json.dumps({"type": "conversation_points_diff", "ops": ops}))
+        return ops
+
+    def _diff_list(self, field: str, texts: List[str], vectors: Dict[str, np.ndarray]) -> List[Dict]:
+        old = self.items[field]
+        new_items: List[Optional[Dict]] = [None] * len(texts)
+        ops: List[Dict] = []
+        if old and texts:
+            similarity = np.stack([vectors[t] for t in texts]) @ np.stack([item["vector"] for item in old]).T
+            # Greedy one-to-one matching, most similar pairs first
+            matched_old = set()
+            for flat in np.argsort(-similarity, axis=None):
+                n, o = divmod(int(flat), len(old))
+                score = similarity[n, o]
+                if score < self.update_similarity:
+                    break
+                if new_items[n] is not None or o in matched_old:
+                    continue
+                matched_old.add(o)
+                item = old[o]
+                if score < self.same_similarity:
+                    item = {"id": item["id"], "text": texts[n], "vector": vectors[texts[n]]}
+                    ops.append({"op": "update", "category": field, "id": item["id"], "text": item["text"]})
+                new_items[n] = item
+            ops.extend({"op": "remove", "category": field, "id": item["id"]}
+                       for o, item in enumerate(old) if o not in matched_old)
+        else:
+            ops.extend({"op": "remove", "category": field, "id": item["id"]} for item in old)
+        for n, text in enumerate(texts):
+            if new_items[n] is None:
+                new_items[n] = {"id": f"p{next(self._ids)}", "text": text, "vector": vectors[text]}
+                ops.append({"op": "add", "category": field, "id": new_items[n]["id"], "text": text})
+        self.items[field] = new_items
+        return ops
+
+    @property
+    def has_points(self) -> bool:
+        return bool(self.texts) or any(self.items.values())
+
+    def snapshot(self) -> Dict:
+        state = {field: [{"id": item["id"], "text": item["text"]} for item in items]
+                 for field, items in self.items.items()}
+        state.update({field: entry["text"] for field, entry in self.texts.items()})
+        return state
+
+    def stats(self) -> Dict:
+        return {"ticks": self.ticks, "full_bytes": self.full_bytes, "diff_bytes": self.diff_bytes}
+
+
+PARAPHRASES = [("will send", "is sending"), ("Discuss", "Talk about"), ("Who owns", "Who is responsible for"),
+               ("Agree on", "Settle on"), ("The team is discussing", "Discussion centers on"), ("by Friday", "before Friday")]
+
+
+def _paraphrase(rng, text: str) -> str:
+    for phrase, alternative in PARAPHRASES:
+        if phrase in text and rng.random() < 0.5:
+            text = text.replace(phrase, alternative)
+    return text
+
+
+def benchmark(hours: float = 1.0, tick_seconds: float = 10.0, embed=None, **thresholds):
+    """Bytes per session-hour: full conversation_points every tick vs diffs.
+
+    Each simulated tick reports the 3 current items per list (rarely a new
+    one replaces the oldest) reworded at random, the way consecutive LLM
+    calls paraphrase unchanged points.
+    """
+    import random
+    rng = random.Random(0)
+    topics = ["the launch timeline", "the Q3 budget", "API export for the customer", "hiring a backend engineer",
+              "the design review", "onboarding metrics", "the pricing page", "the security audit"]
+    owners = ["Ana", "Ben", "Chloe", "Dev"]
+    pool = {
+        "action_items": [f"{rng.choice(owners)} will send an update on {t} by Friday" for t in topics],
+        "talking_points": [f"Discuss risks around {t}" for t in topics],
+        "questions": [f"Who owns {t}?" for t in topics],
+        "suggestions": [f"Agree on a deadline for {t}" for t in topics],
+    }
+    current = {field: list(range(3)) for field in pool}
+    tracker = PointsTracker(embed, **thresholds)
+    op_counts: Dict[str, int] = {}
+    ticks = int(hours * 3600 / tick_seconds)
+    for tick in range(ticks):
+        for field in pool:
+            if rng.random() < 0.05:
+                current[field] = current[field][1:] + [(current[field][-1] + 1) % len(topics)]
+        topic = topics[current["talking_points"][-1]]
+        points = {field: [_paraphrase(rng, pool[field][i]) for i in current[field]] for field in pool}
+        points["summary"] = _paraphrase(rng, f"The team is discussing {topic}")
+        points["insights"] = f"{40 + tick % 7} words discussed"
+        for op in tracker.update(points):
+            op_counts[op["op"]] = op_counts.get(op["op"], 0) + 1
+    stats = tracker.stats()
+    per_hour = 3600 / (ticks * tick_seconds)
+    print(f"[PointsDiff] {ticks} ticks: full {stats['full_bytes'] * per_hour / 1024:.0f} KB/session-hour, "
+          f"diff {stats['diff_bytes'] * per_hour / 1024:.0f} KB/session-hour "
+          f"({stats['full_bytes'] / max(1, stats['diff_bytes']):.1f}x less), ops {op_counts}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,179 @@
+"""
+On-demand profiling for Project Co-Pilot
+Attaches a profiler to the worker (or to one session) for a bounded time
+window. Nothing is installed until a job starts, so there is no overhead
+when profiling is off.
+
+Modes:
+    sample      - wall-clock stack sampler; output is collapsed stacks
+                  (flamegraph.pl / speedscope / inferno compatible).
+                  The sampler thread needs the GIL, so work shorter than
+                  the interpreter switch interval (5 ms) is under-sampled.
+    cprofile    - deterministic cProfile of the event-loop thread; output is a .prof file
+    tracemalloc - allocation growth over the window; output is a text report
+"""
+
+import asyncio
+import cProfile
+import io
+import itertools
+import marshal
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, OrderedDict
+from typing import Dict, Optional
+
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "300"))
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+PROFILE_MAX_JOBS = 10
+PROFILE_MODES = ("sample", "cprofile", "tracemalloc")
+
+_job_ids = itertools.count(1)
+
+
+def _frame_session_id(frame) -> Optional[str]:
+    """Session a frame is working for, judged by a `session_id` or `session` local."""
+    f_locals = frame.f_locals
+    session_id = f_locals.get("session_id")
+    if isinstance(session_id, str):
+        return session_id
+    return getattr(f_locals.get("session"), "session_id", None)
+
+
+class ProfileJob:
+    def __init__(self, mode: str, duration: float, session_id: Optional[str] = None):
+        self.id = str(next(_job_ids))
+        self.mode = mode
+        self.duration = duration
+        self.session_id = session_id
+        self.status = "running"
+        self.started_at = time.time()
+        self.samples = 0
+        self.error: Optional[str] = None
+        self.result: Optional[bytes] = None
+
+    @property
+    def filename(self) -> str:
+        suffix = {"sample": "collapsed.txt", "cprofile": "prof", "tracemalloc": "tracemalloc.txt"}[self.mode]
+        scope = self.session_id or "worker"
+        return f"profile-{self.id}-{scope}.{suffix}"
+
+    def describe(self) -> Dict:
+        return {
+            "job_id": self.id,
+            "mode": self.mode,
+            "session_id": self.session_id,
+            "duration": self.duration,
+            "status": self.status,
+            "samples": self.samples,
+            "error": self.error,
+        }
+
+
+def _sample_stacks(job: ProfileJob, thread_id: int, interval: float, stop: threading.Event) -> Counter:
+    """Sample the event-loop thread's stack until stopped (runs in its own thread)."""
+    stacks: Counter = Counter()
+    while not stop.wait(interval):
+        frame = sys._current_frames().get(thread_id)
+        matched = job.session_id is None
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            if not matched and _frame_session_id(frame) == job.session_id:
+                matched = True
+            frame = frame.f_back
+        if names and matched:
+            stacks[";".join(reversed(names))] += 1
+            job.samples += 1
+    return stacks
+
+
+async def _run_sampler(job: ProfileJob):
+    stop = threading.Event()
+    sampler = asyncio.get_event_loop().run_in_executor(
+        None, _sample_stacks, job, threading.get_ident(), PROFILE_SAMPLE_INTERVAL, stop
+    )
+    try:
+        await asyncio.sleep(job.duration)
+    finally:
+        stop.set()
+    stacks = await sampler
+    job.result = "".join(f"{stack} {count}\n" for stack, count in stacks.most_common()).encode()
+
+
+async def _run_cprofile(job: ProfileJob):
+    # Profiles everything on the event-loop thread; per-session filtering is not possible here
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        await asyncio.sleep(job.duration)
+    finally:
+        profiler.disable()
+    profiler.create_stats()
+    job.result = marshal.dumps(profiler.stats)
+
+
+async def _run_tracemalloc(job: ProfileJob):
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start(25)
+    try:
+        before = tracemalloc.take_snapshot()
+        await asyncio.sleep(job.duration)
+        after = tracemalloc.take_snapshot()
+    finally:
+        if not already_tracing:
+            tracemalloc.stop()
+    out = io.StringIO()
+    out.write(f"Top allocation growth over {job.duration:.0f}s\n")
+    for stat in after.compare_to(before, "traceback")[:50]:
+        out.write(f"\n{stat.size_diff / 1024:+.1f} KiB ({stat.count_diff:+d} blocks)\n")
+        out.write("\n".join(stat.traceback.format(limit=10)) + "\n")
+    job.result = out.getvalue().encode()
+
+
+class Profiler:
+    """Runs at most one profiling job at a time and keeps the last few results."""
+
+    def __init__(self):
+        self.jobs: "OrderedDict[str, ProfileJob]" = OrderedDict()
+        self.active: Optional[ProfileJob] = None
+
+    def start(self, mode: str, duration: float, session_id: Optional[str] = None) -> ProfileJob:
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profiling mode '{mode}', expected one of {', '.join(PROFILE_MODES)}")
+        if not 0 < duration <= PROFILE_MAX_SECONDS:
+            raise ValueError(f"Duration must be between 0 and {PROFILE_MAX_SECONDS:.0f} seconds")
+        if session_id is not None and mode != "sample":
+            raise ValueError("Only 'sample' mode can be scoped to a single session")
+        if self.active is not None:
+            raise RuntimeError(f"Profiling job {self.active.id} is already running")
+        job = ProfileJob(mode, duration, session_id)
+        self.active = job
+        self.jobs[job.id] = job
+        while len(self.jobs) > PROFILE_MAX_JOBS:
+            self.jobs.popitem(last=False)
+        asyncio.create_task(self._run(job))
+        return job
+
+    async def _run(self, job: ProfileJob):
+        runner = {"sample": _run_sampler, "cprofile": _run_cprofile, "tracemalloc": _run_tracemalloc}[job.mode]
+        try:
+            await runner(job)
+            job.status = "done"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            raise
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            print(f"❌ Profiling job {job.id} failed: {e}")
+        finally:
+            self.active = None
+
+
+profiler = Profiler()
@@ -0,0 +1,291 @@
+"""
+Offline re-indexing job for Project Co-Pilot
+Rebuilds transcript embeddings (and optionally summaries) for stored meetings,
+and the per-user vector indexes cross-meeting search reads. The user indexes
+are built in a staging directory and collection that replace the live ones
+only when a full run finishes; sessions that end while the job runs are not
+in the rebuilt index.
+
+Usage:
+    python reindex_job.py --batch-size 256 --workers 4 --checkpoint reindex.ckpt
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from pymongo import UpdateOne
+from bson import ObjectId
+
+from database import get_sync_database, get_meeting_sessions_collection
+from transcript_store import TRANSCRIPT_BUCKETS_COLLECTION, read_transcript_lines
+from user_index import CHUNKS_COLLECTION, USER_INDEX_DIR, UserVectorIndex, build_chunk_docs
+
+EMBEDDINGS_COLLECTION = "transcript_embeddings"
+USER_INDEX_STAGING_DIR = f"{USER_INDEX_DIR}.rebuild"
+USER_INDEX_STAGING_COLLECTION = f"{CHUNKS_COLLECTION}_rebuild"
+
+
+def _embed_worker(texts: List[str]) -> List[List[float]]:
+    """Embed a batch inside a pool process (model is loaded once per process).
+
+    Calls the model directly rather than get_embeddings_batch, which returns
+    zero vectors on any error: a failed batch must raise so it is neither
+    written nor checkpointed.
+    """
+    from embedding_service import get_model
+    embeddings = get_model().encode(texts, convert_to_numpy=True)
+    if len(embeddings) != len(texts):
+        raise RuntimeError(f"Embedded {len(embeddings)} of {len(texts)} chunks")
+    return [list(map(float, e)) for e in embeddings]
+
+
+def load_checkpoint(path: Optional[str]) -> Optional[ObjectId]:
+    """Return the last fully processed meeting id, if any."""
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        data = json.load(f)
+    last_id = data.get("last_meeting_id")
+    return ObjectId(last_id) if last_id else None
+
+
+def save_checkpoint(path: Optional[str], last_id: ObjectId, chunks_done: int):
+    """Atomically persist progress so an interrupted run can resume."""
+    if not path:
+        return
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"last_meeting_id": str(last_id), "chunks_done": chunks_done}, f)
+    os.replace(tmp_path, path)
+
+
+def iter_meetings(meetings, after_id: Optional[ObjectId], buckets=None) -> Iterator[dict]:
+    """Stream meetings in _id order, starting after the checkpoint.
+
+    Meetings recorded since transcripts moved to bucket documents have no
+    transcript_chunks; their lines are read from the buckets collection.
+    """
+    query = {"$or": [{"transcript_chunks.0": {"$exists": True}}, {"transcript_lines": {"$gt": 0}}]}
+    if after_id is not None:
+        query["_id"] = {"$gt": after_id}
+    cursor = meetings.find(query, {"transcript_chunks": 1, "user_id": 1, "created_at": 1}).sort("_id", 1)
+    for meeting in cursor:
+        if not meeting.get("transcript_chunks") and buckets is not None:
+            meeting["transcript_chunks"] = [line["text"] for line in read_transcript_lines(buckets, str(meeting["_id"]))]
+        yield meeting
+
+
+def iter_batches(meetings: Iterator[dict], batch_size: int) -> Iterator[Tuple[List[Tuple[ObjectId, int, str]], ObjectId]]:
+    """Group whole meetings into batches of roughly batch_size chunks.
+
+    Batches never split a meeting, so the checkpoint can always point at
+    the last meeting of a written batch.
+    """
+    batch: List[Tuple[ObjectId, int, str]] = []
+    last_id = None
+    dirty = False
+    for meeting in meetings:
+        for i, text in enumerate(meeting.get("transcript_chunks", [])):
+            if text and text.strip():
+                batch.append((meeting["_id"], i, text))
+        last_id = meeting["_id"]
+        dirty = True
+        if len(batch) >= batch_size:
+            yield batch, last_id
+            batch = []
+            dirty = False
+    if dirty:
+        yield batch, last_id
+
+
+def write_embeddings(collection, batch: List[Tuple[ObjectId, int, str]], vectors: List[List[float]]) -> int:
+    """Upsert one embedding document per chunk with a single bulk write."""
+    if not batch:
+        return 0
+    ops = [
+        UpdateOne(
+            {"meeting_id": meeting_id, "chunk_index": index},
+            {"$set": {"text": text, "embedding": vector}},
+            upsert=True,
+        )
+        for (meeting_id, index, text), vector in zip(batch, vectors)
+    ]
+    collection.bulk_write(ops, ordered=False)
+    return len(ops)
+
+
+def write_user_index(chunks_collection, batch: List[Tuple[ObjectId, int, str]], vectors: List[List[float]],
+                     owners: Dict[ObjectId, dict], base_dir: str = USER_INDEX_STAGING_DIR) -> int:
+    """Append each meeting of the batch to its owner's staging index and upsert the row metadata.
+
+    A meeting already in the index was appended by a run interrupted before
+    its checkpoint; its rows are kept and only the metadata is rewritten.
+    """
+    by_meeting: Dict[ObjectId, Tuple[List[str], List[List[float]]]] = {}
+    for (meeting_id, _, text), vector in zip(batch, vectors):
+        if owners.get(meeting_id, {}).get("user_id"):
+            texts, meeting_vectors = by_meeting.setdefault(meeting_id, ([], []))
+            texts.append(text)
+            meeting_vectors.append(vector)
+    ops = []
+    for meeting_id, (texts, meeting_vectors) in by_meeting.items():
+        meeting = owners[meeting_id]
+        user_id, key = str(meeting["user_id"]), str(meeting_id)
+        created_at = meeting.get("created_at") or meeting_id.generation_time.astimezone(timezone.utc)
+        index = UserVectorIndex(user_id, base_dir)
+        if key in index.meeting_ids:
+            row_range = index.meeting_rows(key)
+        else:
+            row_range = index.add(key, np.asarray(meeting_vectors, dtype=np.float32), created_at)
+        ops.extend(
+            UpdateOne({"user_id": doc["user_id"], "row": doc["row"]}, {"$set": doc}, upsert=True)
+            for doc in build_chunk_docs(user_id, key, texts, row_range, created_at)
+        )
+    if ops:
+        chunks_collection.bulk_write(ops, ordered=False)
+    return len(ops)
+
+
+def reset_user_index_staging(sync_database, base_dir: str = USER_INDEX_STAGING_DIR):
+    """Discard a staging index left by an abandoned run."""
+    shutil.rmtree(base_dir, ignore_errors=True)
+    sync_database[USER_INDEX_STAGING_COLLECTION].drop()
+
+
+def publish_user_index(sync_database, base_dir: str = USER_INDEX_STAGING_DIR, live_dir: str = USER_INDEX_DIR):
+    """Swap the staging index in for the live one; the previous one is kept as <dir>.old.
+
+    Running servers keep reading their mapped files until index.json under
+    the live path changes, then remap the rebuilt arrays.
+    """
+    os.makedirs(base_dir, exist_ok=True)
+    backup_dir = f"{live_dir}.old"
+    shutil.rmtree(backup_dir, ignore_errors=True)
+    if os.path.exists(live_dir):
+        os.replace(live_dir, backup_dir)
+    os.replace(base_dir, live_dir)
+    staging = sync_database[USER_INDEX_STAGING_COLLECTION]
+    if USER_INDEX_STAGING_COLLECTION in sync_database.list_collection_names():
+        staging.rename(CHUNKS_COLLECTION, dropTarget=True)
+    else:
+        sync_database[CHUNKS_COLLECTION].drop()
+
+
+async def _summarize_meetings(texts: Dict[ObjectId, str]) -> Dict[ObjectId, Optional[str]]:
+    from llm_provider import get_llm
+    llm = get_llm("reindex")
+    ids = list(texts.keys())
+    results = await asyncio.gather(*(llm.get_summary_and_suggestion(texts[i]) for i in ids))
+    return dict(zip(ids, results))
+
+
+def rebuild_summaries(meetings, batch: List[Tuple[ObjectId, int, str]]) -> int:
+    """Regenerate MeetingSession.summary for every meeting in the batch."""
+    texts: Dict[ObjectId, List[str]] = {}
+    for meeting_id, _, text in batch:
+        texts.setdefault(meeting_id, []).append(text)
+    summaries = asyncio.run(_summarize_meetings({k: "\n".join(v) for k, v in texts.items()}))
+    ops = [
+        UpdateOne({"_id": meeting_id}, {"$set": {"summary": summary}})
+        for meeting_id, summary in summaries.items() if summary
+    ]
+    if ops:
+        meetings.bulk_write(ops, ordered=False)
+    return len(ops)
+
+
+def run(batch_size: int = 256, workers: int = 2, checkpoint: Optional[str] = None,
+        summaries: bool = False, limit: Optional[int] = None):
+    sync_database = get_sync_database()
+    meetings = get_meeting_sessions_collection(sync_database)
+    embeddings = sync_database[EMBEDDINGS_COLLECTION]
+    embeddings.create_index([("meeting_id", 1), ("chunk_index", 1)], unique=True)
+
+    after_id = load_checkpoint(checkpoint)
+    if after_id:
+        print(f"[Reindex] Resuming after meeting {after_id}")
+    else:
+        reset_user_index_staging(sync_database)
+    user_chunks = sync_database[USER_INDEX_STAGING_COLLECTION]
+    user_chunks.create_index([("user_id", 1), ("row", 1)], unique=True)
+
+    owners: Dict[ObjectId, dict] = {}
+
+    def remember_owners(meeting_docs: Iterator[dict]) -> Iterator[dict]:
+        for meeting in meeting_docs:
+            owners[meeting["_id"]] = {"user_id": meeting.get("user_id"), "created_at": meeting.get("created_at")}
+            yield meeting
+
+    meeting_iter = remember_owners(iter_meetings(meetings, after_id, sync_database[TRANSCRIPT_BUCKETS_COLLECTION]))
+    if limit:
+        from itertools import islice
+        meeting_iter = islice(meeting_iter, limit)
+
+    chunks_done = 0
+    start = time.perf_counter()
+    max_in_flight = max(1, workers * 2)
+    pending = deque()
+
+    def drain_one():
+        nonlocal chunks_done
+        batch, last_id, future = pending.popleft()
+        # Raises for a failed batch, stopping the run before the checkpoint passes it
+        vectors = future.result() if future is not None else []
+        chunks_done += write_embeddings(embeddings, batch, vectors)
+        write_user_index(user_chunks, batch, vectors, owners)
+        for meeting_id in [m for m in owners if m <= last_id]:
+            del owners[meeting_id]
+        if summaries and batch:
+            rebuild_summaries(meetings, batch)
+        save_checkpoint(checkpoint, last_id, chunks_done)
+        elapsed = time.perf_counter() - start
+        rate = chunks_done / elapsed if elapsed > 0 else 0.0
+        print(f"[Reindex] {chunks_done} chunks written ({rate:.1f} chunks/sec), up to meeting {last_id}")
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for batch, last_id in iter_batches(meeting_iter, batch_size):
+            future = pool.submit(_embed_worker, [text for _, _, text in batch]) if batch else None
+            pending.append((batch, last_id, future))
+            # Results are consumed in submission order so the checkpoint only moves forward
+            while len(pending) >= max_in_flight:
+                drain_one()
+        while pending:
+            drain_one()
+
+    if limit:
+        print(f"[Reindex] Partial run (--limit); user index left in {USER_INDEX_STAGING_DIR}")
+    else:
+        publish_user_index(sync_database)
+        print(f"[Reindex] Published rebuilt user index to {USER_INDEX_DIR}")
+        # The staging index is gone, so the next run must start from the first meeting
+        if checkpoint and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+
+    elapsed = time.perf_counter() - start
+    rate = chunks_done / elapsed if elapsed > 0 else 0.0
+    print(f"[Reindex] Done: {chunks_done} chunks in {elapsed:.1f}s ({rate:.1f} chunks/sec)")
+    return chunks_done
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild transcript embeddings for stored meetings")
+    parser.add_argument("--batch-size", type=int, default=256, help="Chunks per embedding batch")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Embedding processes")
+    parser.add_argument("--checkpoint", default="reindex.ckpt", help="Checkpoint file for resuming")
+    parser.add_argument("--summaries", action="store_true", help="Also regenerate meeting summaries")
+    parser.add_argument("--limit", type=int, default=None, help="Max meetings to process")
+    args = parser.parse_args()
+    run(args.batch_size, args.workers, args.checkpoint, args.summaries, args.limit)
+
+
+if __name__ == "__main__":
+    main()
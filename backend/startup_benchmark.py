@@ -0,0 +1,128 @@
+"""
+Cold-start benchmark for the backend
+Measures, in fresh subprocesses:
+  - import time of `main` (total and the slowest top-level imports, via -X importtime)
+  - time from launching uvicorn to the first accepted /ws connection
+  - time until /health/ready reports every subsystem warm
+
+Usage:
+    python startup_benchmark.py --runs 3 --output startup.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+from load_test import _get_json, _git_commit
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def measure_import(top: int = 10) -> Dict:
+    """Import `main` once with -X importtime; returns total seconds and the slowest top-level imports."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                          cwd=BACKEND_DIR, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import main failed:\n{proc.stderr[-2000:]}")
+    modules = []
+    total = 0.0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        seconds = int(cumulative) / 1e6
+        if name.strip() == "main":
+            total = seconds
+        elif depth == 1:  # Imported directly by main (or by its dotenv/fastapi preamble)
+            modules.append((name.strip(), seconds))
+    modules.sort(key=lambda m: m[1], reverse=True)
+    return {"total_s": round(total, 3), "slowest": {name: round(s, 3) for name, s in modules[:top]}}
+
+
+async def _first_websocket(port: int, deadline: float) -> float:
+    import websockets
+    while time.monotonic() < deadline:
+        try:
+            async with websockets.connect(f"ws://127.0.0.1:{port}/ws/startup-bench") as ws:
+                json.loads(await ws.recv())  # The "connection" event
+                return time.monotonic()
+        except (OSError, websockets.exceptions.WebSocketException):
+            await asyncio.sleep(0.05)
+    raise RuntimeError("No WebSocket accepted before the timeout")
+
+
+async def _ready(port: int, deadline: float) -> Dict:
+    body = {}
+    while time.monotonic() < deadline:
+        try:
+            body = await _get_json(port, "/health/ready")
+            if body.get("status") == "ready":
+                return {"at": time.monotonic(), **body}
+        except (OSError, ValueError, IndexError):
+            pass
+        await asyncio.sleep(0.1)
+    return {"at": None, **body}
+
+
+def measure_startup(port: int, timeout: float) -> Dict:
+    """Launch a worker and time the first accepted WebSocket and full readiness."""
+    env = {**os.environ, "STT_PROVIDER": os.getenv("STT_PROVIDER", "mock"),
+           "LLM_PROVIDER": os.getenv("LLM_PROVIDER", "local")}
+    started = time.monotonic()
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+                              cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = started + timeout
+        first_ws = asyncio.run(_first_websocket(port, deadline))
+        ready = asyncio.run(_ready(port, deadline))
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+    return {
+        "first_websocket_s": round(first_ws - started, 3),
+        "ready_s": round(ready["at"] - started, 3) if ready["at"] else None,
+        "subsystems": ready.get("subsystems"),
+    }
+
+
+def _summary(values: List[float]) -> Dict:
+    values = [v for v in values if v is not None]
+    if not values:
+        return {"count": 0}
+    return {"count": len(values), "median": round(statistics.median(values), 3), "max": round(max(values), 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure backend import time and time to first WebSocket")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds to wait for each server start")
+    parser.add_argument("--output", help="Write the JSON result here")
+    args = parser.parse_args()
+
+    imports = [measure_import() for _ in range(args.runs)]
+    startups = [measure_startup(args.port, args.timeout) for _ in range(args.runs)]
+    result = {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "import_main_s": _summary([r["total_s"] for r in imports]),
+        "slowest_imports_s": imports[-1]["slowest"],
+        "first_websocket_s": _summary([r["first_websocket_s"] for r in startups]),
+        "ready_s": _summary([r["ready_s"] for r in startups]),
+        "subsystems": startups[-1]["subsystems"],
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Per-session speech-to-text stream configuration for Project Co-Pilot
+Negotiated in the WebSocket handshake (query parameters on /ws/{session_id})
+and turned into Deepgram's streaming /v1/listen query string
+"""
+
+import os
+from typing import Dict, Literal, Optional
+from urllib.parse import urlencode
+
+from pydantic import BaseModel, Field, ValidationError, model_validator
+
+DEEPGRAM_LISTEN_URL = os.getenv("DEEPGRAM_LISTEN_URL", "wss://api.deepgram.com/v1/listen")
+
+# Query parameters a client may set in the handshake; everything else is server policy
+NEGOTIABLE_FIELDS = ("model", "language", "encoding", "container", "sample_rate", "channels",
+                     "multichannel", "endpointing", "utterance_end_ms",
+                     "input_sample_rate", "input_channels", "input_format")
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+
+class StreamConfig(BaseModel):
+    model: str = "nova-2"
+    language: Optional[str] = None
+    # Raw audio encoding; with a container (webm/ogg) Deepgram reads the format from the stream
+    encoding: Literal["linear16", "opus", "mulaw", "flac"] = "linear16"
+    container: Optional[Literal["webm", "ogg"]] = None
+    sample_rate: int = Field(16000, ge=8000, le=48000)
+    channels: int = Field(1, ge=1, le=8)
+    multichannel: bool = False  # Transcribe each channel separately (e.g. tab audio + microphone)
+    endpointing: Optional[int] = Field(None, ge=10, le=5000)  # ms of silence that ends a segment
+    utterance_end_ms: Optional[int] = Field(None, ge=1000, le=5000)
+    interim_results: bool = True
+    diarize: bool = True
+    punctuate: bool = True
+    smart_format: bool = True
+    # PCM the client actually sends, when it differs from the upstream format above;
+    # the server downmixes/resamples it (see audio_resampler.AudioConverter)
+    input_sample_rate: Optional[int] = Field(None, ge=8000, le=192000)
+    input_channels: Optional[int] = Field(None, ge=1, le=8)
+    input_format: Literal["int16", "float32"] = "int16"
+
+    @model_validator(mode="after")
+    def _check_combinations(self):
+        if self.container is None and self.encoding == "opus" and self.sample_rate not in OPUS_SAMPLE_RATES:
+            raise ValueError(f"Opus sample_rate must be one of {OPUS_SAMPLE_RATES}")
+        if self.multichannel and self.channels < 2:
+            raise ValueError("multichannel needs channels >= 2")
+        if self.utterance_end_ms is not None and not self.interim_results:
+            raise ValueError("utterance_end_ms requires interim_results")
+        if self.needs_conversion:
+            if self.container is not None or self.encoding != "linear16":
+                raise ValueError("input_* conversion needs upstream encoding=linear16 without a container")
+            if self.channels not in (1, self.input_channels or self.channels):
+                raise ValueError("input_channels must equal channels, or channels must be 1 (downmix)")
+        return self
+
+    @property
+    def needs_conversion(self) -> bool:
+        return ((self.input_sample_rate or self.sample_rate) != self.sample_rate
+                or (self.input_channels or self.channels) != self.channels
+                or self.input_format != "int16")
+
+    @classmethod
+    def from_query_params(cls, params) -> "StreamConfig":
+        """Build from handshake query parameters; raises ValueError with a readable message."""
+        try:
+            return cls(**{name: params[name] for name in NEGOTIABLE_FIELDS if name in params})
+        except ValidationError as e:
+            problems = "; ".join(f"{'.'.join(map(str, err['loc'])) or 'config'}: {err['msg']}" for err in e.errors())
+            raise ValueError(f"Invalid stream config: {problems}") from None
+
+    @property
+    def frame_alignment(self) -> int:
+        """Raw linear16 frames must hold whole samples for every channel."""
+        if self.container is None and self.encoding == "linear16":
+            return 2 * self.channels
+        return 1
+
+    def listen_params(self) -> Dict[str, str]:
+        params = {"model": self.model, "channels": self.channels}
+        if self.container is None:
+            params["encoding"] = self.encoding
+            params["sample_rate"] = self.sample_rate
+        for name in ("language", "endpointing", "utterance_end_ms"):
+            value = getattr(self, name)
+            if value is not None:
+                params[name] = value
+        for name in ("multichannel", "interim_results", "diarize", "punctuate", "smart_format"):
+            params[name] = "true" if getattr(self, name) else "false"
+        return {k: str(v) for k, v in params.items()}
+
+    def listen_url(self, base: str = DEEPGRAM_LISTEN_URL) -> str:
+        return f"{base}?{urlencode(self.listen_params())}"
@@ -0,0 +1,74 @@
+"""
+Adaptive scheduling of live summaries
+Decides when a session's transcript has changed enough to be worth another
+LLM summary, and backs off when the LLM is slow
+"""
+
+import os
+from typing import Optional
+
+import numpy as np
+
+SUMMARY_TICK_SECONDS = float(os.getenv("SUMMARY_TICK_SECONDS", "1"))
+SUMMARY_MIN_NEW_TOKENS = int(os.getenv("SUMMARY_MIN_NEW_TOKENS", "40"))
+SUMMARY_TOPIC_SHIFT_DISTANCE = float(os.getenv("SUMMARY_TOPIC_SHIFT_DISTANCE", "0.35"))
+SUMMARY_MAX_STALENESS = float(os.getenv("SUMMARY_MAX_STALENESS", "30"))
+SUMMARY_MIN_INTERVAL = float(os.getenv("SUMMARY_MIN_INTERVAL", "3"))
+SUMMARY_LATENCY_FACTOR = 2.0  # Never summarize more often than this many observed LLM round-trips
+LATENCY_EWMA_ALPHA = 0.3
+
+
+def count_tokens(text: str) -> int:
+    """Cheap token estimate: whitespace-separated words."""
+    return len(text.split())
+
+
+class SummaryScheduler:
+    """Per-session trigger for summaries.
+
+    A summary is due when, after the adaptive minimum interval, either
+    enough new tokens arrived, the latest transcript window drifted away
+    from the one last summarized (topic shift), or anything new arrived
+    and the last summary is older than the max staleness.
+    """
+
+    def __init__(self):
+        self.last_run: Optional[float] = None
+        self.last_tokens = 0
+        self.last_embedding: Optional[np.ndarray] = None
+        self.latency_ewma: Optional[float] = None
+
+    def min_interval(self) -> float:
+        if self.latency_ewma is None:
+            return SUMMARY_MIN_INTERVAL
+        return max(SUMMARY_MIN_INTERVAL, SUMMARY_LATENCY_FACTOR * self.latency_ewma)
+
+    def check(self, now: float, total_tokens: int, latest_embedding: Optional[np.ndarray]) -> Optional[str]:
+        """Return the trigger reason if a summary is due, else None."""
+        new_tokens = total_tokens - self.last_tokens
+        if new_tokens <= 0:
+            return None
+        if self.last_run is None:
+            return "first"
+        elapsed = now - self.last_run
+        if elapsed < self.min_interval():
+            return None
+        if new_tokens >= SUMMARY_MIN_NEW_TOKENS:
+            return "tokens"
+        if latest_embedding is not None and self.last_embedding is not None:
+            # Embeddings in the vector store are already unit-normalized
+            if 1.0 - float(np.dot(latest_embedding, self.last_embedding)) >= SUMMARY_TOPIC_SHIFT_DISTANCE:
+                return "topic_shift"
+        if elapsed >= SUMMARY_MAX_STALENESS:
+            return "staleness"
+        return None
+
+    def record(self, started_at: float, total_tokens: int, latest_embedding: Optional[np.ndarray], latency: float):
+        """Note a completed summary and fold its latency into the moving average."""
+        self.last_run = started_at
+        self.last_tokens = total_tokens
+        self.last_embedding = latest_embedding
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma = LATENCY_EWMA_ALPHA * latency + (1 - LATENCY_EWMA_ALPHA) * self.latency_ewma
@@ -0,0 +1,66 @@
+"""
+Transcript chunker for embeddings
+Merges consecutive final transcripts into size-targeted, overlapping windows
+so each vector carries enough context and fewer encode calls are needed
+"""
+
+import os
+from typing import Dict, List, Optional, Tuple
+
+CHUNK_TARGET_WORDS = int(os.getenv("CHUNK_TARGET_WORDS", "60"))
+CHUNK_OVERLAP_WORDS = int(os.getenv("CHUNK_OVERLAP_WORDS", "15"))
+
+
+class TranscriptChunker:
+    """Accumulates transcript lines and emits windows once they reach the target size.
+
+    Each emitted window is a dict with the merged "text" and the
+    "line_start"/"line_end" (inclusive) indices of the source lines, so hits
+    can be mapped back to the original transcript. The last lines of a
+    closed window (up to overlap_words) are carried into the next one.
+    """
+
+    def __init__(self, target_words: int = CHUNK_TARGET_WORDS, overlap_words: int = CHUNK_OVERLAP_WORDS):
+        self.target_words = target_words
+        self.overlap_words = overlap_words
+        self._lines: List[Tuple[int, str, int]] = []  # (line_index, text, word_count)
+        self._words = 0
+        self._new_lines = 0  # Lines added since the last emitted window
+
+    def add(self, line_index: int, text: str) -> Optional[Dict]:
+        """Add a final transcript line; returns a window if one just closed."""
+        text = text.strip()
+        if not text:
+            return None
+        word_count = len(text.split())
+        self._lines.append((line_index, text, word_count))
+        self._words += word_count
+        self._new_lines += 1
+        if self._words >= self.target_words:
+            return self._emit()
+        return None
+
+    def flush(self) -> Optional[Dict]:
+        """Close the current window early (e.g. before a search or at session end)."""
+        if self._new_lines == 0:
+            return None
+        return self._emit()
+
+    def _emit(self) -> Dict:
+        window = {
+            "text": " ".join(text for _, text, _ in self._lines),
+            "line_start": self._lines[0][0],
+            "line_end": self._lines[-1][0],
+        }
+        # Keep trailing lines as overlap, but never the whole window
+        carried: List[Tuple[int, str, int]] = []
+        carried_words = 0
+        for line in reversed(self._lines[1:]):
+            if carried_words + line[2] > self.overlap_words:
+                break
+            carried.insert(0, line)
+            carried_words += line[2]
+        self._lines = carried
+        self._words = carried_words
+        self._new_lines = 0
+        return window
@@ -0,0 +1,271 @@
+"""
+Bucketed transcript storage for Project Co-Pilot
+A meeting's final transcript lines are grouped into one MongoDB document per
+TRANSCRIPT_BUCKET_SECONDS of meeting time instead of one ever-growing array
+on the meeting document. Each bucket holds its lines as a compressed column
+payload (offsets + text), so an 8-hour meeting stays far below the 16 MB
+document limit, writes touch only the bucket being closed, and a time-range
+read decompresses only the buckets that overlap it.
+
+Bucket document:
+    {"meeting_id": "...", "bucket": 12, "start": 3600.4, "end": 3898.1, "lines": 71,
+     "codec": "zlib", "raw_bytes": 9120, "payload": <bytes>}
+"""
+
+import json
+import os
+import time
+import zlib
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+TRANSCRIPT_BUCKETS_COLLECTION = "transcript_buckets"
+TRANSCRIPT_BUCKET_SECONDS = int(os.getenv("TRANSCRIPT_BUCKET_SECONDS", "300"))
+TRANSCRIPT_COMPRESSION = os.getenv("TRANSCRIPT_COMPRESSION", "zlib")  # zstd, zlib or none
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def resolve_codec(codec: str = TRANSCRIPT_COMPRESSION) -> str:
+    """The codec actually used for new buckets (zstd falls back to zlib when zstandard is missing)."""
+    if codec not in ("zstd", "zlib", "none"):
+        raise ValueError(f"Unknown transcript compression {codec!r}")
+    if codec == "zstd" and _zstd() is None:
+        print("⚠️ TRANSCRIPT_COMPRESSION=zstd but zstandard is not installed; using zlib")
+        return "zlib"
+    return codec
+
+
+def encode_bucket(meeting_id: str, bucket: int, lines: List[Dict], codec: str) -> Dict:
+    """Bucket document for lines of {"start", "end", "text"}, in arrival order.
+
+    The document's start/end span every line, so a late line with an
+    earlier start still matches time-range queries on the bucket.
+    """
+    raw = json.dumps({
+        "start": [line["start"] for line in lines],
+        "end": [line["end"] for line in lines],
+        "text": [line["text"] for line in lines],
+    }, separators=(",", ":")).encode()
+    if codec == "zstd":
+        payload = _zstd().ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    elif codec == "zlib":
+        payload = zlib.compress(raw, ZLIB_LEVEL)
+    else:
+        payload = raw
+    return {
+        "meeting_id": meeting_id,
+        "bucket": bucket,
+        "start": min(line["start"] for line in lines),
+        "end": max(line["end"] for line in lines),
+        "lines": len(lines),
+        "codec": codec,
+        "raw_bytes": len(raw),
+        "payload": payload,
+    }
+
+
+def decode_bucket(doc: Dict) -> List[Dict]:
+    payload = bytes(doc["payload"])
+    if doc["codec"] == "zstd":
+        zstandard = _zstd()
+        if zstandard is None:
+            raise RuntimeError("Transcript bucket is zstd-compressed but zstandard is not installed")
+        raw = zstandard.ZstdDecompressor().decompress(payload, max_output_size=doc["raw_bytes"])
+    elif doc["codec"] == "zlib":
+        raw = zlib.decompress(payload)
+    else:
+        raw = payload
+    columns = json.loads(raw)
+    return [{"start": s, "end": e, "text": t} for s, e, t in zip(columns["start"], columns["end"], columns["text"])]
+
+
+async def create_transcript_indexes(buckets_collection):
+    await buckets_collection.create_index([("meeting_id", 1), ("bucket", 1)], unique=True)
+    # Range reads: the bounds on end/start are checked in the index before any bucket is fetched
+    await buckets_collection.create_index([("meeting_id", 1), ("end", 1), ("start", 1)])
+
+
+class TranscriptBucketWriter:
+    """Buffers a live meeting's lines and writes each bucket once, when meeting time moves past it.
+
+    A failed write keeps the bucket queued and is retried with the next one,
+    so a MongoDB hiccup delays persistence instead of losing lines.
+    """
+
+    def __init__(self, buckets_collection, meeting_id: str, bucket_seconds: int = TRANSCRIPT_BUCKET_SECONDS,
+                 codec: str = TRANSCRIPT_COMPRESSION):
+        self.collection = buckets_collection
+        self.meeting_id = meeting_id
+        self.bucket_seconds = bucket_seconds
+        self.codec = resolve_codec(codec)
+        self.bucket: Optional[int] = None
+        self.lines: List[Dict] = []
+        self._unwritten: List[Dict] = []  # Closed buckets not yet stored
+        self.line_count = 0
+        self.buckets_written = 0
+        self.bytes_written = 0
+
+    async def add(self, start: float, end: float, text: str):
+        bucket = int(start // self.bucket_seconds)
+        if self.bucket is not None and bucket > self.bucket:
+            self._close_bucket()
+            await self._write_unwritten()
+        if self.bucket is None or bucket > self.bucket:
+            self.bucket = bucket
+        # Out-of-order timings (e.g. a late channel) stay in the open bucket
+        self.lines.append({"start": round(start, 2), "end": round(max(end, start), 2), "text": text})
+        self.line_count += 1
+
+    def _close_bucket(self):
+        if self.lines:
+            self._unwritten.append(encode_bucket(self.meeting_id, self.bucket, self.lines, self.codec))
+        self.lines = []
+
+    async def _write_unwritten(self):
+        while self._unwritten:
+            doc = self._unwritten[0]
+            try:
+                await self.collection.replace_one({"meeting_id": doc["meeting_id"], "bucket": doc["bucket"]},
+                                                  doc, upsert=True)
+            except Exception as e:
+                print(f"❌ Failed to store transcript bucket {doc['bucket']} of {self.meeting_id}: {e}")
+                return
+            self._unwritten.pop(0)
+            self.buckets_written += 1
+            self.bytes_written += len(doc["payload"])
+
+    async def close(self):
+        """Write the open bucket and anything still queued."""
+        self._close_bucket()
+        await self._write_unwritten()
+
+
+def _range_query(meeting_id: str, start: Optional[float], end: Optional[float]) -> Dict:
+    query: Dict = {"meeting_id": meeting_id}
+    if start is not None:
+        query["end"] = {"$gte": start}
+    if end is not None:
+        query["start"] = {"$lt": end}
+    return query
+
+
+def _lines_in_range(doc: Dict, start: Optional[float], end: Optional[float]) -> List[Dict]:
+    return [line for line in decode_bucket(doc)
+            if (start is None or line["start"] >= start) and (end is None or line["start"] < end)]
+
+
+async def iter_transcript_lines(buckets_collection, meeting_id: str, start: Optional[float] = None,
+                                end: Optional[float] = None) -> AsyncIterator[Dict]:
+    """Yield a meeting's lines in order, limited to those starting in [start, end) when given."""
+    async for doc in buckets_collection.find(_range_query(meeting_id, start, end)).sort("bucket", 1):
+        for line in _lines_in_range(doc, start, end):
+            yield line
+
+
+def read_transcript_lines(buckets_collection, meeting_id: str, start: Optional[float] = None,
+                          end: Optional[float] = None) -> Iterator[Dict]:
+    """iter_transcript_lines for a synchronous (pymongo) collection, e.g. in offline jobs."""
+    for doc in buckets_collection.find(_range_query(meeting_id, start, end)).sort("bucket", 1):
+        yield from _lines_in_range(doc, start, end)
+
+
+async def has_transcript_buckets(buckets_collection, meeting_id: str) -> bool:
+    return await buckets_collection.find_one({"meeting_id": meeting_id}, {"_id": 1}) is not None
+
+
+def format_offset(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def _synthetic_meeting(hours: float, seconds_per_line: float = 4.0) -> List[Dict]:
+    import random
+    rng = random.Random(0)
+    vocabulary = ("we should ship the release on friday after the review and then update the roadmap "
+                  "budget customer hiring design api export timeline action item follow up next week").split()
+    lines = []
+    t = 0.0
+    while t < hours * 3600:
+        words = rng.randint(6, 30)
+        text = f"Speaker {rng.randint(1, 4)}: " + " ".join(rng.choice(vocabulary) for _ in range(words))
+        lines.append({"start": round(t, 2), "end": round(t + words * 0.3, 2), "text": text})
+        t += seconds_per_line
+    return lines
+
+
+def benchmark(hours_list=(1, 8), window_minutes: int = 10, collection=None):
+    """Storage size and write/read cost of the single-array layout vs buckets, per codec.
+
+    Without a collection this measures encode/decode CPU and document sizes
+    in-process; with a (pymongo) collection it also times the round trips.
+    """
+    import bson
+    codecs = ["none", "zlib"] + (["zstd"] if _zstd() is not None else [])
+    for hours in hours_list:
+        lines = _synthetic_meeting(hours)
+        texts = [line["text"] for line in lines]
+        # Single array: every $push rewrites the whole document, so bytes written grow quadratically
+        doc_size = len(bson.encode({"transcript_chunks": texts}))
+        rewritten = sum(len(t) for t in texts) * len(texts) / 2
+        started = time.perf_counter()
+        bson.decode(bson.encode({"transcript_chunks": texts}))
+        array_read = time.perf_counter() - started
+        print(f"[TranscriptStore] {hours}h, {len(lines)} lines: single array {doc_size / 1e6:.1f} MB "
+              f"({'over' if doc_size > 16 * 1024 * 1024 else 'under'} the 16 MB limit), "
+              f"~{rewritten / 1e6:,.0f} MB rewritten by per-line $push, full read {array_read * 1000:.0f} ms")
+
+        window_start = hours * 3600 / 2
+        window_end = window_start + window_minutes * 60
+        for codec in codecs:
+            started = time.perf_counter()
+            buckets: Dict[int, List[Dict]] = {}
+            for line in lines:
+                buckets.setdefault(int(line["start"] // TRANSCRIPT_BUCKET_SECONDS), []).append(line)
+            docs = [encode_bucket("bench", b, bucket_lines, codec) for b, bucket_lines in buckets.items()]
+            write_cpu = time.perf_counter() - started
+            stored = sum(len(bson.encode(doc)) for doc in docs)
+
+            started = time.perf_counter()
+            full = [line for doc in docs for line in decode_bucket(doc)]
+            read_cpu = time.perf_counter() - started
+            started = time.perf_counter()
+            overlapping = [doc for doc in docs if doc["end"] >= window_start and doc["start"] < window_end]
+            window = [line for doc in overlapping for line in decode_bucket(doc)
+                      if window_start <= line["start"] < window_end]
+            range_cpu = time.perf_counter() - started
+            assert len(full) == len(lines)
+
+            timings = ""
+            if collection is not None:
+                collection.delete_many({"meeting_id": "bench"})
+                started = time.perf_counter()
+                for doc in docs:
+                    collection.replace_one({"meeting_id": "bench", "bucket": doc["bucket"]}, doc, upsert=True)
+                write_db = time.perf_counter() - started
+                started = time.perf_counter()
+                list(collection.find({"meeting_id": "bench", "end": {"$gte": window_start},
+                                      "start": {"$lt": window_end}}))
+                range_db = time.perf_counter() - started
+                collection.delete_many({"meeting_id": "bench"})
+                timings = f", mongo write {write_db * 1000:.0f} ms, mongo range {range_db * 1000:.1f} ms"
+            print(f"[TranscriptStore]   {codec:>4}: {len(docs)} buckets, {stored / 1e6:.2f} MB stored "
+                  f"(largest {max(len(bson.encode(d)) for d in docs) / 1e3:.0f} KB), "
+                  f"encode {write_cpu * 1000:.0f} ms, full read {read_cpu * 1000:.0f} ms, "
+                  f"{window_minutes}-min range {range_cpu * 1000:.1f} ms ({len(window)} lines){timings}")
+
+
+if __name__ == "__main__":
+    import sys
+    if "--mongo" in sys.argv:
+        from database import get_sync_database
+        benchmark(collection=get_sync_database()[TRANSCRIPT_BUCKETS_COLLECTION])
+    else:
+        benchmark()
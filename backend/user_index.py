@@ -0,0 +1,334 @@
+"""
+Persistent per-user vector index for cross-meeting semantic search
+
+Vectors live on disk as memory-mapped float32 (or float16) arrays (one directory per user)
+with small sidecar arrays for the meeting and timestamp of each row, so
+meeting/date filters are applied before any scoring. Chunk text and other
+metadata live in MongoDB, keyed by (user_id, row).
+
+Appends take a per-user file lock, so several workers can share a directory.
+index.json (row count and meeting ids) is replaced atomically after the
+arrays are written: rows past its count are leftovers of an interrupted
+append and are ignored, then overwritten by the next one.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl  # POSIX only; elsewhere appends are serialized within one process
+except ImportError:
+    fcntl = None
+
+USER_INDEX_DIR = os.getenv("USER_INDEX_DIR", "user_indexes")
+USER_INDEX_CACHE_SIZE = int(os.getenv("USER_INDEX_CACHE_SIZE", "32"))
+# float16 halves disk and page-cache use at the cost of an upcast per query block
+USER_INDEX_DTYPE = np.dtype(os.getenv("USER_INDEX_DTYPE", "float32"))
+CHUNKS_COLLECTION = "user_index_chunks"
+SEARCH_BLOCK_ROWS = 65536
+
+
+def _epoch_seconds(moment: datetime) -> int:
+    """Unix time; naive datetimes are taken as UTC."""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+
+class UserVectorIndex:
+    """Append-only, memory-mapped vector index for a single user."""
+
+    def __init__(self, user_id: str, base_dir: str = USER_INDEX_DIR, dimension: int = 384):
+        if not user_id.replace("-", "").replace("_", "").isalnum():
+            raise ValueError(f"Invalid user id for index path: {user_id!r}")
+        self.user_id = user_id
+        self.dimension = dimension
+        self.path = os.path.join(base_dir, user_id)
+        os.makedirs(self.path, exist_ok=True)
+        self._vectors_path = os.path.join(self.path, f"vectors.{USER_INDEX_DTYPE.name}")
+        self._meetings_path = os.path.join(self.path, "meetings.i4")
+        self._times_path = os.path.join(self.path, "times.i8")
+        self._meta_path = os.path.join(self.path, "index.json")
+        self._lock_path = os.path.join(self.path, "index.lock")
+        self._lock = threading.Lock()
+        self._meta_mtime: Optional[int] = None
+        self.meeting_ids: List[str] = []
+        self._meeting_ordinals: Dict[str, int] = {}
+        self._load()
+
+    @property
+    def count(self) -> int:
+        return len(self._times)
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive across threads and, where fcntl exists, across worker processes."""
+        with self._lock, open(self._lock_path, "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_meta(self) -> Tuple[int, List[str]]:
+        """Committed row count and meeting ids; a new directory has none."""
+        if not os.path.exists(self._meta_path):
+            return 0, []
+        with open(self._meta_path) as f:
+            meta = json.load(f)
+        return int(meta["rows"]), list(meta["meeting_ids"])
+
+    def _write_meta(self, rows: int, meeting_ids: List[str]):
+        tmp_path = f"{self._meta_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"rows": rows, "meeting_ids": meeting_ids}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._meta_path)
+
+    def _arrays(self) -> List[Tuple[str, int]]:
+        """(path, bytes per row) of each on-disk array."""
+        return [(self._vectors_path, self.dimension * USER_INDEX_DTYPE.itemsize),
+                (self._meetings_path, np.dtype(np.int32).itemsize),
+                (self._times_path, np.dtype(np.int64).itemsize)]
+
+    @staticmethod
+    def _file_rows(path: str, row_bytes: int) -> int:
+        return os.path.getsize(path) // row_bytes if os.path.exists(path) else 0
+
+    def _load(self):
+        """Read the committed state and (re)open the arrays as read-only memory maps."""
+        self._meta_mtime = os.stat(self._meta_path).st_mtime_ns if os.path.exists(self._meta_path) else None
+        rows, self.meeting_ids = self._read_meta()
+        self._meeting_ordinals = {m: i for i, m in enumerate(self.meeting_ids)}
+        for path, row_bytes in self._arrays():
+            if self._file_rows(path, row_bytes) < rows:
+                raise ValueError(f"User index {self.path} is corrupt: {os.path.basename(path)} is shorter "
+                                 f"than the {rows} committed rows")
+        if rows == 0:
+            self._vectors = np.empty((0, self.dimension), dtype=USER_INDEX_DTYPE)
+            self._meetings = np.empty(0, dtype=np.int32)
+            self._times = np.empty(0, dtype=np.int64)
+            return
+        self._vectors = np.memmap(self._vectors_path, dtype=USER_INDEX_DTYPE, mode="r", shape=(rows, self.dimension))
+        self._meetings = np.memmap(self._meetings_path, dtype=np.int32, mode="r", shape=(rows,))
+        self._times = np.memmap(self._times_path, dtype=np.int64, mode="r", shape=(rows,))
+
+    def _refresh(self):
+        """Pick up rows another worker committed since the arrays were mapped."""
+        mtime = os.stat(self._meta_path).st_mtime_ns if os.path.exists(self._meta_path) else None
+        if mtime != self._meta_mtime:
+            self._load()
+
+    def add(self, meeting_id: str, embeddings: np.ndarray, created_at: datetime) -> Tuple[int, int]:
+        """Append normalized embeddings for one meeting; returns the [start, end) row range."""
+        embeddings = np.asarray(embeddings, dtype=np.float32).reshape(-1, self.dimension)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        embeddings = (embeddings / norms).astype(USER_INDEX_DTYPE)
+        n = len(embeddings)
+        with self._file_lock():
+            # Another worker may have appended since this one last looked
+            start, meeting_ids = self._read_meta()
+            if meeting_id not in meeting_ids:
+                meeting_ids.append(meeting_id)
+            ordinal = meeting_ids.index(meeting_id)
+            columns = (embeddings, np.full(n, ordinal, dtype=np.int32),
+                       np.full(n, _epoch_seconds(created_at), dtype=np.int64))
+            for (path, row_bytes), column in zip(self._arrays(), columns):
+                with open(path, "ab") as f:
+                    f.truncate(start * row_bytes)  # Drop rows of an interrupted append
+                    f.write(column.tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+            # The commit point: until index.json names the new rows they do not exist
+            self._write_meta(start + n, meeting_ids)
+            self._load()
+        return start, start + n
+
+    def meeting_rows(self, meeting_id: str) -> Tuple[int, int]:
+        """The [start, end) row range of a meeting appended in a single add."""
+        ordinal = self._meeting_ordinals.get(meeting_id)
+        rows = np.flatnonzero(self._meetings == ordinal) if ordinal is not None else []
+        return (int(rows[0]), int(rows[-1]) + 1) if len(rows) else (self.count, self.count)
+
+    def _filter_mask(self, meeting_id: Optional[str], start: Optional[datetime], end: Optional[datetime]) -> Optional[np.ndarray]:
+        mask = None
+        if meeting_id is not None:
+            ordinal = self._meeting_ordinals.get(meeting_id)
+            if ordinal is None:
+                return np.zeros(self.count, dtype=bool)
+            mask = self._meetings == ordinal
+        if start is not None:
+            m = self._times >= _epoch_seconds(start)
+            mask = m if mask is None else mask & m
+        if end is not None:
+            m = self._times < _epoch_seconds(end)
+            mask = m if mask is None else mask & m
+        return mask
+
+    def search(self, query_embedding: np.ndarray, k: int = 10, meeting_id: Optional[str] = None,
+               start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Tuple[int, float]]:
+        """Return up to k (row, cosine score) pairs, best first."""
+        with self._lock:
+            self._refresh()
+        if self.count == 0:
+            return []
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        query = query / norm
+
+        mask = self._filter_mask(meeting_id, start, end)
+        if mask is not None:
+            rows = np.flatnonzero(mask)
+            if len(rows) == 0:
+                return []
+        else:
+            rows = None
+
+        best_rows = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        total = self.count if rows is None else len(rows)
+        # Score in blocks so temporaries (and float16 upcasts) stay bounded in memory
+        for offset in range(0, total, SEARCH_BLOCK_ROWS):
+            if rows is None:
+                block_rows = np.arange(offset, min(offset + SEARCH_BLOCK_ROWS, total))
+                block = self._vectors[offset:offset + SEARCH_BLOCK_ROWS]
+            else:
+                block_rows = rows[offset:offset + SEARCH_BLOCK_ROWS]
+                block = self._vectors[block_rows]
+            scores = block.astype(np.float32, copy=False) @ query
+            if len(scores) > k:
+                top = np.argpartition(-scores, k)[:k]
+                block_rows, scores = block_rows[top], scores[top]
+            best_rows = np.concatenate([best_rows, block_rows])
+            best_scores = np.concatenate([best_scores, scores])
+            if len(best_scores) > k:
+                top = np.argpartition(-best_scores, k)[:k]
+                best_rows, best_scores = best_rows[top], best_scores[top]
+
+        order = np.argsort(-best_scores)
+        return [(int(best_rows[i]), float(best_scores[i])) for i in order]
+
+    def close(self):
+        """Drop the memory maps so the OS can reclaim the pages."""
+        self._vectors = self._meetings = self._times = None
+
+
+class UserIndexCache:
+    """Lazily opened user indexes with LRU eviction."""
+
+    def __init__(self, max_users: int = USER_INDEX_CACHE_SIZE, base_dir: str = USER_INDEX_DIR):
+        self.max_users = max_users
+        self.base_dir = base_dir
+        self._indexes: "OrderedDict[str, UserVectorIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> UserVectorIndex:
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is not None:
+                self._indexes.move_to_end(user_id)
+                return index
+            index = UserVectorIndex(user_id, self.base_dir)
+            self._indexes[user_id] = index
+            while len(self._indexes) > self.max_users:
+                # Not closed: a search may still be running on it in another thread;
+                # its memory maps are released once the last reference goes away
+                self._indexes.popitem(last=False)
+            return index
+
+
+user_index_cache = UserIndexCache()
+
+
+def build_chunk_docs(user_id: str, meeting_id: str, texts: List[str], row_range: Tuple[int, int],
+                     created_at: datetime) -> List[Dict]:
+    """Metadata documents for the rows returned by UserVectorIndex.add."""
+    start, _ = row_range
+    return [
+        {"user_id": user_id, "row": start + i, "meeting_id": meeting_id, "text": text, "created_at": created_at}
+        for i, text in enumerate(texts)
+    ]
+
+
+async def create_user_index_indexes(chunks_collection):
+    await chunks_collection.create_index([("user_id", 1), ("row", 1)], unique=True)
+
+
+async def persist_session_to_user_index(chunks_collection, user_id: str, meeting_id: str,
+                                        texts: List[str], embeddings: List[np.ndarray]):
+    """Append a finished session's chunks to the user's persistent index."""
+    if not texts:
+        return
+    created_at = datetime.now(timezone.utc)
+    index = user_index_cache.get(user_id)
+    row_range = await asyncio.to_thread(index.add, meeting_id, np.stack(embeddings), created_at)
+    await chunks_collection.insert_many(build_chunk_docs(user_id, meeting_id, texts, row_range, created_at))
+
+
+async def search_user_index(chunks_collection, user_id: str, query_embedding: np.ndarray, k: int = 10,
+                            meeting_id: Optional[str] = None, start: Optional[datetime] = None,
+                            end: Optional[datetime] = None) -> List[Dict]:
+    """Search a user's past meetings and join hits with their stored metadata."""
+    if k <= 0:
+        raise ValueError("k must be positive")
+    index = user_index_cache.get(user_id)
+    hits = await asyncio.to_thread(index.search, query_embedding, k, meeting_id, start, end)
+    if not hits:
+        return []
+    docs = await chunks_collection.find(
+        {"user_id": user_id, "row": {"$in": [row for row, _ in hits]}},
+        {"_id": 0, "row": 1, "meeting_id": 1, "text": 1, "created_at": 1}
+    ).to_list(length=len(hits))
+    by_row = {doc["row"]: doc for doc in docs}
+    results = []
+    for row, score in hits:
+        doc = by_row.get(row)
+        if doc:
+            results.append({**doc, "score": score})
+    return results
+
+
+def benchmark(n_chunks: int = 1_000_000, queries: int = 20, dimension: int = 384):
+    """Measure query latency over n_chunks synthetic vectors."""
+    import tempfile
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        index = UserVectorIndex("bench", tmp, dimension)
+        per_meeting = 10_000
+        now = datetime.now(timezone.utc)
+        t0 = time.perf_counter()
+        for m in range(0, n_chunks, per_meeting):
+            n = min(per_meeting, n_chunks - m)
+            index.add(f"meeting-{m // per_meeting}", rng.standard_normal((n, dimension), dtype=np.float32), now)
+        print(f"[UserIndex] Built {index.count} rows in {time.perf_counter() - t0:.1f}s")
+
+        for label, kwargs in (("unfiltered", {}), ("meeting filter", {"meeting_id": "meeting-3"})):
+            timings = []
+            for _ in range(queries):
+                q = rng.standard_normal(dimension, dtype=np.float32)
+                t = time.perf_counter()
+                index.search(q, 10, **kwargs)
+                timings.append((time.perf_counter() - t) * 1000)
+            timings.sort()
+            print(f"[UserIndex] {label}: p50={timings[len(timings) // 2]:.1f}ms "
+                  f"p95={timings[int(len(timings) * 0.95) - 1]:.1f}ms")
+
+
+if __name__ == "__main__":
+    import sys
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
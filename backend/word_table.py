@@ -0,0 +1,122 @@
+"""
+Word-level transcript table for Project Co-Pilot
+Stores Deepgram word timings, confidences and diarized speaker labels in
+column arrays (about 18 bytes per word plus the word text) instead of one
+dict per word, and groups words into speaker turns
+"""
+
+import re
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+
+NO_SPEAKER = -1
+SPEAKER_RE = re.compile(r"\bspeaker\s*#?\s*(\d+)\b", re.IGNORECASE)
+
+
+def speaker_label(speaker: int) -> str:
+    """Display label; Deepgram numbers speakers from 0, people count from 1."""
+    return f"Speaker {speaker + 1}"
+
+
+def parse_speaker_filter(question: str) -> Optional[int]:
+    """Speaker referenced in a question like 'what did speaker 2 commit to?'."""
+    match = SPEAKER_RE.search(question)
+    if not match or int(match.group(1)) < 1:
+        return None
+    return int(match.group(1)) - 1
+
+
+def parse_deepgram_words(alternative: Dict) -> Dict[str, list]:
+    """Column lists from a Deepgram alternative's "words" array."""
+    words = alternative.get("words") or []
+    return {
+        "word": [w.get("punctuated_word") or w.get("word", "") for w in words],
+        "start": [w.get("start", 0.0) for w in words],
+        "end": [w.get("end", 0.0) for w in words],
+        "confidence": [w.get("confidence", 0.0) for w in words],
+        "speaker": [w.get("speaker", NO_SPEAKER) for w in words],
+    }
+
+
+class WordTable:
+    """Append-only word table with one row per recognized word.
+
+    Rows for a transcript line are contiguous; line_offsets[i] is the first
+    row of line i, so a line's words are a slice rather than a lookup.
+    """
+
+    COLUMNS = {"start": np.float32, "end": np.float32, "confidence": np.float32,
+               "speaker": np.int16, "line": np.int32}
+
+    def __init__(self, capacity: int = 1024):
+        self.size = 0
+        self.columns = {name: np.empty(capacity, dtype=dtype) for name, dtype in self.COLUMNS.items()}
+        self.words: List[str] = []
+        self.line_offsets: List[int] = []
+        self.speakers: Set[int] = set()
+
+    def _reserve(self, n: int):
+        capacity = len(self.columns["start"])
+        if self.size + n <= capacity:
+            return
+        new_capacity = max(capacity * 2, self.size + n)
+        for name, column in self.columns.items():
+            grown = np.empty(new_capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            self.columns[name] = grown
+
+    def append_line(self, line_index: int, columns: Optional[Dict[str, list]] = None) -> slice:
+        """Add the words of one transcript line; returns their row slice."""
+        while len(self.line_offsets) <= line_index:
+            self.line_offsets.append(self.size)
+        n = len(columns["word"]) if columns else 0
+        rows = slice(self.size, self.size + n)
+        if n == 0:
+            return rows
+        self._reserve(n)
+        for name in ("start", "end", "confidence", "speaker"):
+            self.columns[name][rows] = columns[name]
+        self.columns["line"][rows] = line_index
+        self.words.extend(columns["word"])
+        self.size += n
+        self.speakers.update(int(s) for s in set(columns["speaker"]) if s != NO_SPEAKER)
+        return rows
+
+    def column(self, name: str) -> np.ndarray:
+        return self.columns[name][:self.size]
+
+    def line_rows(self, line_start: int, line_end: int) -> slice:
+        """Row slice covering lines line_start..line_end (inclusive)."""
+        start = self.line_offsets[line_start] if line_start < len(self.line_offsets) else self.size
+        end = self.line_offsets[line_end + 1] if line_end + 1 < len(self.line_offsets) else self.size
+        return slice(start, end)
+
+    def speakers_in(self, line_start: int, line_end: int) -> Set[int]:
+        speakers = np.unique(self.columns["speaker"][self.line_rows(line_start, line_end)])
+        return {int(s) for s in speakers if s != NO_SPEAKER}
+
+    def turns(self, rows: slice) -> List[Dict]:
+        """Group consecutive words by speaker into turns with timings."""
+        speaker = self.columns["speaker"][rows]
+        if len(speaker) == 0:
+            return []
+        # Turn boundaries are where the speaker label changes
+        bounds = np.flatnonzero(np.diff(speaker)) + 1
+        starts = np.concatenate(([0], bounds))
+        ends = np.concatenate((bounds, [len(speaker)]))
+        offset = rows.start
+        confidence = self.columns["confidence"]
+        return [
+            {
+                "speaker": int(speaker[s]),
+                "text": " ".join(self.words[offset + s:offset + e]),
+                "start": round(float(self.columns["start"][offset + s]), 2),
+                "end": round(float(self.columns["end"][offset + e - 1]), 2),
+                "confidence": round(float(confidence[offset + s:offset + e].mean()), 3),
+            }
+            for s, e in zip(starts, ends)
+        ]
+
+    def nbytes(self) -> int:
+        return sum(column[:self.size].nbytes for column in self.columns.values())
@@ -13,6 +13,18 @@ const conversationLog = document.getElementById('conversation-log');
 const summaryArea = document.getElementById('summary-area');
 const startButton = document.getElementById('start-button');
 const stopButton = document.getElementById('stop-button');
+const interimCaption = document.getElementById('interim-caption');
+
+// Conversation points by category: { action_items: [{ id, text }], ..., summary: "" }
+let conversationPoints = {};
+// Utterances still being recognized: channel -> { utterance, text }
+let interims = {};
+// Highest event seq seen and the server session (epoch) it belongs to, sent back on reconnect
+let lastSeq = 0;
+let sessionEpoch = null;
+let reconnectAttempts = 0;
+let reconnectTimer = null;
+const MAX_RECONNECT_ATTEMPTS = 5;
 
 // Initialize
 document.addEventListener('DOMContentLoaded', function() {
@@ -53,6 +65,31 @@ function addMessage(type, text) {
     conversationLog.scrollTop = conversationLog.scrollHeight;
 }
 
+function renderInterimCaption() {
+    const text = Object.values(interims).map((c) => c.text).filter(Boolean).join('\n');
+    interimCaption.textContent = text;
+    interimCaption.style.display = text ? 'block' : 'none';
+}
+
+function applyInterim(data) {
+    // Replace-from-offset diff; a new utterance id starts from an empty caption
+    const channel = data.channel || 0;
+    const current = interims[channel];
+    const base = current && current.utterance === data.utterance ? current.text : '';
+    interims[channel] = { utterance: data.utterance, text: base.slice(0, data.offset) + data.text };
+    renderInterimCaption();
+}
+
+function finalizeInterim(data) {
+    // The final transcript supersedes the partial caption of its utterance
+    const channel = data.channel || 0;
+    const current = interims[channel];
+    if (current && data.utterance >= current.utterance) {
+        delete interims[channel];
+        renderInterimCaption();
+    }
+}
+
 function updateSummary(summary) {
     summaryArea.innerHTML = `
         <div class="summary-header">
@@ -86,6 +123,56 @@ function updateTalkingPoints(points) {
     }
 }
 
+// Ops are idempotent, so diffs replayed after a snapshot are safe to apply again
+function applyPointsOps(ops) {
+    for (const op of ops) {
+        if (op.op === 'set') {
+            conversationPoints[op.field] = op.text;
+            continue;
+        }
+        const items = conversationPoints[op.category] || [];
+        const index = items.findIndex(item => item.id === op.id);
+        if (op.op === 'remove') {
+            if (index !== -1) items.splice(index, 1);
+        } else if (index !== -1) {
+            items[index] = { id: op.id, text: op.text };
+        } else {
+            items.push({ id: op.id, text: op.text });
+        }
+        conversationPoints[op.category] = items;
+    }
+}
+
+function renderConversationPoints() {
+    const texts = (category) => (conversationPoints[category] || []).map(item => item.text);
+    if (conversationPoints.summary) {
+        updateSummary(conversationPoints.summary);
+    }
+    updateTalkingPoints({ talking_points: texts('talking_points') });
+    updateActionItems(texts('action_items'));
+}
+
+function updateActionItems(actionItems) {
+    const existingItems = summaryArea.querySelector('.action-items');
+    if (existingItems) {
+        existingItems.remove();
+    }
+    if (actionItems.length > 0) {
+        const actionItemsDiv = document.createElement('div');
+        actionItemsDiv.className = 'action-items';
+        actionItemsDiv.innerHTML = `
+            <div class="items-header">
+                <span class="icon">✅</span>
+                <span>Action Items</span>
+            </div>
+            <ul class="items-list">
+                ${actionItems.map(item => `<li>${item}</li>`).join('')}
+            </ul>
+        `;
+        summaryArea.appendChild(actionItemsDiv);
+    }
+}
+
 function testBackendConnection() {
     console.log('🧪 Testing backend connection...');
     const apiUrl = 'http://127.0.0.1:8001/';
@@ -194,7 +281,11 @@ async function startAudioCapture() {
 
 async function connectWebSocket() {
     try {
-        const wsUrl = 'ws://127.0.0.1:8001/ws/extension-session';
+        let wsUrl = 'ws://127.0.0.1:8001/ws/extension-session';
+        if (sessionEpoch && lastSeq > 0) {
+            // The server replays missed events before any live ones, so none are skipped as duplicates
+            wsUrl += `?last_seq=${lastSeq}&epoch=${encodeURIComponent(sessionEpoch)}`;
+        }
         console.log('🔗 Connecting to WebSocket URL:', wsUrl);
         
         ws = new WebSocket(wsUrl);
@@ -203,46 +294,39 @@ async function connectWebSocket() {
             console.log('✅ WebSocket connected');
             updateStatus('recording', '🔴 Recording');
             updateAIStatus('Connected');
-            addMessage('ai', 'Connected to AI backend. Start speaking!');
+            addMessage('ai', reconnectAttempts > 0 ? 'Reconnected to AI backend.' : 'Connected to AI backend. Start speaking!');
+            reconnectAttempts = 0;
         };
         
         ws.onmessage = function(event) {
             const data = JSON.parse(event.data);
+            if (data.type === 'interim') {
+                applyInterim(data);
+                return;
+            }
+            if (data.type === 'connection' && data.epoch !== sessionEpoch) {
+                // A new server session: its seqs restart at 1
+                sessionEpoch = data.epoch;
+                lastSeq = 0;
+            }
+            if (typeof data.seq === 'number') {
+                if (data.seq <= lastSeq) return; // Already seen
+                lastSeq = data.seq;
+            }
             console.log('📨 Received message:', data.type);
             
             if (data.type === 'transcript') {
+                finalizeInterim(data);
                 addMessage('user', data.text);
-            } else if (data.type === 'conversation_points') {
-                console.log('💡 Received conversation points:', data.points);
-                
-                if (data.points.summary) {
-                    updateSummary(data.points.summary);
-                }
-                
-                if (data.points.talking_points) {
-                    updateTalkingPoints(data.points);
-                }
-                
-                // Show action items if available
-                if (data.points.action_items && data.points.action_items.length > 0) {
-                    const actionItemsDiv = document.createElement('div');
-                    actionItemsDiv.className = 'action-items';
-                    actionItemsDiv.innerHTML = `
-                        <div class="items-header">
-                            <span class="icon">✅</span>
-                            <span>Action Items</span>
-                        </div>
-                        <ul class="items-list">
-                            ${data.points.action_items.map(item => `<li>${item}</li>`).join('')}
-                        </ul>
-                    `;
-                    
-                    const existingItems = summaryArea.querySelector('.action-items');
-                    if (existingItems) {
-                        existingItems.remove();
-                    }
-                    summaryArea.appendChild(actionItemsDiv);
-                }
+            } else if (data.type === 'conversation_points_snapshot') {
+                conversationPoints = data.points;
+                renderConversationPoints();
+            } else if (data.type === 'conversation_points_diff') {
+                console.log('💡 Received conversation points changes:', data.ops.length);
+                applyPointsOps(data.ops);
+                renderConversationPoints();
+            } else if (data.type === 'replay_gap') {
+                addMessage('ai', 'Some transcript lines were missed while disconnected.');
             } else if (data.type === 'error') {
                 addMessage('ai', `Error: ${data.message}`);
             }
@@ -255,8 +339,20 @@ async function connectWebSocket() {
             addMessage('ai', 'Connection error. Please check if the backend is running at http://127.0.0.1:8001');
         };
         
-        ws.onclose = function() {
-            console.log('🔌 WebSocket closed');
+        ws.onclose = function(event) {
+            console.log('🔌 WebSocket closed:', event.code, event.reason);
+            interims = {};
+            renderInterimCaption();
+            // 1008: rejected by the server (auth, bad config), retrying would not help
+            if (isRecording && event.code !== 1000 && event.code !== 1008 && reconnectAttempts < MAX_RECONNECT_ATTEMPTS) {
+                const timeout = Math.min(Math.pow(2, reconnectAttempts) * 1000, 30000);
+                reconnectAttempts++;
+                console.log(`🔄 Reconnecting in ${timeout / 1000}s (attempt ${reconnectAttempts}/${MAX_RECONNECT_ATTEMPTS})`);
+                updateStatus('disconnected', '🟡 Reconnecting');
+                updateAIStatus('Reconnecting');
+                reconnectTimer = setTimeout(connectWebSocket, timeout);
+                return;
+            }
             updateStatus('disconnected', '🔴 Disconnected');
             updateAIStatus('Disconnected');
         };
@@ -300,8 +396,13 @@ function stopAudioCapture() {
     }
     
     // Close WebSocket
+    if (reconnectTimer) {
+        clearTimeout(reconnectTimer);
+        reconnectTimer = null;
+    }
+    reconnectAttempts = 0;
     if (ws) {
-        ws.close();
+        ws.close(1000, 'Recording stopped');
         ws = null;
     }
     
@@ -311,6 +412,8 @@ function stopAudioCapture() {
 
 function clearConversation() {
     conversationLog.innerHTML = '';
+    interims = {};
+    renderInterimCaption();
     summaryArea.innerHTML = `
         <div class="summary-placeholder">
             <span class="icon">📋</span>
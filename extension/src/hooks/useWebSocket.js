@@ -9,6 +9,8 @@ export const useWebSocket = (url) => {
   const ws = useRef(null);
   const reconnectTimeout = useRef(null);
   const reconnectAttempts = useRef(0);
+  const lastSeq = useRef(0); // Highest server event sequence number seen, for resuming
+  const epoch = useRef(null); // Server session the seqs belong to; a new session restarts them at 1
   const maxReconnectAttempts = 5;
 
   const connect = useCallback(() => {
@@ -16,8 +18,14 @@ export const useWebSocket = (url) => {
 
     console.log('🔌 Attempting WebSocket connection...');
     setConnectionStatus('connecting');
-    
-    ws.current = new WebSocket(url);
+
+    let connectUrl = url;
+    if (epoch.current && lastSeq.current > 0) {
+      // Resume in the handshake: the server replays missed events before any live ones
+      const params = `last_seq=${lastSeq.current}&epoch=${encodeURIComponent(epoch.current)}`;
+      connectUrl += (url.includes('?') ? '&' : '?') + params;
+    }
+    ws.current = new WebSocket(connectUrl);
 
     ws.current.onopen = () => {
       console.log('✅ WebSocket connected successfully');
@@ -31,6 +39,15 @@ export const useWebSocket = (url) => {
       try {
         const data = JSON.parse(event.data);
         console.log('📨 Received WebSocket message:', data);
+        if (data.type === 'connection' && !(data.resumed && data.epoch === epoch.current)) {
+          // A different server session: its seqs are not comparable with the ones seen so far
+          epoch.current = data.epoch;
+          lastSeq.current = 0;
+        }
+        if (typeof data.seq === 'number') {
+          if (data.seq <= lastSeq.current) return; // Already seen (replayed duplicate)
+          lastSeq.current = data.seq;
+        }
         setLastMessage(data);
       } catch (e) {
         console.error('❌ Error parsing WebSocket message:', e);
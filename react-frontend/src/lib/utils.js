@@ -4,3 +4,24 @@ import { twMerge } from "tailwind-merge";
 export function cn(...inputs) {
   return twMerge(clsx(inputs));
 }
+
+// Apply a conversation_points_diff to points state ({ action_items: [{ id, text }], ..., summary: "" }).
+// Ops are idempotent, so diffs replayed after a snapshot are safe to apply again.
+export function applyPointsOps(points, ops) {
+  const next = { ...points };
+  for (const op of ops) {
+    if (op.op === 'set') {
+      next[op.field] = op.text;
+      continue;
+    }
+    const items = (next[op.category] || []).filter((item) => item.id !== op.id);
+    if (op.op === 'remove') {
+      next[op.category] = items;
+    } else {
+      const index = (next[op.category] || []).findIndex((item) => item.id === op.id);
+      items.splice(index === -1 ? items.length : index, 0, { id: op.id, text: op.text });
+      next[op.category] = items;
+    }
+  }
+  return next;
+}
@@ -1,5 +1,6 @@
 import React, { useState, useEffect, useRef, useCallback } from 'react';
 import { useNavigate } from 'react-router-dom';
+import { applyPointsOps } from '../lib/utils';
 
 const WS_URL = process.env.REACT_APP_WS_URL || '';
 
@@ -152,7 +153,8 @@ const AssistantPage = () => {
           const data = JSON.parse(event.data);
           if (data.type === 'transcript') setTranscript(prev => [...prev, data.text]);
           if (data.type === 'summary') setInsights(prev => ({...prev, summary: data.text }));
-          if (data.type === 'points' || data.type === 'conversation_points') setInsights(prev => ({...prev, points: data.points || data }));
+          if (data.type === 'conversation_points_snapshot') setInsights(prev => ({...prev, points: data.points }));
+          if (data.type === 'conversation_points_diff') setInsights(prev => ({...prev, points: applyPointsOps(prev.points, data.ops) }));
           if (data.type === 'ai_answer') {
             setAiResponse(data.text);
             setIsAiReplying(false);
@@ -326,13 +328,13 @@ const AssistantPage = () => {
                       <div>
                         <h3 className="font-bold text-gray-300 text-lg font-serif" style={{ fontFamily: "'DM Serif Display', serif" }}>Action Items</h3>
                         <ul className="list-disc list-inside text-white/90">
-                          {insights.points?.action_items?.length > 0? insights.points.action_items.map((item, i) => <li key={i}>{item}</li>) : <li>None</li>}
+                          {insights.points?.action_items?.length > 0? insights.points.action_items.map((item) => <li key={item.id}>{item.text}</li>) : <li>None</li>}
                         </ul>
                       </div>
                       <div>
                         <h3 className="font-bold text-gray-300 text-lg font-serif" style={{ fontFamily: "'DM Serif Display', serif" }}>Talking Points</h3>
                         <ul className="list-disc list-inside text-white/90">
-                          {insights.points?.talking_points?.length > 0? insights.points.talking_points.map((item, i) => <li key={i}>{item}</li>) : <li>None</li>}
+                          {insights.points?.talking_points?.length > 0? insights.points.talking_points.map((item) => <li key={item.id}>{item.text}</li>) : <li>None</li>}
                         </ul>
                       </div>
                     </div>